@@ -1,68 +1,129 @@
-from typing import Generator, Optional
+from typing import Optional, Type, TypeVar, Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlmodel import Session, select
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core import security
+from app.core import metrics, security
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.database import get_session
+from app.core.database import get_async_session
 from app.models.user import User
 from app.models.organization import Organization
-from app.schemas.token import TokenData
+from app.schemas.token import Principal, TokenData
 
 # We might need two generic token URLs in swagger, but for now let's point to user login
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/users/login"
 )
 
-def get_current_user(
-    session: Session = Depends(get_session),
-    token: str = Depends(reusable_oauth2)
-) -> User:
+# Column snapshots of recently authenticated users and organizations, keyed
+# by (role, id). Saves the session.get round trip on every authenticated call.
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
+PRINCIPAL_CACHE_REQUESTS = metrics.register(metrics.Gauge(
+    "principal_cache_requests", "Principal cache lookups since startup, by result.", ("result",),
+    lambda: [(("hit",), principal_cache.hits), (("miss",), principal_cache.misses)],
+))
+
+PrincipalModel = TypeVar("PrincipalModel", User, Organization)
+
+ROLE_MISMATCH_DETAIL = {"user": "Not a user", "organization": "Not an organization"}
+
+def invalidate_principal(role: str, id: int) -> None:
+    """
+    Drop a cached principal; call after changing the account's row.
+    """
+    principal_cache.invalidate((role, id))
+
+def decode_token(token: str, role: str) -> TokenData:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         token_data = TokenData(**payload)
+        if token_data.role != role or token_data.sub is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=ROLE_MISMATCH_DETAIL[role],
+            )
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
-    # Check if subject is an ID (assuming user ID)
-    # We might need to differentiate between user and org in the token
-    # For now, let's assume if it's a user endpoint, we look for a user
-    
-    user = session.get(User, int(token_data.sub))
+    return token_data
+
+async def load_principal(
+    session: AsyncSession, model: Type[PrincipalModel], role: str, id: int
+) -> Optional[PrincipalModel]:
+    """
+    Return the account row attached to `session`, from the cache when possible.
+    A cache hit builds a fresh instance per request and attaches it as
+    persistent without emitting SQL, so cached state is never shared or mutated.
+    """
+    key = (role, id)
+    snapshot = principal_cache.get(key)
+    if snapshot is None:
+        obj = await session.get(model, id)
+        if obj is not None:
+            principal_cache.set(key, obj.model_dump())
+        return obj
+
+    obj = model.model_validate(snapshot)
+    make_transient_to_detached(obj)
+    session.add(obj)
+    return obj
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_async_session),
+    token: str = Depends(reusable_oauth2)
+) -> User:
+    token_data = decode_token(token, "user")
+    user = await load_principal(session, User, "user", int(token_data.sub))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
-def get_current_organization(
-    session: Session = Depends(get_session),
-    token: str = Depends(reusable_oauth2) 
+async def get_current_organization(
+    session: AsyncSession = Depends(get_async_session),
+    token: str = Depends(reusable_oauth2)
 ) -> Organization:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenData(**payload)
-        # We can add a 'role' or 'type' claim to the token to be sure
-        if token_data.role != "organization":
-             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not an organization",
-            )
-    except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
-        
-    org = session.get(Organization, int(token_data.sub))
+    token_data = decode_token(token, "organization")
+    org = await load_principal(session, Organization, "organization", int(token_data.sub))
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
     return org
+
+async def _get_principal(
+    session: AsyncSession, token: str, model: Union[Type[User], Type[Organization]], role: str
+) -> Principal:
+    token_data = decode_token(token, role)
+    principal = Principal(id=int(token_data.sub), role=role)
+    if settings.TRUST_TOKEN_CLAIMS:
+        return principal
+    if not await load_principal(session, model, role, principal.id):
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    return principal
+
+async def get_current_user_principal(
+    session: AsyncSession = Depends(get_async_session),
+    token: str = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    For endpoints that only need the caller's id. With TRUST_TOKEN_CLAIMS
+    enabled this never touches the database.
+    """
+    return await _get_principal(session, token, User, "user")
+
+async def get_current_organization_principal(
+    session: AsyncSession = Depends(get_async_session),
+    token: str = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    Organization counterpart of get_current_user_principal.
+    """
+    return await _get_principal(session, token, Organization, "organization")
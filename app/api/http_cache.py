@@ -0,0 +1,28 @@
+"""
+Conditional GET helpers (ETag / If-None-Match).
+"""
+from typing import Optional
+
+from fastapi import Request, Response
+
+def strong_etag(value: str) -> str:
+    return f'"{value}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match already names `etag`.
+    Weak comparison, as RFC 9110 prescribes for If-None-Match.
+    """
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == bare for candidate in header.split(","))
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Response:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
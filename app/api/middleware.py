@@ -0,0 +1,79 @@
+"""
+ASGI middleware. Written against the raw ASGI interface rather than
+BaseHTTPMiddleware, which runs the app in a separate task and buffers
+streaming responses through a memory stream.
+"""
+import time
+from http.cookies import SimpleCookie
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import primary_reads_cookie, stop_tracking_commits, track_commits
+
+class ReadYourWritesMiddleware:
+    """
+    Give responses to requests that committed the cookie that pins the
+    client's following reads to the primary. A no-op without a replica.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.DATABASE_READ_URL:
+            await self.app(scope, receive, send)
+            return
+
+        commits, token = track_commits()
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and commits:
+                name, value, max_age = primary_reads_cookie()
+                cookie = SimpleCookie()
+                cookie[name] = value
+                cookie[name]["max-age"] = max_age
+                cookie[name]["path"] = "/"
+                cookie[name]["httponly"] = True
+                cookie[name]["samesite"] = "lax"
+                header = cookie.output(header="").strip().encode("latin-1")
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            stop_tracking_commits(token)
+
+class MetricsMiddleware:
+    """
+    Time every HTTP request and record its SQL statements per route
+    (see app.core.metrics). Only added when METRICS_ENABLED is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats, token = metrics.start_request()
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Templated path, so per-id URLs share one series.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.finish_request(
+                token, stats, scope["method"], route, status,
+                time.perf_counter() - started, settings.METRICS_N_PLUS_ONE_THRESHOLD,
+            )
@@ -0,0 +1,124 @@
+"""
+Keyset pagination for job and application listings.
+
+Listings are ordered newest first by (date_posted, id), or (applied_at, id)
+for applications. A cursor is an opaque
+token encoding the sort key of the last row of the previous page, so fetching
+page N is an index range scan from that key instead of an OFFSET that reads
+and discards every earlier row.
+"""
+import base64
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.models.application import Application
+from app.models.job import Job
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+T = TypeVar("T")
+
+def _encode(key: list) -> str:
+    payload = json.dumps(key, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+def encode_cursor(date_posted: datetime, id: int) -> str:
+    return _encode([date_posted.isoformat(), id])
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        date_posted, id = _decode(cursor)
+        return datetime.fromisoformat(date_posted), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_rank_cursor(rank: float, id: int) -> str:
+    return _encode([rank, id])
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, id = _decode(cursor)
+        return float(rank), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate_jobs(
+    statement: SelectOfScalar[Job],
+    *,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    model=Job,
+) -> SelectOfScalar[Job]:
+    """
+    Order a Job query by (date_posted, id) descending and restrict it to one page.
+    A cursor takes precedence; otherwise `skip` is applied as a plain OFFSET
+    for compatibility with older clients. `model` is Job or ArchivedJob.
+    """
+    statement = statement.order_by(model.date_posted.desc(), model.id.desc())
+    if cursor:
+        statement = statement.where(tuple_(model.date_posted, model.id) < decode_cursor(cursor))
+    elif skip:
+        statement = statement.offset(skip)
+    return statement.limit(limit)
+
+def paginate_applications(
+    statement: SelectOfScalar[Application],
+    *,
+    cursor: Optional[str],
+    limit: int,
+    model=Application,
+) -> SelectOfScalar[Application]:
+    """
+    Application counterpart of paginate_jobs, ordered by (applied_at, id)
+    descending. Cursor only. `model` is Application or ArchivedApplication.
+    """
+    statement = statement.order_by(model.applied_at.desc(), model.id.desc())
+    if cursor:
+        statement = statement.where(
+            tuple_(model.applied_at, model.id) < decode_cursor(cursor)
+        )
+    return statement.limit(limit)
+
+def merge_pages(hot: Sequence[T], archived: Sequence[T], *, key: Callable[[T], Any], skip: int, limit: int) -> List[T]:
+    """
+    One page of the union of a hot and an archived listing. Both must be
+    pages with the same cursor, each fetched with limit `skip + limit` and
+    no offset, since an OFFSET cannot be split between two tables.
+    """
+    merged = heapq.merge(hot, archived, key=key, reverse=True)
+    return list(islice(merged, skip, skip + limit))
+
+def set_next_cursor(response: Response, jobs: Sequence[Job], limit: int) -> None:
+    """
+    Advertise the cursor for the following page when this one is full.
+    """
+    if jobs and len(jobs) == limit:
+        last = jobs[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date_posted, last.id)
+
+def set_next_rank_cursor(response: Response, rows: Sequence[Tuple[Job, float]], limit: int) -> None:
+    """
+    Same as set_next_cursor, for (Job, rank) rows of a ranked search.
+    """
+    if rows and len(rows) == limit:
+        last_job, last_rank = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_rank_cursor(last_rank, last_job.id)
+
+def set_next_application_cursor(
+    response: Response, applications: Sequence[Application], limit: int
+) -> None:
+    if applications and len(applications) == limit:
+        last = applications[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.applied_at, last.id)
@@ -0,0 +1,107 @@
+"""
+Rate limits and concurrency caps applied to the API, as dependencies.
+
+Login is limited per client IP and per submitted account, so neither one
+address trying many accounts nor many addresses trying one account gets
+more than a few Argon2 verifications through. Register is limited per IP;
+apply and CV upload per account and per IP. The client IP is the ASGI
+client address; behind a proxy, run uvicorn with --proxy-headers so it is
+the real client's.
+
+Concurrency caps bound the CPU-heavy routes per process: matching,
+uploads and bulk ingestion, and the streaming exports.
+"""
+from typing import AsyncIterator
+
+from fastapi import Depends, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
+from starlette.types import Receive, Scope, Send
+
+from app.api import deps
+from app.core.config import settings
+from app.core.rate_limit import ConcurrencyLimiter, RateLimit, create_rate_limit_backend
+from app.schemas.token import Principal
+
+backend = create_rate_limit_backend(settings.RATE_LIMIT_URL, prefix="ratelimit:")
+
+login_per_ip = RateLimit("login-ip", settings.RATE_LIMIT_LOGIN_PER_IP, backend)
+login_per_account = RateLimit("login-account", settings.RATE_LIMIT_LOGIN_PER_ACCOUNT, backend)
+register_per_ip = RateLimit("register-ip", settings.RATE_LIMIT_REGISTER_PER_IP, backend)
+writes_per_ip = RateLimit("writes-ip", settings.RATE_LIMIT_WRITES_PER_IP, backend)
+apply_per_account = RateLimit("apply-account", settings.RATE_LIMIT_APPLY_PER_ACCOUNT, backend)
+upload_per_account = RateLimit("upload-account", settings.RATE_LIMIT_UPLOAD_PER_ACCOUNT, backend)
+
+matching_slots = ConcurrencyLimiter(settings.MATCHING_MAX_CONCURRENCY)
+upload_slots = ConcurrencyLimiter(settings.UPLOAD_MAX_CONCURRENCY)
+export_slots = ConcurrencyLimiter(settings.EXPORT_MAX_CONCURRENCY)
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+def _login_limit(role: str):
+    async def limit_login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        await login_per_ip.hit(client_ip(request))
+        await login_per_account.hit(f"{role}:{form_data.username.strip().lower()}")
+    return limit_login
+
+limit_user_login = _login_limit("user")
+limit_organization_login = _login_limit("organization")
+
+async def limit_register(request: Request) -> None:
+    if settings.RATE_LIMIT_ENABLED:
+        await register_per_ip.hit(client_ip(request))
+
+async def limit_apply(
+    request: Request, current_user: Principal = Depends(deps.get_current_user_principal)
+) -> None:
+    if settings.RATE_LIMIT_ENABLED:
+        await writes_per_ip.hit(client_ip(request))
+        await apply_per_account.hit(str(current_user.id))
+
+async def limit_upload(
+    request: Request, current_user: Principal = Depends(deps.get_current_user_principal)
+) -> None:
+    if settings.RATE_LIMIT_ENABLED:
+        await writes_per_ip.hit(client_ip(request))
+        await upload_per_account.hit(str(current_user.id))
+
+def concurrency_cap(limiter: ConcurrencyLimiter):
+    """
+    Hold a slot of `limiter` for the rest of the request, or fail with
+    OverloadedError (503) when none is free. Not for streaming responses,
+    whose body outlives the dependency; return a CappedStreamingResponse
+    instead.
+    """
+    async def hold_slot() -> AsyncIterator[None]:
+        limiter.acquire()
+        try:
+            yield
+        finally:
+            limiter.release()
+    return hold_slot
+
+class CappedStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that takes a slot of `limiter` when created (or
+    fails with OverloadedError) and holds it until the response has been
+    sent or has failed, even if the body was never iterated, e.g. because
+    the client went away before the first chunk.
+    """
+
+    def __init__(self, limiter: ConcurrencyLimiter, *args, **kwargs):
+        limiter.acquire()
+        try:
+            super().__init__(*args, **kwargs)
+        except BaseException:
+            limiter.release()
+            raise
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.limiter.release()
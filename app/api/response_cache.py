@@ -0,0 +1,149 @@
+"""
+Response cache for the public job board (GET /users/jobs).
+
+A page is cached as its serialised JSON body plus a strong ETag (a digest
+of the body), keyed by filter combination (see JobFilters), cursor, skip
+and limit, so a hit neither queries nor serialises anything and a matching
+If-None-Match costs no body at all. Facet counts are cached the same way,
+per filter combination.
+
+Invalidation is by tag versions (see CacheBackend). Every page is tagged
+with the ids of the jobs on it, and pages that new postings shift (the first
+page and any OFFSET page) also carry the "head" tag. Updating a job drops
+only the pages showing it; creating one drops only the head pages, since a
+new posting sorts first and cursor pages are fixed by their cursor. An
+update that can move a job in or out of a filtered view (its status,
+department or age range) may add it to any page, so it bumps the "filters"
+tag that every page carries. Facet counts carry "head" and "filters".
+Removing jobs (archiving them) drops the pages showing them and the head
+pages, whose offsets and counts they shift.
+
+Every write also bumps the "generation" tag, before the others. Readers
+take a `snapshot` of it before querying, and a result is only cached if
+the generation is unchanged when its tag versions are read: a write that
+landed while the query ran may not be in the result, and its bumps may
+already be in the versions. The application_count on a page is stale for
+at most JOB_CACHE_TTL.
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from pydantic import TypeAdapter
+
+from app.api.http_cache import strong_etag
+from app.api.pagination import encode_cursor
+from app.core.cache import CacheBackend, create_cache_backend
+from app.core.config import settings
+from app.models.job import Job
+from app.schemas.job import JobRead
+from app.services.job_filters import JobFilters
+
+GENERATION_TAG = "generation"
+HEAD_TAG = "head"
+FILTER_TAG = "filters"
+# Job fields that decide whether a job matches a filtered view.
+FILTERED_FIELDS = frozenset({"status", "department", "min_age", "max_age"})
+JOB_LIST_ADAPTER = TypeAdapter(List[JobRead])
+
+@dataclass
+class CachedPage:
+    body: bytes
+    etag: str
+    next_cursor: Optional[str]
+
+def _job_tag(id: int) -> str:
+    return f"job:{id}"
+
+class JobPageCache:
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def key(filters: JobFilters, *, cursor: Optional[str], skip: int, limit: int) -> str:
+        return f"jobs:{filters.cache_key()}:{cursor or ''}:{skip}:{limit}"
+
+    @staticmethod
+    def facets_key(filters: JobFilters) -> str:
+        return f"facets:{filters.cache_key()}"
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = await self.backend.get(key)
+        if entry is None:
+            return None
+        tags = entry["tags"]
+        if await self.backend.versions(list(tags)) != list(tags.values()):
+            return None
+        return entry
+
+    async def snapshot(self) -> int:
+        """
+        The current generation; take it before querying what will be stored.
+        """
+        (generation,) = await self.backend.versions([GENERATION_TAG])
+        return generation
+
+    async def _save(self, key: str, entry: Dict[str, Any], tags: List[str], generation: int) -> None:
+        current, *versions = await self.backend.versions([GENERATION_TAG, *tags])
+        if current != generation:
+            return
+        await self.backend.set(key, {**entry, "tags": dict(zip(tags, versions))}, self.ttl)
+
+    async def get(self, key: str) -> Optional[CachedPage]:
+        entry = await self._load(key)
+        if entry is None:
+            return None
+        return CachedPage(entry["body"].encode(), entry["etag"], entry["next_cursor"])
+
+    async def store(
+        self, key: str, jobs: Sequence[Job], *, limit: int, head: bool, generation: int
+    ) -> CachedPage:
+        """
+        Serialise one page of jobs and cache it, unless a write happened since
+        the `generation` snapshot. `head` marks pages whose contents change
+        when a job is created.
+        """
+        body = JOB_LIST_ADAPTER.dump_json(JOB_LIST_ADAPTER.validate_python(jobs, from_attributes=True))
+        next_cursor = None
+        if jobs and len(jobs) == limit:
+            next_cursor = encode_cursor(jobs[-1].date_posted, jobs[-1].id)
+        page = CachedPage(body, strong_etag(hashlib.sha256(body).hexdigest()[:32]), next_cursor)
+
+        tags = [_job_tag(job.id) for job in jobs] + [FILTER_TAG] + ([HEAD_TAG] if head else [])
+        await self._save(key, {
+            "body": body.decode(),
+            "etag": page.etag,
+            "next_cursor": next_cursor,
+        }, tags, generation)
+        return page
+
+    async def get_facets(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = await self._load(key)
+        return None if entry is None else entry["facets"]
+
+    async def store_facets(self, key: str, facets: Dict[str, Any], *, generation: int) -> None:
+        await self._save(key, {"facets": facets}, [HEAD_TAG, FILTER_TAG], generation)
+
+    async def jobs_created(self) -> None:
+        await self.backend.bump([GENERATION_TAG, HEAD_TAG])
+
+    async def jobs_changed(self, ids: Iterable[int], *, refilter: bool = False) -> None:
+        """
+        Drop the pages showing `ids`; with `refilter`, also every filtered
+        page and facet count, for changes to FILTERED_FIELDS.
+        """
+        await self.backend.bump(
+            [GENERATION_TAG] + [_job_tag(id) for id in ids] + ([FILTER_TAG] if refilter else [])
+        )
+
+    async def jobs_removed(self, ids: Iterable[int]) -> None:
+        await self.backend.bump([GENERATION_TAG, HEAD_TAG] + [_job_tag(id) for id in ids])
+
+job_page_cache = JobPageCache(
+    create_cache_backend(
+        settings.JOB_CACHE_URL, maxsize=settings.JOB_CACHE_SIZE,
+        ttl=settings.JOB_CACHE_TTL, prefix="jobboard:",
+    ),
+    settings.JOB_CACHE_TTL,
+)
@@ -1,55 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
-from typing import Any
+from sqlalchemy import union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api import deps
-from app.core import security
-from app.core.database import get_session
+from app.api import deps, rate_limits
+from app.api.http_cache import etag_matches, not_modified, strong_etag
+from app.api.pagination import (
+    merge_pages, paginate_applications, paginate_jobs, set_next_application_cursor, set_next_cursor,
+)
+from app.api.response_cache import FILTERED_FIELDS, job_page_cache
+from app.core import config, security
+from app.core.database import get_async_read_session, get_async_session, read_session_maker, stream_rows
+from app.models.application import Application, ApplicationStatus
+from app.models.archive import ArchivedApplication, ArchivedJob
+from app.models.job import Job
 from app.models.organization import Organization
-from app.schemas.organization import OrganizationCreate, OrganizationRead
-from app.schemas.token import Token
+from app.models.user import User
+from app.schemas.application import (
+    ApplicantRead, ApplicationRead, ApplicationStatusResult, ApplicationStatusUpdate,
+)
+from app.schemas.job import JobBulkResult, JobCreate, JobRead, JobUpdate, check_age_range
+from app.schemas.organization import OrganizationCreate, OrganizationRead, OrganizationStats
+from app.schemas.token import Principal, Token
+from app.schemas.user import ApplicantMatch, CandidateMatch
+from app.services import matching_hooks, organization_stats
+from app.services.applications import status_counts, transition_applications
+from app.services.cv_storage import stream_zip
+from app.services.cv_text import applicants_matching_statement
+from app.services.exports import EXPORT_MEDIA_TYPES, encode_rows
+from app.services.job_ingest import BULK_MEDIA_TYPES, BulkFormatError, JobIngest, iter_csv, iter_ndjson
 
 router = APIRouter()
 
-@router.post("/register", response_model=OrganizationRead)
-def register_organization(
+# CVs are personal data: browsers may keep a copy but must revalidate it.
+CV_CACHE_CONTROL = "private, no-cache"
+
+@router.post("/register", response_model=OrganizationRead, dependencies=[Depends(rate_limits.limit_register)])
+async def register_organization(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     org_in: OrganizationCreate,
 ) -> Any:
     """
     Register a new organization.
     """
-    org = session.exec(select(Organization).where(Organization.email == org_in.email)).first()
+    org = (await session.exec(select(Organization).where(Organization.email == org_in.email))).first()
     if org:
         raise HTTPException(
             status_code=400,
             detail="An organization with this email already exists.",
         )
     
-    org_obj = Organization.model_validate(
-        org_in, update={"password_hash": security.get_password_hash(org_in.password)}
-    )
+    password_hash = await security.hash_password_async(org_in.password)
+    org_obj = Organization.model_validate(org_in, update={"password_hash": password_hash})
     session.add(org_obj)
-    session.commit()
-    session.refresh(org_obj)
+    await session.commit()
+    await session.refresh(org_obj)
     return org_obj
 
-@router.post("/login", response_model=Token)
-def login_organization(
-    session: Session = Depends(get_session),
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limits.limit_organization_login)])
+async def login_organization(
+    session: AsyncSession = Depends(get_async_session),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2 compatible token login for organizations.
     """
-    org = session.exec(select(Organization).where(Organization.email == form_data.username)).first()
-    if not org or not security.verify_password(form_data.password, org.password_hash):
+    org = (await session.exec(select(Organization).where(Organization.email == form_data.username))).first()
+    if not org:
         raise HTTPException(
             status_code=400, detail="Incorrect email or password"
         )
+    verified, new_hash = await security.verify_password_async(form_data.password, org.password_hash)
+    if not verified:
+        raise HTTPException(
+            status_code=400, detail="Incorrect email or password"
+        )
+    if new_hash:
+        # Stored hash predates the current Argon2 parameters; upgrade it.
+        org.password_hash = new_hash
+        session.add(org)
+        await session.commit()
+        deps.invalidate_principal("organization", org.id)
     
     # We'll need to handle the token generation consistently
     return {
@@ -59,68 +99,458 @@ def login_organization(
         "token_type": "bearer",
     }
 
-from app.models.job import Job
-from app.models.application import Application
-from app.models.user import User
-from app.schemas.job import JobCreate, JobRead
-from app.models.organization import Organization
-from typing import List
+async def get_owned_job(
+    session: AsyncSession, job_id: int, organization_id: int, *,
+    include_archived: bool = False, for_update: bool = False,
+) -> Union[Job, ArchivedJob]:
+    job = await session.get(Job, job_id, with_for_update=for_update)
+    if job is None and include_archived:
+        job = await session.get(ArchivedJob, job_id)
+    if not job or job.organization_id != organization_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.post("/jobs", response_model=JobRead)
-def create_job(
+async def create_job(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     job_in: JobCreate,
-    current_org: Organization = Depends(deps.get_current_organization),
+    current_org: Principal = Depends(deps.get_current_organization_principal),
 ) -> Any:
     """
     Create a new job posting.
     """
     job = Job.model_validate(job_in, update={"organization_id": current_org.id})
     session.add(job)
-    session.commit()
-    session.refresh(job)
+    try:
+        await organization_stats.record(
+            session, {current_org.id: organization_stats.jobs_posted([job.status])}
+        )
+        await session.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="A job with this external_id already exists.")
+    await session.refresh(job)
+    matching_hooks.job_changed(job)
+    await job_page_cache.jobs_created()
+    return job
+
+BULK_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/x-ndjson": {"schema": {"type": "string"}},
+            "text/csv": {"schema": {"type": "string"}},
+        },
+    }
+}
+
+@router.post(
+    "/jobs/bulk", response_model=JobBulkResult, openapi_extra=BULK_OPENAPI,
+    dependencies=[Depends(rate_limits.concurrency_cap(rate_limits.upload_slots))],
+)
+async def create_jobs_bulk(
+    *,
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    mode: str = Query("insert", pattern="^(insert|upsert)$"),
+    batch_size: Optional[int] = Query(None, ge=1, le=2000),
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+) -> Any:
+    """
+    Create many job postings from an NDJSON or CSV body (one JobCreate per
+    line / row), parsed as it streams in and inserted in batches. Invalid
+    rows are reported by row number without stopping the upload. With
+    mode=upsert, rows are matched on external_id and existing postings updated.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    body_format = BULK_MEDIA_TYPES.get(media_type)
+    if body_format is None:
+        raise HTTPException(
+            status_code=415, detail="Send application/x-ndjson or text/csv"
+        )
+    rows = (iter_csv if body_format == "csv" else iter_ndjson)(request.stream())
+    ingest = JobIngest(
+        session, current_org.id,
+        upsert=mode == "upsert",
+        batch_size=batch_size or config.settings.JOB_BULK_BATCH_SIZE,
+    )
+    try:
+        return await ingest.run(rows)
+    except BulkFormatError as exc:
+        # Batches written before the body turned out unreadable are kept.
+        raise HTTPException(
+            status_code=400,
+            detail={"message": str(exc), "created": ingest.result.created, "updated": ingest.result.updated},
+        )
+    finally:
+        if ingest.result.created:
+            await job_page_cache.jobs_created()
+        if ingest.updated_ids:
+            await job_page_cache.jobs_changed(ingest.updated_ids, refilter=True)
+
+@router.patch("/jobs/{job_id}", response_model=JobRead)
+async def update_job(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    job_id: int,
+    job_in: JobUpdate,
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+) -> Any:
+    """
+    Update a job posting owned by the current organization.
+    """
+    # Locked until commit, so the status it replaces is the one the stats subtract.
+    job = await get_owned_job(session, job_id, current_org.id, for_update=True)
+
+    updates = job_in.model_dump(exclude_unset=True)
+    try:
+        # A patch may set one bound against the other, stored one.
+        check_age_range(updates.get("min_age", job.min_age), updates.get("max_age", job.max_age))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    previous_status = job.status
+    job.sqlmodel_update(updates)
+    session.add(job)
+    if job.status != previous_status:
+        await organization_stats.record(session, {
+            current_org.id: organization_stats.job_status_changed([(previous_status, job.status)])
+        })
+    await session.commit()
+    await session.refresh(job)
+    matching_hooks.job_changed(job)
+    await job_page_cache.jobs_changed([job.id], refilter=not FILTERED_FIELDS.isdisjoint(updates))
     return job
 
+@router.get(
+    "/jobs/{job_id}/candidates", response_model=List[CandidateMatch],
+    dependencies=[Depends(rate_limits.concurrency_cap(rate_limits.matching_slots))],
+)
+async def job_candidates(
+    *,
+    session: AsyncSession = Depends(get_async_read_session),
+    job_id: int,
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Users whose profile best matches one of the organization's jobs,
+    limited to those within the job's age range.
+    """
+    job = await get_owned_job(session, job_id, current_org.id)
+
+    from app.services.matching import matching_engine, user_age  # numpy/scipy; see matching_hooks
+
+    await matching_engine.refresh(session)
+    matches = matching_engine.rank_candidates(job, limit)
+    if not matches:
+        return []
+    users = {
+        user.id: user
+        for user in (await session.exec(select(User).where(User.id.in_([id for id, _ in matches])))).all()
+    }
+    return [
+        CandidateMatch(
+            user_id=id,
+            full_name=users[id].full_name,
+            qualification=users[id].qualification,
+            desired_job=users[id].desired_job,
+            age=user_age(users[id].age, users[id].date_of_birth),
+            score=score,
+        )
+        for id, score in matches if id in users
+    ]
+
+@router.get("/jobs/{job_id}/applicants/search", response_model=List[ApplicantMatch])
+async def search_job_applicants(
+    *,
+    session: AsyncSession = Depends(get_async_read_session),
+    job_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(100, ge=1, le=500),
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+) -> Any:
+    """
+    Applicants to one of the organization's jobs whose CV mentions every
+    keyword in `q`. Only CVs whose text has been extracted are searched.
+    """
+    await get_owned_job(session, job_id, current_org.id)
+
+    statement = applicants_matching_statement(job_id, q, limit)
+    if statement is None:
+        return []
+    rows = (await session.exec(statement)).all()
+    return [
+        ApplicantMatch(
+            application_id=application_id, user_id=user_id, full_name=full_name,
+            email=email, cv_filename=cv_filename, status=application_status,
+        )
+        for application_id, user_id, full_name, email, cv_filename, application_status in rows
+    ]
+
+@router.get("/jobs/{job_id}/applications", response_model=List[ApplicationRead])
+async def read_job_applications(
+    *,
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+    job_id: int,
+    application_status: Optional[ApplicationStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    include_archived: bool = False,
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+) -> Any:
+    """
+    Applications to one of the organization's jobs with their applicants,
+    newest first. A page costs one query however many applicants it holds,
+    or two with include_archived, which also lists archived applications.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
+    """
+    await get_owned_job(session, job_id, current_org.id, include_archived=include_archived)
+
+    async def page(model) -> list:
+        statement = select(model).where(model.job_id == job_id)
+        if application_status:
+            statement = statement.where(model.status == application_status)
+        return (await session.exec(
+            paginate_applications(statement, cursor=cursor, limit=limit, model=model)
+            .options(joinedload(model.user))
+        )).all()
+
+    applications = await page(Application)
+    if include_archived:
+        applications = merge_pages(
+            applications, await page(ArchivedApplication),
+            key=lambda application: (application.applied_at, application.id), skip=0, limit=limit,
+        )
+    set_next_application_cursor(response, applications, limit)
+    return [
+        ApplicationRead(
+            id=application.id,
+            job_id=application.job_id,
+            applied_at=application.applied_at,
+            status=application.status,
+            applicant=ApplicantRead.model_validate(application.user, from_attributes=True),
+        )
+        for application in applications
+    ]
+
+@router.post("/jobs/{job_id}/applications/status", response_model=ApplicationStatusResult)
+async def update_application_statuses(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    job_id: int,
+    update_in: ApplicationStatusUpdate,
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+) -> Any:
+    """
+    Move many applications to a job to a new status at once, e.g. reject
+    everyone still pending except `exclude_ids` when a role is filled.
+    Runs one UPDATE per source status however many applications it touches.
+    """
+    await get_owned_job(session, job_id, current_org.id)
+
+    updated = await transition_applications(
+        session, job_id, update_in.status,
+        organization_id=current_org.id,
+        application_ids=update_in.application_ids,
+        exclude_ids=update_in.exclude_ids,
+        from_statuses=update_in.from_status,
+    )
+    await session.commit()
+    return ApplicationStatusResult(updated=updated, counts=await status_counts(session, job_id))
+
+APPLICATION_EXPORT_COLUMNS = {
+    "application_id": Application.id,
+    "applied_at": Application.applied_at,
+    "status": Application.status,
+    "user_id": User.id,
+    "full_name": User.full_name,
+    "email": User.email,
+    "phone": User.phone,
+    "qualification": User.qualification,
+    "desired_job": User.desired_job,
+    "cv_filename": User.cv_filename,
+}
+
+@router.get("/jobs/{job_id}/applications/export")
+async def export_job_applications(
+    *,
+    request: Request,
+    session: AsyncSession = Depends(get_async_read_session),
+    job_id: int,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    application_status: Optional[ApplicationStatus] = Query(None, alias="status"),
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+) -> Any:
+    """
+    Stream every application to a job as NDJSON or CSV. Rows are read
+    through a server-side cursor, so memory use does not grow with the
+    number of applicants.
+    """
+    await get_owned_job(session, job_id, current_org.id)
+
+    statement = (
+        select(*APPLICATION_EXPORT_COLUMNS.values())
+        .join(User, User.id == Application.user_id)
+        .where(Application.job_id == job_id)
+        .order_by(Application.applied_at.desc(), Application.id.desc())
+    )
+    if application_status:
+        statement = statement.where(Application.status == application_status)
+
+    return rate_limits.CappedStreamingResponse(
+        rate_limits.export_slots,
+        encode_rows(
+            stream_rows(statement, session_maker=read_session_maker(request)),
+            list(APPLICATION_EXPORT_COLUMNS), export_format,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="job_{job_id}_applications.{export_format}"'
+        },
+    )
+
 @router.get("/jobs", response_model=List[JobRead])
-def read_jobs(
-    session: Session = Depends(get_session),
-    current_org: Organization = Depends(deps.get_current_organization),
+async def read_jobs(
+    response: Response,
+    session: AsyncSession = Depends(get_async_read_session),
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+    cursor: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    include_archived: bool = False,
+) -> Any:
+    """
+    Retrieve jobs created by the current organization, newest first.
+    With include_archived, archived jobs are listed too.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
+    """
+    if not include_archived:
+        result = await session.exec(
+            paginate_jobs(
+                select(Job).where(Job.organization_id == current_org.id),
+                cursor=cursor, skip=skip, limit=limit,
+            )
+        )
+        jobs = result.all()
+    else:
+        pages = []
+        for model in (Job, ArchivedJob):
+            result = await session.exec(
+                paginate_jobs(
+                    select(model).where(model.organization_id == current_org.id),
+                    cursor=cursor, skip=0, limit=(0 if cursor else skip) + limit, model=model,
+                )
+            )
+            pages.append(result.all())
+        jobs = merge_pages(
+            *pages, key=lambda job: (job.date_posted, job.id), skip=0 if cursor else skip, limit=limit,
+        )
+    set_next_cursor(response, jobs, limit)
+    return jobs
+
+@router.get("/stats", response_model=OrganizationStats)
+async def read_stats(
+    session: AsyncSession = Depends(get_async_read_session),
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+    days: int = Query(30, ge=1, le=366),
 ) -> Any:
     """
-    Retrieve jobs created by the current organization.
+    Dashboard totals (open jobs, applications per status) and postings and
+    applications per day over the last `days` days, read from the daily
+    rollup rather than from the organization's jobs and applications.
     """
-    return session.exec(
-        select(Job).where(Job.organization_id == current_org.id).offset(skip).limit(limit)
-    ).all()
+    return await organization_stats.organization_stats(session, current_org.id, days)
 
 @router.get("/applications/{application_id}/cv")
-def download_applicant_cv(
+async def download_applicant_cv(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_async_read_session),
     application_id: int,
-    current_org: Organization = Depends(deps.get_current_organization),
+    include_archived: bool = False,
+    current_org: Principal = Depends(deps.get_current_organization_principal),
 ) -> Any:
     """
-    Download the CV for a specific job application.
-    Only the organization that posted the job can download the CV.
+    Download the CV for a specific job application, or an archived one with
+    include_archived. Only the organization that posted the job can
+    download the CV. Supports If-None-Match and Range requests.
     """
-    application = session.get(Application, application_id)
-    if not application:
+    statement = (
+        select(Job.organization_id, User.cv_path, User.cv_sha256, User.cv_filename)
+        .select_from(Application)
+        .join(Job, Job.id == Application.job_id)
+        .join(User, User.id == Application.user_id)
+        .where(Application.id == application_id)
+    )
+    if include_archived:
+        # An archived application's job may be hot or archived.
+        owners = union_all(
+            select(Job.id, Job.organization_id), select(ArchivedJob.id, ArchivedJob.organization_id)
+        ).subquery()
+        statement = union_all(statement, (
+            select(owners.c.organization_id, User.cv_path, User.cv_sha256, User.cv_filename)
+            .select_from(ArchivedApplication)
+            .join(owners, owners.c.id == ArchivedApplication.job_id)
+            .join(User, User.id == ArchivedApplication.user_id)
+            .where(ArchivedApplication.id == application_id)
+        ))
+    row = (await session.exec(statement)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Application not found")
-    
-    job = session.get(Job, application.job_id)
-    if not job or job.organization_id != current_org.id:
+
+    organization_id, cv_path, cv_sha256, cv_filename = row
+    if organization_id != current_org.id:
         raise HTTPException(
             status_code=403,
             detail="You do not have permission to access this CV."
         )
-    
-    user = session.get(User, application.user_id)
-    if not user or not user.cv_path:
+    if not cv_path:
         raise HTTPException(status_code=404, detail="CV not found for this applicant")
-    
-    return FileResponse(user.cv_path)
 
+    headers = {"Cache-Control": CV_CACHE_CONTROL}
+    if cv_sha256:
+        # Blobs are content-addressed, so the digest is a strong validator.
+        headers["ETag"] = strong_etag(cv_sha256)
+        if etag_matches(request, headers["ETag"]):
+            return not_modified(headers["ETag"], CV_CACHE_CONTROL)
+    if not await anyio.Path(cv_path).is_file():
+        raise HTTPException(status_code=404, detail="CV not found for this applicant")
+    # FileResponse answers Range / If-Range itself, against the ETag above.
+    return FileResponse(cv_path, filename=cv_filename, headers=headers)
+
+@router.get("/jobs/{job_id}/cvs.zip")
+async def download_job_cvs(
+    *,
+    request: Request,
+    session: AsyncSession = Depends(get_async_read_session),
+    job_id: int,
+    current_org: Principal = Depends(deps.get_current_organization_principal),
+) -> Any:
+    """
+    Download the CVs of everyone who applied to a job as one ZIP archive.
+    The archive is built while it is sent, so memory use does not grow
+    with the number or size of the CVs.
+    """
+    await get_owned_job(session, job_id, current_org.id)
+
+    statement = (
+        select(Application.id, User.cv_path, User.cv_filename)
+        .join(User, User.id == Application.user_id)
+        .where(Application.job_id == job_id, User.cv_path.is_not(None))
+        .order_by(Application.id)
+    )
+
+    async def entries():
+        async for application_id, cv_path, cv_filename in stream_rows(
+            statement, session_maker=read_session_maker(request)
+        ):
+            extension = Path(cv_filename or cv_path).suffix.lower()
+            yield f"application_{application_id}{extension}", cv_path
+
+    return rate_limits.CappedStreamingResponse(
+        rate_limits.export_slots,
+        stream_zip(entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="job_{job_id}_cvs.zip"'},
+    )
@@ -1,63 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
-from typing import Any, List
-from pathlib import Path
-import shutil
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-
-from app.api import deps
-from app.core import security
-from app.core.database import get_session
-from app.models.user import User
-from app.schemas.user import UserCreate, UserRead, UserLogin
-from app.models.user import User
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import deps, rate_limits
+from app.api.http_cache import etag_matches, not_modified
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER, decode_rank_cursor, paginate_jobs, set_next_rank_cursor,
+)
+from app.api.response_cache import job_page_cache
+from app.core import config, security
+from app.core.database import get_async_read_session, get_async_session, record_commit
 from app.models.job import Job
-from app.models.application import Application
-from app.schemas.user import UserCreate, UserRead, UserLogin
-from app.schemas.token import Token
-from app.schemas.job import JobRead
-from app.core import config
+from app.models.user import User
+from app.schemas.application import ApplicationBulkCreate, ApplicationBulkResult
+from app.schemas.job import JobFacets, JobRead, JobRecommendation
+from app.schemas.token import Principal, Token
+from app.schemas.user import UserCreate, UserRead
+from app.services import matching_hooks
+from app.services.applications import create_applications, existing_job_ids
+from app.services.apply_coalescer import apply_coalescer
+from app.services.cv_storage import (
+    InvalidUploadError, UploadTooLargeError, receive_upload, release_blob,
+)
+from app.services.cv_text import cv_extractor, register_cv
+from app.services.job_filters import (
+    JobFilters, facet_counts_statement, filter_jobs, fold_facets, user_age,
+)
+from app.services.outbox import outbox_worker
+from app.services.search import search_jobs_statement
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserRead)
-def register_user(
+@router.post("/register", response_model=UserRead, dependencies=[Depends(rate_limits.limit_register)])
+async def register_user(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user_in: UserCreate,
 ) -> Any:
     """
     Register a new user.
     """
-    user = session.exec(select(User).where(User.email == user_in.email)).first()
+    user = (await session.exec(select(User).where(User.email == user_in.email))).first()
     if user:
         raise HTTPException(
             status_code=400,
             detail="A user with this email already exists.",
         )
     
-    user_obj = User.model_validate(
-        user_in, update={"password_hash": security.get_password_hash(user_in.password)}
-    )
+    password_hash = await security.hash_password_async(user_in.password)
+    user_obj = User.model_validate(user_in, update={"password_hash": password_hash})
     session.add(user_obj)
-    session.commit()
-    session.refresh(user_obj)
+    await session.commit()
+    await session.refresh(user_obj)
+    matching_hooks.user_changed(user_obj)
     return user_obj
 
-@router.post("/login", response_model=Token)
-def login_user(
-    session: Session = Depends(get_session),
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limits.limit_user_login)])
+async def login_user(
+    session: AsyncSession = Depends(get_async_session),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = session.exec(select(User).where(User.email == form_data.username)).first()
-    if not user or not security.verify_password(form_data.password, user.password_hash):
+    user = (await session.exec(select(User).where(User.email == form_data.username))).first()
+    if not user:
         raise HTTPException(
             status_code=400, detail="Incorrect email or password"
         )
+    verified, new_hash = await security.verify_password_async(form_data.password, user.password_hash)
+    if not verified:
+        raise HTTPException(
+            status_code=400, detail="Incorrect email or password"
+        )
+    if new_hash:
+        # Stored hash predates the current Argon2 parameters; upgrade it.
+        user.password_hash = new_hash
+        session.add(user)
+        await session.commit()
+        deps.invalidate_principal("user", user.id)
     
     # We store role in token to distinguish
     access_token_expires = security.settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -68,68 +92,249 @@ def login_user(
         "token_type": "bearer",
     }
 
-@router.post("/upload-cv", response_model=UserRead)
-def upload_cv(
+# The body is streamed by hand rather than declared as File(...), so document it here.
+CV_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+@router.post(
+    "/upload-cv", response_model=UserRead, openapi_extra=CV_UPLOAD_OPENAPI,
+    dependencies=[
+        Depends(rate_limits.limit_upload),
+        Depends(rate_limits.concurrency_cap(rate_limits.upload_slots)),
+    ],
+)
+async def upload_cv(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(deps.get_current_user),
-    file: UploadFile = File(...),
 ) -> Any:
     """
     Upload CV for the current user.
+    The file is streamed into content-addressed storage, up to CV_MAX_BYTES.
+    Its text is extracted in the background; see cv_text_status.
     """
-    upload_dir = Path(config.settings.UPLOAD_DIR)
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_location = upload_dir / f"user_{current_user.id}_{file.filename}"
-    with file_location.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    current_user.cv_path = str(file_location)
+    try:
+        blob = await receive_upload(request)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"CV exceeds the {config.settings.CV_MAX_BYTES} byte limit",
+        )
+    except InvalidUploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    previous_path = current_user.cv_path
+    current_user.cv_path = blob.path
+    current_user.cv_sha256 = blob.sha256
+    current_user.cv_filename = blob.filename
     current_user.is_verified = True # Assume uploading CV verifies profile
+    needs_extraction = await register_cv(session, current_user)
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    deps.invalidate_principal("user", current_user.id)
+    if needs_extraction:
+        cv_extractor.notify()
+    if previous_path != blob.path:
+        await release_blob(session, previous_path)
+    await session.refresh(current_user)
     return current_user
 
-@router.get("/jobs", response_model=List[JobRead])
-def list_jobs(
-    session: Session = Depends(get_session),
+JOB_BOARD_CACHE_CONTROL = "private, no-cache"
+
+def job_filters(
     current_user: User = Depends(deps.get_current_user),
+    eligible: bool = True,
+    department: Optional[str] = None,
+    job_status: Optional[str] = Query(None, alias="status"),
+    industry: Optional[str] = None,
+) -> JobFilters:
+    """
+    Job board filters for the caller. `eligible` (the default) keeps Open
+    jobs whose age range admits the user's age; pass eligible=false to see
+    every job.
+    """
+    return JobFilters(
+        eligible=eligible,
+        age=user_age(current_user.age, current_user.date_of_birth),
+        department=department,
+        status=job_status,
+        industry=industry,
+    )
+
+@router.get("/jobs", response_model=List[JobRead])
+async def list_jobs(
+    request: Request,
+    session: AsyncSession = Depends(get_async_read_session),
+    filters: JobFilters = Depends(job_filters),
+    cursor: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
     """
-    List available jobs for users to apply.
+    List available jobs for users to apply, newest first.
+    Only jobs the user is eligible for unless eligible=false; narrow further
+    by department, status or organization industry.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
+    Pages are served from cache and carry an ETag for If-None-Match.
     """
-    return session.exec(select(Job).offset(skip).limit(limit)).all()
+    key = job_page_cache.key(filters, cursor=cursor, skip=skip, limit=limit)
+    page = await job_page_cache.get(key)
+    if page is None:
+        generation = await job_page_cache.snapshot()
+        result = await session.exec(
+            paginate_jobs(filter_jobs(select(Job), filters), cursor=cursor, skip=skip, limit=limit)
+        )
+        page = await job_page_cache.store(
+            key, result.all(), limit=limit, head=not cursor, generation=generation
+        )
 
-@router.post("/apply/{job_id}")
-def apply_for_job(
-    job_id: int,
-    session: Session = Depends(get_session),
+    if etag_matches(request, page.etag):
+        return not_modified(page.etag, JOB_BOARD_CACHE_CONTROL)
+    headers = {"ETag": page.etag, "Cache-Control": JOB_BOARD_CACHE_CONTROL}
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return Response(page.body, media_type="application/json", headers=headers)
+
+@router.get("/jobs/facets", response_model=JobFacets)
+async def job_facets(
+    session: AsyncSession = Depends(get_async_read_session),
+    filters: JobFilters = Depends(job_filters),
+) -> Any:
+    """
+    Counts of the jobs list_jobs would return with the same filters, by
+    department, status and organization industry.
+    """
+    key = job_page_cache.facets_key(filters)
+    facets = await job_page_cache.get_facets(key)
+    if facets is None:
+        generation = await job_page_cache.snapshot()
+        facets = fold_facets((await session.exec(facet_counts_statement(filters))).all())
+        await job_page_cache.store_facets(key, facets, generation=generation)
+    return facets
+
+@router.get("/jobs/search", response_model=List[JobRead])
+async def search_jobs(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
+    session: AsyncSession = Depends(get_async_read_session),
+    current_user: Principal = Depends(deps.get_current_user_principal),
+    job_status: Optional[str] = Query(None, alias="status"),
+    department: Optional[str] = None,
+    organization_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Full-text search over job title, description, requirements and department,
+    best matches first. Pass the X-Next-Cursor response header back as `cursor`
+    to get the next page.
+    """
+    statement = search_jobs_statement(
+        session.bind.dialect.name,
+        q,
+        status=job_status,
+        department=department,
+        organization_id=organization_id,
+        after=decode_rank_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
+    if statement is None:
+        return []
+    rows = (await session.exec(statement)).all()
+    set_next_rank_cursor(response, rows, limit)
+    return [job for job, _ in rows]
+
+@router.get(
+    "/jobs/recommended", response_model=List[JobRecommendation],
+    dependencies=[Depends(rate_limits.concurrency_cap(rate_limits.matching_slots))],
+)
+async def recommended_jobs(
+    session: AsyncSession = Depends(get_async_read_session),
     current_user: User = Depends(deps.get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+) -> Any:
+    """
+    Open jobs that best match the current user's desired job and
+    qualification, limited to those whose age range admits them.
+    """
+    from app.services.matching import matching_engine  # numpy/scipy; see matching_hooks
+
+    await matching_engine.refresh(session)
+    matches = matching_engine.recommend_jobs(current_user, limit)
+    if not matches:
+        return []
+    # The index may lag other workers' writes by up to a refresh interval;
+    # re-check eligibility against the rows themselves.
+    eligible = JobFilters(age=user_age(current_user.age, current_user.date_of_birth))
+    statement = filter_jobs(select(Job).where(Job.id.in_([id for id, _ in matches])), eligible)
+    jobs = {job.id: job for job in (await session.exec(statement)).all()}
+    return [
+        JobRecommendation(**jobs[id].model_dump(), score=score)
+        for id, score in matches if id in jobs
+    ]
+
+@router.post("/apply/{job_id}", dependencies=[Depends(rate_limits.limit_apply)])
+async def apply_for_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(deps.get_current_user_principal),
 ) -> Any:
     """
     Apply for a specific job.
     """
-    # Check if job exists
-    job = session.get(Job, job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-        
-    # Check if already applied
-    existing_application = session.exec(
-        select(Application)
-        .where(Application.user_id == current_user.id)
-        .where(Application.job_id == job_id)
-    ).first()
-    
-    if existing_application:
+    group_commit = config.settings.APPLY_GROUP_COMMIT
+    if group_commit:
+        # Inserted and committed together with other requests' applications.
+        application_id = await apply_coalescer.apply(current_user.id, job_id)
+    else:
+        application_id = (await create_applications(session, current_user.id, [job_id])).get(job_id)
+    if application_id is None:
+        # Nothing was inserted; only now pay for telling the two cases apart.
+        if not await existing_job_ids(session, [job_id]):
+            raise HTTPException(status_code=404, detail="Job not found")
         raise HTTPException(status_code=400, detail="Already applied for this job")
-        
-    application = Application(user_id=current_user.id, job_id=job_id)
-    session.add(application)
-    session.commit()
-    session.refresh(application)
-    return {"message": "Application submitted successfully", "application_id": application.id}
+
+    if group_commit:
+        record_commit()
+    else:
+        await session.commit()
+    outbox_worker.notify()
+    return {"message": "Application submitted successfully", "application_id": application_id}
+
+@router.post(
+    "/apply", response_model=ApplicationBulkResult, dependencies=[Depends(rate_limits.limit_apply)]
+)
+async def apply_for_jobs(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(deps.get_current_user_principal),
+    applications_in: ApplicationBulkCreate,
+) -> Any:
+    """
+    Apply for several jobs at once, inserted in a single statement.
+    """
+    applied = await create_applications(session, current_user.id, applications_in.job_ids)
+    await session.commit()
+    if applied:
+        outbox_worker.notify()
+
+    skipped = [job_id for job_id in dict.fromkeys(applications_in.job_ids) if job_id not in applied]
+    existing = await existing_job_ids(session, skipped) if skipped else set()
+    return ApplicationBulkResult(
+        applied=applied,
+        already_applied=[job_id for job_id in skipped if job_id in existing],
+        not_found=[job_id for job_id in skipped if job_id not in existing],
+    )
@@ -0,0 +1,136 @@
+"""
+Caching primitives: an in-process TTL/LRU map, and async key-value backends
+(in-process or Redis) for caches that should be shared between workers.
+"""
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+class TTLCache:
+    """
+    Bounded LRU mapping whose entries also expire `ttl` seconds after being set.
+    Used from the event loop only, so no locking is needed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+class CacheBackend:
+    """
+    Async store for JSON-serialisable values plus integer "tag versions".
+    Bumping a tag's version invalidates every entry that recorded an older
+    version of it, which lets one write invalidate many entries in O(1).
+    """
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        raise NotImplementedError
+
+    async def bump(self, tags: Sequence[str]) -> None:
+        raise NotImplementedError
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Per-process backend. Other workers only see an invalidation once their
+    own entries expire; use a shared backend when running several.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize, ttl)
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self.entries.set(key, value, ttl)
+
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared backend on Redis (the optional `redis` package). Tag versions
+    are plain counters, read with one MGET and bumped with INCR.
+    """
+
+    def __init__(self, url: str, prefix: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.redis.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self.redis.set(self.prefix + key, json.dumps(value), ex=max(1, math.ceil(ttl)))
+
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        if not tags:
+            return []
+        values = await self.redis.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, tags: Sequence[str]) -> None:
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            for tag in tags:
+                pipeline.incr(f"{self.prefix}tag:{tag}")
+            await pipeline.execute()
+
+def create_cache_backend(url: Optional[str], *, maxsize: int, ttl: float, prefix: str) -> CacheBackend:
+    """
+    A Redis backend for a redis:// or rediss:// `url`, otherwise in-process.
+    """
+    if url and url.startswith(("redis://", "rediss://")):
+        return RedisCacheBackend(url, prefix)
+    if url:
+        raise ValueError(f"Unsupported cache URL: {url}")
+    return MemoryCacheBackend(maxsize, ttl)
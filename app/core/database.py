@@ -1,12 +1,176 @@
-from sqlmodel import SQLModel, create_engine, Session, select
+import math
+import time
+from contextvars import ContextVar, Token
+from typing import Optional, Tuple
+
+from fastapi import Depends, Request
+from sqlalchemy import event, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
 
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-engine = create_engine(settings.DATABASE_URL, echo=True, connect_args=connect_args)
+def get_async_database_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto the matching async driver
+    (asyncpg for Postgres, aiosqlite for SQLite).
+    """
+    scheme, _, rest = url.partition("://")
+    if scheme in ("postgresql", "postgresql+psycopg2", "postgresql+psycopg"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+# The backends the app runs on: applying, upserts and full-text search all
+# rely on dialect-specific SQL (ON CONFLICT ... RETURNING, tsvector / FTS5).
+DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def check_database_url(url: str) -> str:
+    """
+    Return `url`, or raise ValueError at startup if it is not a supported backend.
+    """
+    backend = make_url(url).get_backend_name()
+    if backend not in DIALECT_INSERTS:
+        raise ValueError(f"Unsupported database backend {backend!r}: use PostgreSQL or SQLite")
+    return url
+
+def dialect_insert(dialect_name: str, table):
+    """
+    The dialect's own insert() construct, which supports ON CONFLICT and
+    RETURNING on both Postgres and SQLite.
+    """
+    return DIALECT_INSERTS[dialect_name](table)
+
+def engine_options(url: str) -> dict:
+    """
+    Pool, logging and statement-timeout options for an engine on `url`.
+    SQLite keeps SQLAlchemy's defaults apart from echo.
+    """
+    options = {"echo": settings.DB_ECHO}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout and url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+    elif timeout and url.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+engine = create_engine(
+    check_database_url(settings.DATABASE_URL), **engine_options(settings.DATABASE_URL)
+)
+
+_async_url = get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+# expire_on_commit=False: attribute access after commit must not trigger
+# implicit IO, which an AsyncSession cannot do.
+async_session_maker = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Read replica. Without DATABASE_READ_URL reads simply share the primary.
+if settings.DATABASE_READ_URL:
+    _async_read_url = get_async_database_url(check_database_url(settings.DATABASE_READ_URL))
+    async_read_engine = create_async_engine(_async_read_url, **engine_options(_async_read_url))
+else:
+    async_read_engine = async_engine
+async_read_session_maker = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Read-your-writes: a request that commits gets a cookie telling the next
+# READ_YOUR_WRITES_SECONDS of its client's reads to go to the primary, so it
+# never sees the replica from before its own write. The cookie works across
+# workers; each request collects its commits in `_request_commits`.
+PRIMARY_READS_COOKIE = "read_primary_until"
+_request_commits: ContextVar[Optional[list]] = ContextVar("request_commits", default=None)
+
+def record_commit() -> None:
+    """
+    Count a commit towards the current request. Called for every ORM
+    commit; call it directly for a write committed on the request's behalf
+    by another task.
+    """
+    commits = _request_commits.get()
+    if commits is not None:
+        commits.append(True)
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+@event.listens_for(OrmSession, "after_commit")
+def _record_commit(session) -> None:
+    record_commit()
+
+def track_commits() -> Tuple[list, Token]:
+    """
+    Start collecting the current request's commits. Middleware calls this
+    before running the app (child tasks share the list) and resets the
+    returned token afterwards.
+    """
+    commits: list = []
+    return commits, _request_commits.set(commits)
+
+def stop_tracking_commits(token: Token) -> None:
+    _request_commits.reset(token)
+
+def primary_reads_cookie() -> Tuple[str, str, int]:
+    """
+    (name, value, max_age) of the cookie to set on a response whose request committed.
+    """
+    window = settings.READ_YOUR_WRITES_SECONDS
+    return PRIMARY_READS_COOKIE, f"{time.time() + window:.3f}", math.ceil(window)
+
+def reads_from_primary(request: Request) -> bool:
+    if async_read_engine is async_engine:
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_READS_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def read_session_maker(request: Request) -> async_sessionmaker:
+    return async_session_maker if reads_from_primary(request) else async_read_session_maker
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    async with async_session_maker() as session:
+        yield session
+
+async def get_async_read_session(
+    request: Request, session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Session for read-only endpoints: the replica when one is configured,
+    unless this client has committed something recently. Reads from the
+    primary reuse the request's session (the one the auth dependencies
+    used), so a request never holds two connections from the same pool,
+    which deadlocks the pool once every connection waits for a second.
+    """
+    if reads_from_primary(request):
+        yield session
+        return
+    async with async_read_session_maker() as read_session:
+        yield read_session
+
+async def stream_rows(statement, yield_per: int = 1000, session_maker: Optional[async_sessionmaker] = None):
+    """
+    Yield the rows of `statement` from a dedicated session through a
+    server-side cursor. For response bodies that are still being produced
+    after the request's own session has been closed.
+    """
+    async with (session_maker or async_session_maker)() as session:
+        result = await session.stream(statement.execution_options(yield_per=yield_per))
+        async for row in result:
+            yield row
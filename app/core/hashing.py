@@ -0,0 +1,55 @@
+"""
+Bounded process pool for password hashing.
+
+Argon2 is deliberately CPU and memory hungry. Running it on the event loop or
+in Starlette's threadpool lets a login storm starve every other endpoint, so
+hashes run in a small dedicated process pool instead. Admission is bounded:
+at most `workers + queue_size` hashes may be in flight, and anything beyond
+that fails fast with HashingBusyError (served as a 503) instead of queueing
+without limit.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+class HashingBusyError(Exception):
+    """Raised when the hashing pool is saturated."""
+
+class HashingExecutor:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.in_flight = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already runs event loop and
+            # driver threads is not safe.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        # Check-and-increment has no await in between, so it is atomic on the loop.
+        if self.in_flight >= self.capacity:
+            raise HashingBusyError()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+hashing_executor = HashingExecutor(settings.HASHING_WORKERS, settings.HASHING_QUEUE_SIZE)
@@ -0,0 +1,205 @@
+"""
+Request and database metrics in the Prometheus text format.
+
+Nothing here is installed unless METRICS_ENABLED is set: main.py then adds
+MetricsMiddleware, instruments the engines and mounts GET /metrics. Per
+request, the middleware opens a RequestStats in `_request_stats` and the
+engine events add every statement's count and duration to it; at the end
+the totals go into per-route histograms, and requests that ran more than
+METRICS_N_PLUS_ONE_THRESHOLD statements are counted and logged as likely
+N+1 query patterns.
+
+Metrics are per process; with several workers, scrape each one (or use
+Prometheus' multi-target setup).
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        # Per label set: non-cumulative bucket counts (+Inf last), sum.
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = (*self.labels, "le")
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, (*labels, le))} {cumulative}")
+            label_text = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class Gauge:
+    """
+    Sampled when rendered: `collect` returns (label values, value) pairs.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], collect: Callable[[], List[Tuple[Labels, float]]]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+# name -> pool, for the checked-out gauge.
+_pools: Dict[str, object] = {}
+
+def _pool_usage() -> List[Tuple[Labels, float]]:
+    return [((name,), pool.checkedout()) for name, pool in sorted(_pools.items()) if hasattr(pool, "checkedout")]
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route.",
+    LATENCY_BUCKETS, ("method", "route", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.",
+    QUERY_COUNT_BUCKETS, ("method", "route"),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+N_PLUS_ONE = Counter(
+    "http_request_n_plus_one_total",
+    "Requests that ran more SQL statements than METRICS_N_PLUS_ONE_THRESHOLD.",
+    ("method", "route"),
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+    POOL_WAIT_BUCKETS, ("engine",),
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out", "Connections currently checked out.", ("engine",), _pool_usage,
+)
+REGISTRY = [REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_TIME, N_PLUS_ONE, POOL_WAIT, POOL_CHECKED_OUT]
+
+def register(metric):
+    """
+    Add a metric defined elsewhere (e.g. by a background worker) to /metrics.
+    """
+    REGISTRY.append(metric)
+    return metric
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+def start_request() -> Tuple[RequestStats, Token]:
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+def finish_request(
+    token: Token, stats: RequestStats, method: str, route: str, status: int,
+    seconds: float, n_plus_one_threshold: int,
+) -> None:
+    _request_stats.reset(token)
+    REQUEST_DURATION.observe(seconds, method, route, str(status))
+    REQUEST_QUERIES.observe(stats.queries, method, route)
+    REQUEST_DB_TIME.observe(stats.db_seconds, method, route)
+    if stats.queries > n_plus_one_threshold:
+        N_PLUS_ONE.inc(method, route)
+        logger.warning("%s %s ran %d SQL statements (possible N+1)", method, route, stats.queries)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - context._metrics_started
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """
+    Count statements into the current request's stats and time pool
+    checkouts. Checkout waits are timed by wrapping the pool's internal
+    _do_get, since pool events only fire once a connection is handed out.
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    pool = sync_engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started, name)
+
+    pool._do_get = timed_do_get
+    _pools[name] = pool
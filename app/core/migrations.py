@@ -0,0 +1,202 @@
+"""
+Versioned schema migrations.
+
+The schema version is kept in a one-row `schema_version` table. Migrations
+run out of band, once per deploy (`python -m app.scripts.migrate`), and each
+worker only reads that row at boot instead of reflecting the whole schema
+through create_all().
+
+An empty database is created from the models in one go and stamped with the
+latest version. A database created by the old create_all-at-boot starts at
+version 0 and is upgraded step by step. Append new steps to MIGRATIONS;
+never edit one that has been released.
+"""
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, DateTime, Engine, Integer, MetaData, Table, func, inspect, select, text, union_all, update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401  (register tables on the metadata)
+from app.models import (
+    Application, ArchivedApplication, ArchivedJob, CvDocument, Job, OrganizationDailyStats, OutboxEvent,
+    User, create_search_index,
+)
+
+schema_version = Table(
+    "schema_version", MetaData(), Column("version", Integer, nullable=False)
+)
+
+class SchemaVersionError(Exception):
+    """The database schema does not match the version this code expects."""
+
+# Columns added to existing tables before migrations were versioned.
+LEGACY_COLUMNS = [
+    ("job", "external_id", "VARCHAR(255)"),
+    ("user", "cv_sha256", "VARCHAR"),
+    ("user", "cv_filename", "VARCHAR"),
+    ("user", "cv_text_status", "VARCHAR"),
+]
+
+def _upgrade_create_all_schema(conn: Connection) -> None:
+    """
+    Bring a create_all-era database up to the schema of the first versioned
+    release: new columns, new tables, indexes, search index and counters.
+    """
+    from app.scripts.backfill_application_count import recompute_application_counts
+    from app.scripts.create_indexes import create_missing_indexes
+
+    quote = conn.dialect.identifier_preparer.quote
+    inspector = inspect(conn)
+    for table, column, ddl in LEGACY_COLUMNS:
+        if column not in {c["name"] for c in inspector.get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN {column} {ddl}"))
+    SQLModel.metadata.create_all(conn)
+    create_missing_indexes(conn)
+    create_search_index(conn)
+    recompute_application_counts(conn)
+
+def _add_outbox(conn: Connection) -> None:
+    OutboxEvent.__table__.create(conn, checkfirst=True)
+
+def _add_job_facet_index(conn: Connection) -> None:
+    from app.scripts.create_indexes import create_missing_indexes
+
+    create_missing_indexes(conn)
+
+def _add_organization_stats(conn: Connection) -> None:
+    from app.scripts.rebuild_organization_stats import recompute_organization_stats
+
+    OrganizationDailyStats.__table__.create(conn, checkfirst=True)
+    recompute_organization_stats(conn)
+
+def _add_archive_tables(conn: Connection) -> None:
+    ArchivedJob.__table__.create(conn, checkfirst=True)
+    ArchivedApplication.__table__.create(conn, checkfirst=True)
+
+def _add_updated_at(conn: Connection) -> None:
+    from app.scripts.create_indexes import create_missing_indexes
+
+    quote = conn.dialect.identifier_preparer.quote
+    ddl = DateTime().compile(dialect=conn.dialect)
+    inspector = inspect(conn)
+    for table in (Job.__tablename__, User.__tablename__, ArchivedJob.__tablename__):
+        if "updated_at" not in {c["name"] for c in inspector.get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN updated_at {ddl}"))
+    # Existing rows count as last written when they were created.
+    conn.execute(update(Job).values(updated_at=Job.date_posted))
+    conn.execute(update(User).values(updated_at=User.date_registered))
+    create_missing_indexes(conn)
+
+def _rebuild_with_autoincrement(conn: Connection, table: Table, archive: Table) -> None:
+    """
+    Recreate an SQLite table as declared (AUTOINCREMENT), keeping its rows,
+    and start its id sequence past every id it or its archive has used.
+    SQLite cannot add AUTOINCREMENT to an existing table. Foreign keys are
+    not enforced (the connection never turns them on), so the table can be
+    dropped under the ones referencing it.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    metadata = MetaData()
+    for key in table.foreign_keys:
+        key.column.table.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name=f"{table.name}_rebuilt")
+    rebuilt.indexes.clear()
+    rebuilt.create(conn)
+    columns = ", ".join(quote(column.name) for column in table.columns)
+    conn.execute(text(
+        f"INSERT INTO {quote(rebuilt.name)} ({columns}) SELECT {columns} FROM {quote(table.name)}"
+    ))
+    conn.execute(text(f"DROP TABLE {quote(table.name)}"))
+    conn.execute(text(f"ALTER TABLE {quote(rebuilt.name)} RENAME TO {quote(table.name)}"))
+
+    used = union_all(select(table.c.id), select(archive.c.id)).subquery()
+    last_id = conn.execute(select(func.max(used.c.id))).scalar() or 0
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name IN (:table, :rebuilt)"),
+                 {"table": table.name, "rebuilt": rebuilt.name})
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:table, :seq)"),
+                 {"table": table.name, "seq": last_id})
+
+def _stop_reusing_ids(conn: Connection) -> None:
+    from app.scripts.create_indexes import create_missing_indexes
+
+    # Postgres sequences never hand out an id twice.
+    if conn.dialect.name != "sqlite":
+        return
+    _rebuild_with_autoincrement(conn, Job.__table__, ArchivedJob.__table__)
+    _rebuild_with_autoincrement(conn, Application.__table__, ArchivedApplication.__table__)
+    create_missing_indexes(conn)
+    # Dropping job dropped the triggers keeping job_fts in sync.
+    create_search_index(conn)
+
+def _add_cv_document_lease(conn: Connection) -> None:
+    quote = conn.dialect.identifier_preparer.quote
+    table = CvDocument.__tablename__
+    if "lease_until" not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        ddl = DateTime().compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN lease_until {ddl}"))
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("Upgrade a schema created by create_all", _upgrade_create_all_schema),
+    ("Add the outbox table", _add_outbox),
+    ("Index job columns read by facet counts", _add_job_facet_index),
+    ("Add the organization dashboard rollup", _add_organization_stats),
+    ("Add the job and application archive tables", _add_archive_tables),
+    ("Add updated_at to jobs and users", _add_updated_at),
+    ("Stop SQLite reusing the ids of archived jobs and applications", _stop_reusing_ids),
+    ("Add the CV extraction claim lease", _add_cv_document_lease),
+]
+LATEST_VERSION = len(MIGRATIONS)
+
+def _read_version(conn: Connection) -> Optional[int]:
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+    return conn.execute(select(schema_version.c.version)).scalar()
+
+def _write_version(conn: Connection, version: int) -> None:
+    conn.execute(schema_version.delete())
+    conn.execute(schema_version.insert().values(version=version))
+
+def migrate(engine: Engine) -> Tuple[Optional[int], int]:
+    """
+    Upgrade the database to LATEST_VERSION in one transaction.
+    Returns (version before, version after); None means it was empty.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Serialise concurrent deploys; released at commit.
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_version'))"))
+        before = _read_version(conn)
+        if before is None:
+            existing = inspect(conn).get_table_names()
+            schema_version.create(conn)
+            if not existing:
+                SQLModel.metadata.create_all(conn)
+                _write_version(conn, LATEST_VERSION)
+                return None, LATEST_VERSION
+            before = 0
+        for _, step in MIGRATIONS[before:]:
+            step(conn)
+        _write_version(conn, LATEST_VERSION)
+    return before, LATEST_VERSION
+
+async def check_schema_version(engine: AsyncEngine) -> int:
+    """
+    Boot-time check: one single-row read. Raises SchemaVersionError unless
+    the database is at LATEST_VERSION.
+    """
+    try:
+        async with engine.connect() as conn:
+            version = (await conn.execute(select(schema_version.c.version))).scalar()
+    except DBAPIError:
+        version = None
+    if version != LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, this code expects {LATEST_VERSION}. "
+            "Run `python -m app.scripts.migrate` first."
+        )
+    return version
@@ -0,0 +1,145 @@
+"""
+Admission control: request rate limits and concurrency caps.
+
+RateLimit is a sliding-window counter. Each key counts hits in fixed
+windows, and the estimate for "the last `window` seconds" weighs the
+previous window's count by how much of it still overlaps. That needs two
+counters per key, and both backends update them with one round trip. Every
+attempt counts, rejected ones included, so a client that keeps hammering
+stays limited instead of getting a fresh allowance each window.
+
+ConcurrencyLimiter caps how many requests of a kind run at once in this
+process and sheds the rest immediately, like the hashing pool does, rather
+than letting them queue behind each other.
+"""
+import math
+import re
+import time
+from typing import Callable, Optional, Tuple
+
+from app.core.cache import TTLCache
+
+RATE_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+class RateLimitExceeded(Exception):
+    """Too many requests for one key; served as a 429."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class OverloadedError(Exception):
+    """A concurrency cap is full; served as a 503."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Server is busy")
+        self.retry_after = retry_after
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    "10/minute" -> (10, 60). Also accepts "10/5minutes"-style multiples.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*", rate)
+    if not match:
+        raise ValueError(f"Invalid rate: {rate!r}")
+    count, multiple, unit = match.groups()
+    return int(count), int(multiple or 1) * RATE_UNITS[unit]
+
+class RateLimitBackend:
+    async def hit(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        """
+        Count a hit for `key` in the current window and return the
+        (previous window, current window) counts including it.
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        pass
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process counters. With several workers each enforces the limit on
+    its own, so the effective limit is multiplied by the worker count.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.counters = TTLCache(maxsize, ttl=0)
+
+    async def hit(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        index = int(now // window)
+        current = self.counters.get((key, index), 0) + 1
+        self.counters.set((key, index), current, ttl=2 * window)
+        return self.counters.get((key, index - 1), 0), current
+
+    def reset(self) -> None:
+        self.counters.clear()
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Counters shared by every worker, on Redis (the optional `redis` package).
+    """
+
+    def __init__(self, url: str, prefix: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def hit(self, key: str, window: int, now: float) -> Tuple[int, int]:
+        index = int(now // window)
+        current_key = f"{self.prefix}{key}:{index}"
+        async with self.redis.pipeline(transaction=False) as pipeline:
+            pipeline.incr(current_key)
+            pipeline.expire(current_key, 2 * window)
+            pipeline.get(f"{self.prefix}{key}:{index - 1}")
+            current, _, previous = await pipeline.execute()
+        return int(previous or 0), int(current)
+
+def create_rate_limit_backend(url: Optional[str], prefix: str) -> RateLimitBackend:
+    if url and url.startswith(("redis://", "rediss://")):
+        return RedisRateLimitBackend(url, prefix)
+    if url:
+        raise ValueError(f"Unsupported rate limit URL: {url}")
+    return MemoryRateLimitBackend()
+
+class RateLimit:
+    def __init__(
+        self, name: str, rate: str, backend: RateLimitBackend,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.name = name
+        self.limit, self.window = parse_rate(rate)
+        self.backend = backend
+        self.clock = clock
+
+    async def hit(self, key: str) -> None:
+        """
+        Count a request for `key`; raise RateLimitExceeded when the estimated
+        number of requests in the last window exceeds the limit.
+        """
+        now = self.clock()
+        previous, current = await self.backend.hit(f"{self.name}:{key}", self.window, now)
+        elapsed = (now % self.window) / self.window
+        if previous * (1 - elapsed) + current <= self.limit:
+            return
+        if current >= self.limit or not previous:
+            # Only the next window brings the estimate back under the limit.
+            wait = (1 - elapsed) * self.window
+        else:
+            # The previous window's weight decays until the estimate fits.
+            wait = (1 - (self.limit - current) / previous - elapsed) * self.window
+        raise RateLimitExceeded(max(1, math.ceil(wait)))
+
+class ConcurrencyLimiter:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+
+    def acquire(self) -> None:
+        # Check-and-increment has no await in between, so it is atomic on the loop.
+        if self.in_flight >= self.limit:
+            raise OverloadedError()
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
@@ -1,10 +1,23 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from functools import lru_cache
+from typing import Optional, Tuple, Union, Any
 from jose import jwt
-from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.hashing import hashing_executor
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    # Imported on first use: hashing runs in the pool's worker processes,
+    # so the serving processes never need passlib at startup.
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=settings.ARGON2_TIME_COST,
+        argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=settings.ARGON2_PARALLELISM,
+    )
 
 ALGORITHM = "HS256"
 
@@ -19,7 +32,20 @@ def create_access_token(subject: Union[str, Any], role: str, expires_delta: Opti
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; also return a new hash if the stored one was made
+    with outdated Argon2 parameters.
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_executor.run(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await hashing_executor.run(verify_and_update_password, plain_password, hashed_password)
@@ -1,15 +1,30 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from app.core.config import settings
+from app.api.middleware import MetricsMiddleware, ReadYourWritesMiddleware
 from app.api.v1.api import api_router
-from app.core.database import create_db_and_tables
-
-# Lifespan event to create DB on startup
-from contextlib import asynccontextmanager
+from app.core import metrics
+from app.core.database import async_engine, async_read_engine
+from app.core.hashing import HashingBusyError, hashing_executor
+from app.core.migrations import check_schema_version
+from app.core.rate_limit import OverloadedError, RateLimitExceeded
+from app.services.apply_coalescer import apply_coalescer
+from app.services.cv_text import cv_extractor
+from app.services.outbox import outbox_worker
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    # Schema changes run out of band (app.scripts.migrate); boot only checks.
+    await check_schema_version(async_engine)
+    await cv_extractor.start()
+    await outbox_worker.start()
     yield
+    await apply_coalescer.drain()
+    await outbox_worker.stop()
+    await cv_extractor.stop()
+    hashing_executor.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -17,8 +32,44 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(ReadYourWritesMiddleware)
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(async_engine, "primary")
+    if async_read_engine is not async_engine:
+        metrics.instrument_engine(async_read_engine, "replica")
+    # Added last, so it is outermost and times the other middleware too.
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.exception_handler(HashingBusyError)
+async def hashing_busy_handler(request: Request, exc: HashingBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests, please retry later."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @app.get("/")
 def root():
     return {"message": "Welcome to the Hiring System API"}
@@ -1,4 +1,9 @@
 from .user import User
 from .organization import Organization
 from .job import Job
-from .application import Application
+from .application import Application, ApplicationStatus
+from .cv_document import CvDocument, CvTerm
+from .outbox import OutboxEvent
+from .organization_stats import OrganizationDailyStats
+from .archive import ArchivedApplication, ArchivedJob
+from .job_search import create_search_index
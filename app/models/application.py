@@ -1,13 +1,39 @@
 from typing import Optional
+from enum import Enum
+from sqlalchemy import Enum as SAEnum, Index
 from sqlmodel import Field, Relationship, SQLModel
 from datetime import datetime
 
+class ApplicationStatus(str, Enum):
+    pending = "pending"
+    accepted = "accepted"
+    rejected = "rejected"
+
 class Application(SQLModel, table=True):
+    # One application per user and job; apply relies on it for ON CONFLICT.
+    __table_args__ = (
+        Index("ix_application_user_id_job_id", "user_id", "job_id", unique=True),
+        # Per-job applicant listing, newest first.
+        Index("ix_application_job_id_applied_at_id", "job_id", "applied_at", "id"),
+        # Per-job status counts, bulk transitions and status-filtered listing.
+        Index("ix_application_job_id_status_applied_at_id", "job_id", "status", "applied_at", "id"),
+        # Never reuse the id of an archived application (see Job).
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     job_id: int = Field(foreign_key="job.id")
     applied_at: datetime = Field(default_factory=datetime.utcnow)
-    status: str = Field(default="pending") # pending, accepted, rejected
+    # A VARCHAR with a CHECK constraint rather than a native enum type, so
+    # existing string columns stay valid and new states need no ALTER TYPE.
+    status: ApplicationStatus = Field(
+        default=ApplicationStatus.pending,
+        sa_type=SAEnum(
+            ApplicationStatus, native_enum=False, length=20,
+            create_constraint=True, name="applicationstatus",
+        ),
+    )
     
     user: "User" = Relationship(back_populates="applications")
     job: "Job" = Relationship(back_populates="applications")
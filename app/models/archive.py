@@ -0,0 +1,53 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Enum as SAEnum, Index
+from sqlmodel import Field, Relationship, SQLModel
+
+from .application import ApplicationStatus
+
+# Cold copies of Job and Application rows moved out by
+# app/scripts/archive_cold_data.py. Rows keep their ids and every column of
+# the hot table, plus when they were archived. Archived data is read-only.
+
+class ArchivedJob(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_archivedjob_organization_id_date_posted_id", "organization_id", "date_posted", "id"),
+    )
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    title: str
+    description: str
+    requirements: str
+    department: Optional[str] = None
+    date_posted: datetime
+    status: str
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    organization_id: int = Field(foreign_key="organization.id")
+    # Not unique here: a new posting may reuse an archived one's identifier.
+    external_id: Optional[str] = Field(default=None, max_length=255)
+    application_count: int = Field(default=0)
+    updated_at: Optional[datetime] = None
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ArchivedApplication(SQLModel, table=True):
+    __table_args__ = (
+        # Apply checks it so an archived application still counts as applied.
+        Index("ix_archivedapplication_user_id_job_id", "user_id", "job_id"),
+        Index("ix_archivedapplication_job_id_applied_at_id", "job_id", "applied_at", "id"),
+    )
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    user_id: int = Field(foreign_key="user.id")
+    # The job may be hot or archived, so this is not a foreign key.
+    job_id: int
+    applied_at: datetime
+    status: ApplicationStatus = Field(
+        sa_type=SAEnum(
+            ApplicationStatus, native_enum=False, length=20,
+            create_constraint=True, name="archivedapplicationstatus",
+        ),
+    )
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+    user: "User" = Relationship()
@@ -0,0 +1,25 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Column, Text
+from sqlmodel import Field, SQLModel
+
+class CvDocument(SQLModel, table=True):
+    """
+    Text extracted from one stored CV blob. Keyed by content hash, so a file
+    uploaded by several users is extracted once.
+    """
+    sha256: str = Field(primary_key=True, max_length=64)
+    path: str
+    status: str = Field(default="pending", index=True) # pending, processing, done, failed, unsupported
+    # While processing: when the claim runs out and another worker may take it.
+    lease_until: Optional[datetime] = None
+    text: Optional[str] = Field(default=None, sa_column=Column(Text))
+    error: Optional[str] = None
+    extracted_at: Optional[datetime] = None
+
+class CvTerm(SQLModel, table=True):
+    """
+    Inverted index over CvDocument.text: one row per distinct term per CV.
+    """
+    term: str = Field(primary_key=True, max_length=64)
+    sha256: str = Field(primary_key=True, foreign_key="cvdocument.sha256")
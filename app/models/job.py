@@ -1,8 +1,35 @@
 from typing import List, Optional
 from datetime import datetime
+from enum import Enum
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
+class JobStatus(str, Enum):
+    # status stays a plain string column; the API only accepts these.
+    open = "Open"
+    closed = "Closed"
+    draft = "Draft"
+
 class Job(SQLModel, table=True):
+    # Composite indexes matching the keyset order (date_posted, id) of the
+    # public board, the per-organization listing and status-filtered views.
+    __table_args__ = (
+        Index("ix_job_date_posted_id", "date_posted", "id"),
+        Index("ix_job_organization_id_date_posted_id", "organization_id", "date_posted", "id"),
+        Index("ix_job_status_date_posted_id", "status", "date_posted", "id"),
+        # Facet counts and eligibility filters read only these columns, so
+        # Postgres can answer them with an index-only scan.
+        Index(
+            "ix_job_status_department_organization_id_min_age_max_age",
+            "status", "department", "organization_id", "min_age", "max_age",
+        ),
+        # Bulk sync upserts by the organization's own (ATS) identifier.
+        Index("ix_job_organization_id_external_id", "organization_id", "external_id", unique=True),
+        # Ids of archived jobs must never be handed out again; without this
+        # SQLite reuses the largest rowid once that row is deleted.
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: str
@@ -13,10 +40,14 @@ class Job(SQLModel, table=True):
     min_age: Optional[int] = None
     max_age: Optional[int] = None
     organization_id: int = Field(foreign_key="organization.id")
+    external_id: Optional[str] = Field(default=None, max_length=255)
+    # Maintained by apply_for_job so listings never load Application rows.
+    application_count: int = Field(default=0)
+    # Bumped by writes to the posting (not application_count); the
+    # matching engine tails changes by it.
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, index=True, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
 
     organization: "Organization" = Relationship(back_populates="jobs")
     applications: List["Application"] = Relationship(back_populates="job")
-
-    @property
-    def application_count(self) -> int:
-        return len(self.applications)
@@ -0,0 +1,75 @@
+"""
+Full-text search index on `job`.
+
+Postgres keeps a weighted `search_vector` tsvector as a STORED generated
+column with a GIN index. SQLite (tests and local runs) keeps an
+external-content FTS5 table, `job_fts`, maintained by triggers. Either way
+the index follows every INSERT/UPDATE/DELETE on `job` without application
+code having to sync it. Neither is mapped on the Job model; the DDL is
+attached to the `job` table's create/drop events.
+"""
+from sqlalchemy import DDL, event
+from sqlalchemy.engine import Connection
+
+from app.models.job import Job
+
+SEARCH_CONFIG = "english"
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE job ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(department, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(requirements, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_job_search_vector ON job USING GIN (search_vector)",
+]
+
+_FTS_COLUMNS = "title, description, requirements, department"
+_FTS_NEW = "new.id, new.title, new.description, new.requirements, new.department"
+_FTS_OLD = "old.id, old.title, old.description, old.requirements, old.department"
+
+SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS job_fts USING fts5(
+        {_FTS_COLUMNS}, content='job', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS job_fts_ai AFTER INSERT ON job BEGIN
+        INSERT INTO job_fts(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS job_fts_ad AFTER DELETE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', {_FTS_OLD});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS job_fts_au AFTER UPDATE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', {_FTS_OLD});
+        INSERT INTO job_fts(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_NEW});
+    END
+    """,
+    # Index rows that predate the table (no-op on a fresh database).
+    "INSERT INTO job_fts(job_fts) VALUES ('rebuild')",
+]
+
+for statement in POSTGRES_DDL:
+    event.listen(Job.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_DDL:
+    event.listen(Job.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Job.__table__, "before_drop", DDL("DROP TABLE IF EXISTS job_fts").execute_if(dialect="sqlite")
+)
+
+def create_search_index(conn: Connection) -> None:
+    """
+    Add the search index to an existing `job` table.
+    """
+    ddl = {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}[conn.dialect.name]
+    for statement in ddl:
+        conn.execute(DDL(statement))
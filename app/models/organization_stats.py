@@ -0,0 +1,18 @@
+from datetime import date
+from sqlmodel import Field, SQLModel
+
+class OrganizationDailyStats(SQLModel, table=True):
+    """
+    What happened to one organization's postings on one (UTC) day; see
+    app/services/organization_stats.py. jobs_posted and applications count
+    that day's events. The *_delta columns are net changes, so the current
+    open jobs and applications per status are their sums over all days.
+    """
+    organization_id: int = Field(foreign_key="organization.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    jobs_posted: int = Field(default=0)
+    applications: int = Field(default=0)
+    open_jobs_delta: int = Field(default=0)
+    pending_delta: int = Field(default=0)
+    accepted_delta: int = Field(default=0)
+    rejected_delta: int = Field(default=0)
@@ -0,0 +1,25 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from sqlalchemy import JSON, Column, Index, Text
+from sqlmodel import Field, SQLModel
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    A side effect to run after the transaction that wrote it commits; see
+    app/services/outbox.py. Handled events are deleted, so the table holds
+    only pending and dead (out of retries) ones.
+    """
+    __table_args__ = (
+        # The worker's poll: due pending events, oldest first.
+        Index("ix_outboxevent_status_available_at_id", "status", "available_at", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str = Field(max_length=100)
+    payload: Dict[str, Any] = Field(sa_column=Column(JSON, nullable=False))
+    status: str = Field(default="pending", max_length=20) # pending, dead
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Not before this time; pushed back after each failed attempt.
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text))
@@ -18,6 +18,15 @@ class User(SQLModel, table=True):
     desired_job: Optional[str] = None
     date_registered: datetime = Field(default_factory=datetime.utcnow)
     is_verified: bool = Field(default=False)
-    cv_path: Optional[str] = Field(default=None)
+    # Content-addressed blob; see app/services/cv_storage.py.
+    cv_path: Optional[str] = Field(default=None, index=True)
+    cv_sha256: Optional[str] = None
+    cv_filename: Optional[str] = None
+    # Text extraction state of the current CV; see app/services/cv_text.py.
+    cv_text_status: Optional[str] = None
+    # Bumped by every write; the matching engine tails changes by it.
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, index=True, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
     
     applications: List["Application"] = Relationship(back_populates="user")
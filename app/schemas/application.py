@@ -0,0 +1,41 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field
+
+from app.models.application import ApplicationStatus
+
+class ApplicationBulkCreate(BaseModel):
+    job_ids: List[int] = Field(min_length=1, max_length=500)
+
+class ApplicationBulkResult(BaseModel):
+    applied: Dict[int, int]  # job_id -> application_id
+    already_applied: List[int]
+    not_found: List[int]
+
+class ApplicantRead(BaseModel):
+    id: int
+    full_name: str
+    email: EmailStr
+    phone: Optional[str] = None
+    qualification: Optional[str] = None
+    desired_job: Optional[str] = None
+    cv_filename: Optional[str] = None
+    cv_text_status: Optional[str] = None
+
+class ApplicationRead(BaseModel):
+    id: int
+    job_id: int
+    applied_at: datetime
+    status: ApplicationStatus
+    applicant: ApplicantRead
+
+class ApplicationStatusUpdate(BaseModel):
+    status: ApplicationStatus
+    # None: every application to the job.
+    application_ids: Optional[List[int]] = Field(default=None, max_length=10000)
+    exclude_ids: List[int] = Field(default_factory=list, max_length=10000)
+    from_status: Optional[List[ApplicationStatus]] = None
+
+class ApplicationStatusResult(BaseModel):
+    updated: int
+    counts: Dict[ApplicationStatus, int]
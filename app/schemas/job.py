@@ -1,6 +1,12 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from app.models.job import JobStatus
+
+def check_age_range(min_age: Optional[int], max_age: Optional[int]) -> None:
+    if min_age is not None and max_age is not None and min_age > max_age:
+        raise ValueError("min_age must not be greater than max_age")
 
 class JobBase(BaseModel):
     title: str
@@ -12,15 +18,68 @@ class JobBase(BaseModel):
     max_age: Optional[int] = None
 
 class JobCreate(JobBase):
-    pass
+    model_config = ConfigDict(use_enum_values=True)
+
+    status: JobStatus = JobStatus.open
+    min_age: Optional[int] = Field(default=None, ge=0)
+    max_age: Optional[int] = Field(default=None, ge=0)
+    external_id: Optional[str] = Field(default=None, max_length=255)
+
+    @model_validator(mode="after")
+    def age_range(self) -> "JobCreate":
+        check_age_range(self.min_age, self.max_age)
+        return self
 
 class JobRead(JobBase):
     id: int
     organization_id: int
     date_posted: datetime
     application_count: int = 0
+    external_id: Optional[str] = None
+
+class JobRecommendation(JobRead):
+    score: float
 
 class JobUpdate(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+
     title: Optional[str] = None
     description: Optional[str] = None
     requirements: Optional[str] = None
+    department: Optional[str] = None
+    status: Optional[JobStatus] = None
+    min_age: Optional[int] = Field(default=None, ge=0)
+    max_age: Optional[int] = Field(default=None, ge=0)
+
+    @field_validator("title", "description", "requirements", "status")
+    @classmethod
+    def not_null(cls, value):
+        # These columns are NOT NULL: leave a field out to keep it, not null.
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+    @model_validator(mode="after")
+    def age_range(self) -> "JobUpdate":
+        check_age_range(self.min_age, self.max_age)
+        return self
+
+class JobBulkError(BaseModel):
+    row: int
+    errors: List[Dict[str, Any]]
+
+class JobBulkResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[JobBulkError]  # the first JOB_BULK_MAX_ERRORS failures
+
+class FacetCount(BaseModel):
+    value: Optional[str]
+    count: int
+
+class JobFacets(BaseModel):
+    total: int
+    department: List[FacetCount]
+    status: List[FacetCount]
+    industry: List[FacetCount]
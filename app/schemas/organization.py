@@ -1,7 +1,9 @@
-from typing import Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime
 from pydantic import BaseModel, EmailStr
 
+from app.models.application import ApplicationStatus
+
 class OrganizationBase(BaseModel):
     email: EmailStr
     name: str
@@ -25,3 +27,15 @@ class OrganizationRead(OrganizationBase):
 class OrganizationLogin(BaseModel):
     email: EmailStr
     password: str
+
+class DailyStats(BaseModel):
+    day: date
+    jobs_posted: int
+    applications: int
+
+class OrganizationStats(BaseModel):
+    open_jobs: int
+    jobs_posted: int
+    applications: int
+    applications_by_status: Dict[ApplicationStatus, int]
+    daily: List[DailyStats]  # oldest first
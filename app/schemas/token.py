@@ -9,3 +9,7 @@ class TokenData(BaseModel):
     id: Optional[str] = None
     sub: Optional[str] = None
     role: Optional[str] = None # "user" or "organization"
+
+class Principal(BaseModel):
+    id: int
+    role: str # "user" or "organization"
@@ -22,8 +22,26 @@ class UserRead(UserBase):
     id: int
     is_verified: bool
     cv_path: Optional[str] = None
+    cv_filename: Optional[str] = None
+    cv_text_status: Optional[str] = None
     date_registered: datetime
 
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
+
+class CandidateMatch(BaseModel):
+    user_id: int
+    full_name: str
+    qualification: Optional[str] = None
+    desired_job: Optional[str] = None
+    age: Optional[int] = None
+    score: float
+
+class ApplicantMatch(BaseModel):
+    application_id: int
+    user_id: int
+    full_name: str
+    email: EmailStr
+    cv_filename: Optional[str] = None
+    status: str
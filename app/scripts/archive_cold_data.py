@@ -0,0 +1,105 @@
+"""
+Move cold rows out of the hot job and application tables into
+ArchivedJob and ArchivedApplication, so the tables and indexes that the job
+board and apply hit only hold live data.
+
+- An application moves once it is older than ARCHIVE_APPLICATIONS_AFTER_DAYS
+  or its job is no longer Open.
+- A job moves once it is not Open and none of its applications are left in
+  the hot table (application.job_id references job.id).
+
+Work is done in batches of ARCHIVE_BATCH_SIZE rows, each its own short
+transaction: INSERT ... SELECT into the archive, then DELETE from the hot
+table. On Postgres the batch's rows are picked FOR UPDATE SKIP LOCKED, so
+it never waits on rows a request is writing and locks nothing else. Safe to
+interrupt and to rerun; run it from cron.
+
+Archived jobs are dropped from the job board cache once the run ends. That
+reaches the app's workers with a shared backend (JOB_CACHE_URL); an
+in-process cache keeps serving them until JOB_CACHE_TTL.
+
+    python -m app.scripts.archive_cold_data
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Engine, Table, delete, exists, insert, literal, or_, select
+from sqlalchemy.engine import Connection
+
+from app.api.response_cache import job_page_cache
+from app.core.config import settings
+from app.core.database import engine
+from app.models.application import Application
+from app.models.archive import ArchivedApplication, ArchivedJob
+from app.models.job import Job
+from app.services.job_filters import OPEN
+
+def _move(conn: Connection, source: Table, target: Table, ids: List[int]) -> int:
+    if not ids:
+        return 0
+    columns = list(source.columns)
+    conn.execute(
+        insert(target).from_select(
+            [column.name for column in columns] + ["archived_at"],
+            select(*columns, literal(datetime.utcnow())).where(source.c.id.in_(ids)),
+        )
+    )
+    conn.execute(delete(source).where(source.c.id.in_(ids)))
+    return len(ids)
+
+def archive_applications_batch(conn: Connection, cutoff: datetime, batch_size: int) -> int:
+    ids = conn.execute(
+        select(Application.id)
+        .join(Job, Job.id == Application.job_id)
+        .where(or_(Application.applied_at < cutoff, Job.status != OPEN))
+        .order_by(Application.id)
+        .limit(batch_size)
+        .with_for_update(of=Application.__table__, skip_locked=True)
+    ).scalars().all()
+    return _move(conn, Application.__table__, ArchivedApplication.__table__, ids)
+
+def archive_jobs_batch(conn: Connection, batch_size: int) -> List[int]:
+    """
+    Archive one batch of jobs and return their ids.
+    """
+    ids = conn.execute(
+        select(Job.id)
+        .where(Job.status != OPEN, ~exists().where(Application.job_id == Job.id))
+        .order_by(Job.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    _move(conn, Job.__table__, ArchivedJob.__table__, ids)
+    return ids
+
+def archive_cold_data(
+    engine: Engine, *, cutoff: Optional[datetime] = None, batch_size: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Archive everything that is due, one batch per transaction. Returns the
+    number of (applications, jobs) moved.
+    """
+    cutoff = cutoff or datetime.utcnow() - timedelta(days=settings.ARCHIVE_APPLICATIONS_AFTER_DAYS)
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    applications = 0
+    jobs: List[int] = []
+    while True:
+        with engine.begin() as conn:
+            moved = archive_applications_batch(conn, cutoff, batch_size)
+        applications += moved
+        if moved < batch_size:
+            break
+    while True:
+        with engine.begin() as conn:
+            ids = archive_jobs_batch(conn, batch_size)
+        jobs += ids
+        if len(ids) < batch_size:
+            break
+    if jobs:
+        asyncio.run(job_page_cache.jobs_removed(jobs))
+    return applications, len(jobs)
+
+if __name__ == "__main__":
+    applications, jobs = archive_cold_data(engine)
+    print(f"Archived {applications} applications and {jobs} jobs")
@@ -0,0 +1,44 @@
+"""
+Add the Job.application_count counter column to databases created before it
+existed, and recompute it from the application tables, archived
+applications included.
+
+    python -m app.scripts.backfill_application_count
+"""
+from sqlalchemy import Engine, column, func, inspect, table, text
+from sqlalchemy.engine import Connection
+from sqlmodel import select, update
+
+from app.core.database import engine
+from app.models.application import Application
+from app.models.archive import ArchivedApplication, ArchivedJob
+from app.models.job import Job
+
+def recompute_application_counts(conn: Connection) -> int:
+    """
+    Recompute every job's application_count, one UPDATE per job table.
+    Returns the number of jobs.
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("job")}
+    if "application_count" not in columns:
+        conn.execute(text(
+            "ALTER TABLE job ADD COLUMN application_count INTEGER NOT NULL DEFAULT 0"
+        ))
+    updated = 0
+    for model in (Job, ArchivedJob):
+        # A bare table, so Job.updated_at's onupdate (a column that may not
+        # exist yet mid-migration) is left out: counters are not edits.
+        job = table(model.__tablename__, column("id"), column("application_count"))
+        counts = (
+            select(func.count(Application.id)).where(Application.job_id == job.c.id).scalar_subquery()
+            + select(func.count(ArchivedApplication.id)).where(ArchivedApplication.job_id == job.c.id).scalar_subquery()
+        )
+        updated += conn.execute(update(job).values(application_count=counts)).rowcount
+    return updated
+
+def backfill_application_count(engine: Engine) -> int:
+    with engine.begin() as conn:
+        return recompute_application_counts(conn)
+
+if __name__ == "__main__":
+    print(f"Backfilled application_count for {backfill_application_count(engine)} jobs")
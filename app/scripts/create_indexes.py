@@ -0,0 +1,33 @@
+"""
+Create any indexes declared on the models that are missing from an existing
+database. create_all() only creates indexes together with new tables.
+
+    python -m app.scripts.create_indexes
+"""
+from typing import Union
+
+from sqlalchemy import Engine, inspect
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from app.core.database import engine
+import app.models  # noqa: F401  (register tables on the metadata)
+
+def create_missing_indexes(engine: Union[Engine, Connection]) -> list[str]:
+    created = []
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            # Columns a later migration adds get their indexes from it.
+            if not {column.name for column in index.columns} <= existing:
+                continue
+            index.create(engine, checkfirst=True)
+            created.append(index.name)
+    return created
+
+if __name__ == "__main__":
+    for name in create_missing_indexes(engine):
+        print(f"ensured {name}")
@@ -0,0 +1,12 @@
+"""
+Add the full-text search index to a `job` table created before it existed.
+
+    python -m app.scripts.create_search_index
+"""
+from app.core.database import engine
+from app.models import create_search_index
+
+if __name__ == "__main__":
+    with engine.begin() as conn:
+        create_search_index(conn)
+    print("Job search index is in place")
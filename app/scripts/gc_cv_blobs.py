@@ -0,0 +1,34 @@
+"""
+Delete CV blobs no user references any more, and temp files left behind by
+interrupted uploads. Only files older than CV_BLOB_GC_GRACE_SECONDS are touched.
+
+    python -m app.scripts.gc_cv_blobs
+"""
+import time
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.user import User
+from app.services.cv_storage import blob_root
+
+def sweep(engine) -> int:
+    with Session(engine) as session:
+        referenced = {
+            str(Path(path).resolve())
+            for path in session.exec(select(User.cv_path).where(User.cv_path.is_not(None)))
+        }
+    cutoff = time.time() - settings.CV_BLOB_GC_GRACE_SECONDS
+    removed = 0
+    for path in blob_root().rglob("*"):
+        if not path.is_file() or path.stat().st_mtime > cutoff:
+            continue
+        if str(path.resolve()) not in referenced:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+if __name__ == "__main__":
+    print(f"Removed {sweep(engine)} unreferenced CV files")
@@ -0,0 +1,17 @@
+"""
+Create or upgrade the database schema. Run once per deploy, before the
+new code starts serving.
+
+    python -m app.scripts.migrate
+"""
+from app.core.database import engine
+from app.core.migrations import migrate
+
+if __name__ == "__main__":
+    before, after = migrate(engine)
+    if before is None:
+        print(f"Created schema at version {after}")
+    elif before == after:
+        print(f"Schema already at version {after}")
+    else:
+        print(f"Upgraded schema from version {before} to {after}")
@@ -0,0 +1,90 @@
+"""
+Recompute the organization dashboard rollup (OrganizationDailyStats) from
+the job and application tables and their archives, replacing its contents.
+
+Postings count on the day they were posted and applications on the day
+they were received. Status history is not recorded anywhere, so each
+job's and application's current status is counted on that same day: the
+totals come out exact, while the per-day deltas no longer say when a
+status changed. An application whose APPLICATION_CREATED event is still
+in the outbox is left for that event's handler to count as received.
+
+    python -m app.scripts.rebuild_organization_stats
+"""
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, Tuple
+
+from sqlalchemy import Engine, case, delete, func, insert, inspect, select, union_all
+from sqlalchemy.engine import Connection
+
+from app.core.database import engine
+from app.models.application import Application, ApplicationStatus
+from app.models.archive import ArchivedApplication, ArchivedJob
+from app.models.job import Job
+from app.models.organization_stats import OrganizationDailyStats
+from app.models.outbox import OutboxEvent
+from app.services.job_filters import OPEN
+from app.services.organization_stats import STATUS_COLUMNS, rollup_rows
+from app.services.outbox import APPLICATION_CREATED
+
+BATCH_SIZE = 1000
+
+def _day(value) -> date:
+    # date() comes back as an ISO string on SQLite.
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def recompute_organization_stats(conn: Connection) -> int:
+    """
+    Rebuild the rollup in the connection's transaction. Returns the number of rows written.
+    """
+    # The archive tables do not exist yet when migration 4 runs this.
+    archived = ArchivedJob.__tablename__ in inspect(conn).get_table_names()
+    job_models = (Job, ArchivedJob) if archived else (Job,)
+    application_models = (Application, ArchivedApplication) if archived else (Application,)
+
+    changes: Dict[Tuple[int, date], Counter] = defaultdict(Counter)
+    for job in job_models:
+        posted_day = func.date(job.date_posted)
+        for organization_id, day, posted, open_jobs in conn.execute(
+            select(job.organization_id, posted_day, func.count(), func.sum(case((job.status == OPEN, 1), else_=0)))
+            .group_by(job.organization_id, posted_day)
+        ):
+            changes[organization_id, _day(day)].update(jobs_posted=posted, open_jobs_delta=open_jobs)
+
+    # An archived application's job may still be hot; the union of both job
+    # tables maps every job to its organization.
+    owners = union_all(*(select(job.id, job.organization_id) for job in job_models)).subquery()
+    # Events without an organization_id predate counting in the handler.
+    queued = select(OutboxEvent.payload["application_id"].as_integer()).where(
+        OutboxEvent.topic == APPLICATION_CREATED, OutboxEvent.status == "pending",
+        OutboxEvent.payload["organization_id"].as_integer().is_not(None),
+    )
+    for application in application_models:
+        applied_day = func.date(application.applied_at)
+        is_queued = application.id.in_(queued)
+        for organization_id, day, status, in_outbox, count in conn.execute(
+            select(owners.c.organization_id, applied_day, application.status, is_queued, func.count())
+            .join(owners, owners.c.id == application.job_id)
+            .group_by(owners.c.organization_id, applied_day, application.status, is_queued)
+        ):
+            counters = changes[organization_id, _day(day)]
+            counters[STATUS_COLUMNS[status]] += count
+            if in_outbox:
+                # The handler will add it as received (and pending).
+                counters[STATUS_COLUMNS[ApplicationStatus.pending]] -= count
+            else:
+                counters["applications"] += count
+
+    conn.execute(delete(OrganizationDailyStats))
+    rows = rollup_rows(changes)
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(insert(OrganizationDailyStats), rows[start:start + BATCH_SIZE])
+    return len(rows)
+
+def rebuild_organization_stats(engine: Engine) -> int:
+    with engine.begin() as conn:
+        return recompute_organization_stats(conn)
+
+if __name__ == "__main__":
+    print(f"Rebuilt {rebuild_organization_stats(engine)} organization stats rows")
@@ -0,0 +1,197 @@
+"""
+Application writes.
+
+Applying is one INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING
+statement: selecting from `job` drops unknown job ids, the unique
+(user_id, job_id) index rejects duplicates atomically even under concurrent
+requests, and RETURNING reports exactly what was inserted. Applications
+moved to the archive still count as applied: the insert skips (user, job)
+pairs found in ArchivedApplication. Follow-up work
+(notifications and the like) goes through the outbox in the same
+transaction, so it never adds to the request's latency. That includes the
+organization dashboard rollup: counting new applications in the request
+would queue every apply to an organization's postings on its one
+(organization_id, day) row. Status transitions update the rollup in their
+own transaction.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import exists, func, literal, literal_column, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.application import Application, ApplicationStatus
+from app.models.archive import ArchivedApplication
+from app.models.job import Job
+from app.services import organization_stats, outbox
+
+async def create_applications(
+    session: AsyncSession, user_id: int, job_ids: Iterable[int]
+) -> Dict[int, int]:
+    """
+    Apply `user_id` to every job in `job_ids` that exists and that they have not
+    applied to yet. Returns {job_id: application_id} for the inserted rows.
+    The caller commits.
+    """
+    job_ids = list(dict.fromkeys(job_ids))
+    now = datetime.utcnow()
+    source = select(
+        literal(user_id), Job.id, literal(now), literal(ApplicationStatus.pending.value)
+    ).where(
+        Job.id.in_(job_ids),
+        ~exists().where(ArchivedApplication.user_id == user_id, ArchivedApplication.job_id == Job.id),
+    )
+    statement = (
+        dialect_insert(session.bind.dialect.name, Application)
+        .from_select(["user_id", "job_id", "applied_at", "status"], source)
+        .on_conflict_do_nothing(index_elements=["user_id", "job_id"])
+        .returning(Application.job_id, Application.id)
+    )
+    inserted = dict((await session.exec(statement)).all())
+    await _record_applications(session, [
+        (user_id, job_id, application_id) for job_id, application_id in inserted.items()
+    ], now)
+    return inserted
+
+async def create_application_batch(
+    session: AsyncSession, pairs: Iterable[Tuple[int, int]]
+) -> Dict[Tuple[int, int], int]:
+    """
+    Insert the (user_id, job_id) applications of many users in one
+    multi-row statement, skipping unknown jobs and existing applications.
+    Returns {(user_id, job_id): application_id} for the inserted rows.
+    The caller commits; a job deleted between the lookup and the insert
+    fails the whole batch with an IntegrityError.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    jobs = await existing_job_ids(session, {job_id for _, job_id in pairs})
+    archived = await archived_pairs(session, [(user_id, job_id) for user_id, job_id in pairs if job_id in jobs])
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "job_id": job_id, "applied_at": now, "status": ApplicationStatus.pending.value}
+        for user_id, job_id in pairs if job_id in jobs and (user_id, job_id) not in archived
+    ]
+    if not rows:
+        return {}
+    statement = (
+        dialect_insert(session.bind.dialect.name, Application)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_id", "job_id"])
+        .returning(Application.user_id, Application.job_id, Application.id)
+    )
+    inserted = (await session.exec(statement)).all()
+    await _record_applications(session, inserted, now)
+    return {(user_id, job_id): id for user_id, job_id, id in inserted}
+
+async def _record_applications(
+    session: AsyncSession, inserted: Sequence[Tuple[int, int, int]], applied_at: datetime
+) -> None:
+    """
+    Bump the jobs' application_count (one UPDATE per distinct increment)
+    and queue the outbox events for the new (user_id, job_id, id) rows.
+    """
+    if not inserted:
+        return
+    per_job = Counter(job_id for _, job_id, _ in inserted)
+    by_increment: Dict[int, List[int]] = defaultdict(list)
+    for job_id, count in per_job.items():
+        by_increment[count].append(job_id)
+    owners: Dict[int, int] = {}
+    for increment, job_ids in by_increment.items():
+        owners.update((await session.exec(
+            update(Job)
+            .where(Job.id.in_(job_ids))
+            # A counter bump is not a change to the posting itself.
+            .values(application_count=Job.application_count + increment, updated_at=Job.updated_at)
+            .returning(Job.id, Job.organization_id)
+        )).all())
+    await outbox.enqueue(session, outbox.APPLICATION_CREATED, [
+        {"application_id": application_id, "job_id": job_id, "user_id": user_id,
+         "organization_id": owners[job_id], "applied_on": applied_at.date().isoformat()}
+        for user_id, job_id, application_id in inserted
+    ])
+
+async def archived_pairs(session: AsyncSession, pairs: Sequence[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+    """
+    The (user_id, job_id) pairs among `pairs` with an archived application.
+    """
+    if not pairs:
+        return set()
+    result = await session.exec(
+        select(ArchivedApplication.user_id, ArchivedApplication.job_id).where(
+            ArchivedApplication.user_id.in_(sorted({user_id for user_id, _ in pairs})),
+            ArchivedApplication.job_id.in_(sorted({job_id for _, job_id in pairs})),
+        )
+    )
+    return set(map(tuple, result.all())) & set(pairs)
+
+async def existing_job_ids(session: AsyncSession, job_ids: Iterable[int]) -> Set[int]:
+    result = await session.exec(select(Job.id).where(Job.id.in_(list(job_ids))))
+    return set(result.scalars())
+
+async def transition_applications(
+    session: AsyncSession,
+    job_id: int,
+    status: ApplicationStatus,
+    *,
+    organization_id: int,
+    application_ids: Optional[List[int]] = None,
+    exclude_ids: Optional[List[int]] = None,
+    from_statuses: Optional[List[ApplicationStatus]] = None,
+) -> int:
+    """
+    Move the job's applications to `status` in a single UPDATE and return how
+    many rows changed. `application_ids` restricts it to those ids (None means
+    every application), `exclude_ids` spares some, and `from_statuses` only
+    moves applications currently in one of those states. Rows already in
+    `status` are left alone. The caller commits.
+
+    The UPDATE returns each row's previous status, for the organization's
+    stats, from a CTE that reads (and on Postgres locks) the rows first.
+    RETURNING itself only sees the new values.
+    """
+    previous = select(Application.id, Application.status).where(
+        Application.job_id == job_id, Application.status != status
+    )
+    if application_ids is not None:
+        previous = previous.where(Application.id.in_(application_ids))
+    if exclude_ids:
+        previous = previous.where(Application.id.not_in(exclude_ids))
+    if from_statuses:
+        previous = previous.where(Application.status.in_(from_statuses))
+    # MATERIALIZED: SQLite must read the CTE once, before any row changes.
+    previous = previous.with_for_update().cte("previous").prefix_with("MATERIALIZED")
+    result = await session.exec(
+        update(Application)
+        .where(Application.id.in_(select(previous.c.id)))
+        .values(status=status)
+        # Spelled out: SQLite renders RETURNING columns unqualified, which
+        # would make the correlation "id = id".
+        .returning(
+            select(previous.c.status)
+            .where(previous.c.id == literal_column("application.id"))
+            .scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    moved = Counter(ApplicationStatus(source) for source in result.scalars())
+    await organization_stats.record(
+        session, {organization_id: organization_stats.applications_moved(moved, status)}
+    )
+    return sum(moved.values())
+
+async def status_counts(session: AsyncSession, job_id: int) -> Dict[ApplicationStatus, int]:
+    """
+    Number of applications to `job_id` in each status, zeros included.
+    Answered from the (job_id, status, ...) index.
+    """
+    result = await session.exec(
+        select(Application.status, func.count())
+        .where(Application.job_id == job_id)
+        .group_by(Application.status)
+    )
+    counts = dict.fromkeys(ApplicationStatus, 0)
+    counts.update(result.all())
+    return counts
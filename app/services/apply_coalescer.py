@@ -0,0 +1,107 @@
+"""
+Group commit for applications (APPLY_GROUP_COMMIT).
+
+During a surge every POST /users/apply/{job_id} would pay for its own
+transaction, and its own fsync on Postgres. With group commit on, each
+request instead queues its (user_id, job_id) here and waits. The queue is
+written out as one multi-row INSERT in one transaction when it reaches
+APPLY_GROUP_COMMIT_MAX_BATCH entries, or APPLY_GROUP_COMMIT_MAX_WAIT_MS
+after its first entry, whichever comes first. Each caller then gets its
+own application id, or None when nothing was inserted for it (unknown job,
+already applied, or a duplicate of an earlier entry in the same batch).
+
+If the batch fails on an integrity error (a job removed between lookup and
+insert), its entries are retried one transaction each, so one bad entry
+doesn't fail the others.
+"""
+import asyncio
+import contextvars
+import logging
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.services.applications import create_application_batch, create_applications
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[int, int, asyncio.Future]
+
+class ApplyCoalescer:
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Entry] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writers: Set[asyncio.Task] = set()
+
+    async def apply(self, user_id: int, job_id: int) -> Optional[int]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_id, job_id, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        # Shielded: a caller that goes away must not cancel a shared write.
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        # A fresh context, so the write is not accounted to (or its commit
+        # tracked for) whichever request happened to fill the batch.
+        task = contextvars.Context().run(asyncio.create_task, self._write(batch))
+        self._writers.add(task)
+        task.add_done_callback(self._writers.discard)
+
+    async def _write(self, batch: List[Entry]) -> None:
+        try:
+            async with async_session_maker() as session:
+                inserted = await create_application_batch(
+                    session, [(user_id, job_id) for user_id, job_id, _ in batch]
+                )
+                await session.commit()
+        except IntegrityError:
+            logger.warning("Group commit of %d applications failed; retrying one by one", len(batch))
+            await self._write_each(batch)
+            return
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for user_id, job_id, future in batch:
+            if not future.done():
+                # pop: a repeat of the same pair in this batch was not inserted.
+                future.set_result(inserted.pop((user_id, job_id), None))
+
+    async def _write_each(self, batch: List[Entry]) -> None:
+        for user_id, job_id, future in batch:
+            try:
+                async with async_session_maker() as session:
+                    applied = await create_applications(session, user_id, [job_id])
+                    await session.commit()
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            if not future.done():
+                future.set_result(applied.get(job_id))
+
+    async def drain(self) -> None:
+        """
+        Write out anything queued and wait for in-flight batches.
+        """
+        self._flush()
+        await asyncio.gather(*self._writers, return_exceptions=True)
+
+apply_coalescer = ApplyCoalescer(
+    settings.APPLY_GROUP_COMMIT_MAX_BATCH, settings.APPLY_GROUP_COMMIT_MAX_WAIT_MS
+)
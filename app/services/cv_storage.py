@@ -0,0 +1,232 @@
+"""
+Content-addressed CV storage.
+
+Uploads are parsed straight off the request stream (no spooling of the whole
+body first), written chunk by chunk to a temporary file while a SHA-256 is
+computed, and then atomically renamed to `<UPLOAD_DIR>/blobs/<aa>/<sha256><ext>`.
+Identical files are stored once however many users upload them, and a
+half-written file is never visible under its final name.
+
+Blobs no longer referenced by any user are deleted, but only once they are
+older than CV_BLOB_GC_GRACE_SECONDS: a deduplicated upload refreshes the
+blob's mtime before its row is committed, so a concurrent release of the same
+content does not delete it from under the new owner.
+"""
+import hashlib
+import os
+import re
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+from app.models.user import User
+
+class UploadTooLargeError(Exception):
+    """The uploaded file exceeds CV_MAX_BYTES."""
+
+class InvalidUploadError(Exception):
+    """The request is not a multipart upload containing the expected file field."""
+
+@dataclass
+class StoredBlob:
+    path: str
+    sha256: str
+    size: int
+    filename: str
+
+def blob_root() -> Path:
+    return Path(settings.UPLOAD_DIR) / "blobs"
+
+def blob_path(sha256: str, extension: str) -> Path:
+    return blob_root() / sha256[:2] / f"{sha256}{extension}"
+
+def _safe_extension(filename: str) -> str:
+    # Kept so FileResponse can still infer the media type from the path.
+    extension = Path(filename).suffix.lower()
+    return extension if re.fullmatch(r"\.[a-z0-9]{1,10}", extension) else ""
+
+async def receive_upload(request: Request, field: str = "file") -> StoredBlob:
+    """
+    Stream the `field` file part of a multipart request into the blob store.
+    Other parts are ignored.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data upload")
+    if int(request.headers.get("content-length") or 0) > settings.CV_MAX_BYTES + 64 * 1024:
+        raise UploadTooLargeError()
+
+    tmp_dir = blob_root() / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = tmp_dir / f"{uuid.uuid4().hex}.part"
+
+    headers: dict = {}
+    header_field = bytearray()
+    header_value = bytearray()
+    state = {"in_file": False, "filename": None, "done": False}
+    pending: List[bytes] = []
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        state["in_file"] = (
+            not state["done"]
+            and options.get(b"name") == field.encode()
+            and b"filename" in options
+        )
+        if state["in_file"]:
+            state["filename"] = options[b"filename"].decode(errors="replace")
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end():
+        if state["in_file"]:
+            state["in_file"], state["done"] = False, True
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as buffer:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                for data in pending:
+                    size += len(data)
+                    if size > settings.CV_MAX_BYTES:
+                        raise UploadTooLargeError()
+                    digest.update(data)
+                    await buffer.write(data)
+                pending.clear()
+            parser.finalize()
+            await buffer.flush()
+            await anyio.to_thread.run_sync(os.fsync, buffer.wrapped.fileno())
+        if not state["done"]:
+            raise InvalidUploadError(f"Missing file field '{field}'")
+
+        sha256 = digest.hexdigest()
+        final_path = blob_path(sha256, _safe_extension(state["filename"]))
+        await anyio.to_thread.run_sync(_publish, tmp_path, final_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return StoredBlob(str(final_path), sha256, size, state["filename"])
+
+def _publish(tmp_path: Path, final_path: Path) -> None:
+    try:
+        # Already stored: refresh the mtime so a concurrent release keeps it.
+        os.utime(final_path)
+    except FileNotFoundError:
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, final_path)
+
+def _is_collectable(path: Path) -> bool:
+    root = blob_root().resolve()
+    try:
+        resolved = path.resolve()
+        # Never touch files outside the blob store (e.g. legacy per-user paths).
+        return root in resolved.parents and (
+            time.time() - resolved.stat().st_mtime > settings.CV_BLOB_GC_GRACE_SECONDS
+        )
+    except FileNotFoundError:
+        return False
+
+async def release_blob(session: AsyncSession, path: Optional[str]) -> bool:
+    """
+    Delete the blob at `path` if no user references it any more.
+    Call after committing the change that dropped the reference.
+    """
+    if not path:
+        return False
+    references = (await session.exec(
+        select(func.count()).select_from(User).where(User.cv_path == path)
+    )).one()
+    if references or not _is_collectable(Path(path)):
+        return False
+    Path(path).unlink(missing_ok=True)
+    return True
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+class _ZipSink:
+    """
+    Write-only, non-seekable file object that zipfile writes into and the
+    response drains after every chunk. zipfile falls back to data
+    descriptors for unseekable output, so nothing needs to be rewritten.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer.extend(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """
+    Stream a ZIP of the (archive name, file path) entries as it is built.
+    Memory stays at one read chunk plus the central directory entries;
+    files missing from disk are skipped. Entries are STORED: CVs are
+    mostly PDFs, which don't compress further.
+    """
+    sink = _ZipSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED)
+    async for name, path in entries:
+        try:
+            source = await anyio.open_file(path, "rb")
+        except FileNotFoundError:
+            continue
+        async with source:
+            with archive.open(name, mode="w") as destination:
+                while chunk := await source.read(ZIP_CHUNK_SIZE):
+                    destination.write(chunk)
+                    yield sink.drain()
+        yield sink.drain()
+    archive.close()
+    yield sink.drain()
@@ -0,0 +1,309 @@
+"""
+CV text extraction and résumé keyword index.
+
+upload_cv records a pending CvDocument for the new blob in the same
+transaction that points the user at it, then hands the hash to
+`cv_extractor`. Its worker tasks run the PDF/DOCX parsing in a spawn-based
+process pool (parsing is pure Python and CPU bound, so threads would just
+contend for the GIL) and store the normalised text together with one CvTerm
+row per distinct term. Documents are keyed by content hash, so a blob that
+has been extracted once is never parsed again, whoever uploads it.
+
+Work is claimed through the database, like the outbox: a sweep in every
+process claims a batch of pending documents with one UPDATE ... RETURNING
+(FOR UPDATE SKIP LOCKED on Postgres), marking them processing with a lease,
+and queues them for its workers. It runs every CV_EXTRACTION_POLL_SECONDS
+and whenever an upload or a finished extraction wakes it. A document whose
+lease ran out (its process died mid-extraction) is claimed again, so each
+pending document is extracted by one process at a time.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import re
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+from sqlalchemy import and_, delete, func, insert, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_maker, dialect_insert
+from app.models.application import Application
+from app.models.cv_document import CvDocument, CvTerm
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+MAX_TERM_LENGTH = 64
+# Keeps each multi-row INSERT under SQLite's bound parameter limit.
+TERM_BATCH_SIZE = 400
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+class UnsupportedDocumentError(Exception):
+    """The CV is neither a PDF nor a DOCX file."""
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+def index_terms(text: Optional[str]) -> Set[str]:
+    """
+    Distinct index terms of `text`. Same tokenisation as the matching engine,
+    so "c++" and "c#" survive.
+    """
+    if not text:
+        return set()
+    return {term for term in re.findall(r"[a-z0-9+#]+", normalize_text(text)) if len(term) <= MAX_TERM_LENGTH}
+
+def _pdf_text(data: bytes) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+def _docx_text(data: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        try:
+            document = archive.read("word/document.xml")
+        except KeyError:
+            raise UnsupportedDocumentError("ZIP file is not a Word document")
+    root = ElementTree.fromstring(document)
+    return "\n".join(
+        "".join(node.text or "" for node in paragraph.iter(f"{WORD_NAMESPACE}t"))
+        for paragraph in root.iter(f"{WORD_NAMESPACE}p")
+    )
+
+def extract_text(path: str, max_chars: int) -> str:
+    """
+    Normalised text of the PDF or DOCX at `path`, sniffed by content rather
+    than by extension. Runs in the extraction pool.
+    """
+    data = Path(path).read_bytes()
+    if data.startswith(b"%PDF"):
+        text = _pdf_text(data)
+    elif data.startswith(b"PK\x03\x04"):
+        text = _docx_text(data)
+    else:
+        raise UnsupportedDocumentError("Only PDF and DOCX CVs are indexed")
+    return normalize_text(text)[:max_chars]
+
+async def register_cv(session: AsyncSession, user: User) -> bool:
+    """
+    Point `user.cv_text_status` at the extraction state of their new CV,
+    recording a pending document if this content has not been seen before.
+    Returns whether the hash needs to go to the extractor once the caller
+    has committed.
+    """
+    document = await session.get(CvDocument, user.cv_sha256)
+    if document is not None:
+        # Users see a claimed document as pending until it is stored.
+        user.cv_text_status = "pending" if document.status == "processing" else document.status
+        return document.status == "pending"
+    await session.exec(
+        dialect_insert(session.bind.dialect.name, CvDocument)
+        .values(sha256=user.cv_sha256, path=user.cv_path, status="pending")
+        .on_conflict_do_nothing(index_elements=["sha256"])
+    )
+    user.cv_text_status = "pending"
+    return True
+
+async def store_extraction(
+    session: AsyncSession, sha256: str, status: str, text: Optional[str], error: Optional[str]
+) -> None:
+    """
+    Save an extraction result, rebuild the document's postings and mirror the
+    status onto every user whose current CV it is. The caller commits.
+    """
+    await session.exec(delete(CvTerm).where(CvTerm.sha256 == sha256))
+    terms = sorted(index_terms(text))
+    for start in range(0, len(terms), TERM_BATCH_SIZE):
+        await session.exec(
+            insert(CvTerm).values([
+                {"term": term, "sha256": sha256} for term in terms[start:start + TERM_BATCH_SIZE]
+            ])
+        )
+    await session.exec(
+        update(CvDocument)
+        .where(CvDocument.sha256 == sha256)
+        .values(status=status, text=text, error=error, extracted_at=datetime.utcnow(), lease_until=None)
+    )
+    await session.exec(
+        update(User).where(User.cv_sha256 == sha256).values(cv_text_status=status)
+    )
+
+def applicants_matching_statement(job_id: int, keywords: str, limit: int):
+    """
+    Applications to `job_id` whose CV contains every term of `keywords`, in
+    one query: the posting lists are intersected with GROUP BY / HAVING and
+    joined to the applicants. Returns None when `keywords` has no terms.
+    """
+    terms = sorted(index_terms(keywords))
+    if not terms:
+        return None
+    matching = (
+        select(CvTerm.sha256)
+        .where(CvTerm.term.in_(terms))
+        .group_by(CvTerm.sha256)
+        .having(func.count() == len(terms))
+    )
+    return (
+        select(
+            Application.id, User.id, User.full_name, User.email, User.cv_filename, Application.status
+        )
+        .join(User, User.id == Application.user_id)
+        .where(Application.job_id == job_id, User.cv_sha256.in_(matching))
+        .order_by(Application.id)
+        .limit(limit)
+    )
+
+def _claimable(now: datetime):
+    return or_(
+        CvDocument.status == "pending",
+        and_(CvDocument.status == "processing", CvDocument.lease_until < now),
+    )
+
+async def claim_documents(
+    session: AsyncSession, limit: int, sha256: Optional[str] = None
+) -> List[Tuple[str, str]]:
+    """
+    Mark up to `limit` pending (or abandoned) documents as processing under a
+    fresh lease and return their (sha256, path). With `sha256`, only that
+    document. Commits.
+    """
+    now = datetime.utcnow()
+    due = select(CvDocument.sha256).where(_claimable(now))
+    if sha256 is not None:
+        due = due.where(CvDocument.sha256 == sha256)
+    due = due.order_by(CvDocument.sha256).limit(limit).with_for_update(skip_locked=True)
+    claimed = (await session.exec(
+        update(CvDocument)
+        .where(CvDocument.sha256.in_(due.scalar_subquery()), _claimable(now))
+        .values(status="processing", lease_until=now + timedelta(seconds=settings.CV_EXTRACTION_LEASE_SECONDS))
+        .returning(CvDocument.sha256, CvDocument.path)
+    )).all()
+    await session.commit()
+    return [(row.sha256, row.path) for row in claimed]
+
+class CvExtractor:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, for the same reason as the hashing pool.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(self.queue_size)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    def notify(self) -> None:
+        """
+        Sweep now rather than at the next interval; call after committing a
+        pending document.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _sweep(self) -> None:
+        while True:
+            self._wakeup.clear()
+            free = self._queue.maxsize - self._queue.qsize()
+            claimed = []
+            if free > 0:
+                try:
+                    async with async_session_maker() as session:
+                        claimed = await claim_documents(session, free)
+                except Exception:
+                    logger.exception("CV extraction sweep failed")
+            for document in claimed:
+                self._queue.put_nowait(document)
+            if not claimed or len(claimed) < free:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.CV_EXTRACTION_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _consume(self) -> None:
+        while True:
+            sha256, path = await self._queue.get()
+            try:
+                await self.extract(sha256, path)
+            except Exception:
+                logger.exception("CV extraction for %s failed", sha256)
+            finally:
+                self._queue.task_done()
+                self.notify()
+
+    async def process(self, sha256: str) -> Optional[str]:
+        """
+        Claim and extract one pending document and return its new status, or
+        None if it was not pending or another worker holds it.
+        """
+        async with async_session_maker() as session:
+            claimed = await claim_documents(session, 1, sha256)
+        if not claimed:
+            return None
+        return await self.extract(*claimed[0])
+
+    async def extract(self, sha256: str, path: str) -> str:
+        """
+        Extract a document this worker has claimed and store the result.
+        """
+        text = error = None
+        try:
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(
+                self._get_pool(), extract_text, path, settings.CV_TEXT_MAX_CHARS
+            )
+            status = "done"
+        except UnsupportedDocumentError as exc:
+            status, error = "unsupported", str(exc)
+        except Exception as exc:
+            status, error = "failed", f"{type(exc).__name__}: {exc}"[:500]
+
+        async with async_session_maker() as session:
+            await store_extraction(session, sha256, status, text, error)
+            await session.commit()
+        return status
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        queued = []
+        while self._queue is not None and not self._queue.empty():
+            queued.append(self._queue.get_nowait()[0])
+        if queued:
+            # Hand claimed but unstarted documents back rather than leave them to their lease.
+            async with async_session_maker() as session:
+                await session.exec(
+                    update(CvDocument)
+                    .where(CvDocument.sha256.in_(queued), CvDocument.status == "processing")
+                    .values(status="pending", lease_until=None)
+                )
+                await session.commit()
+        self._tasks, self._queue, self._wakeup = [], None, None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+cv_extractor = CvExtractor(settings.CV_EXTRACTION_WORKERS, settings.CV_EXTRACTION_QUEUE_SIZE)
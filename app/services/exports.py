@@ -0,0 +1,59 @@
+"""
+Streaming NDJSON / CSV encoding for exports.
+
+Rows are consumed from an async iterator (normally stream_rows over a
+server-side cursor) and encoded in batches, so an export of any size holds
+one batch of rows in memory.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Sequence
+
+EXPORT_BATCH_ROWS = 500
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+# Spreadsheet applications evaluate cells starting with these.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+async def encode_rows(
+    rows: AsyncIterator[Sequence[Any]], columns: Sequence[str], export_format: str
+) -> AsyncIterator[bytes]:
+    """
+    Encode `rows` as NDJSON objects keyed by `columns`, or as CSV with a
+    header line.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer:
+        writer.writerow(columns)
+    pending = 0
+    async for row in rows:
+        if writer:
+            writer.writerow([_csv_cell(value) for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default))
+            buffer.write("\n")
+        pending += 1
+        if pending == EXPORT_BATCH_ROWS:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
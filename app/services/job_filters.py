@@ -0,0 +1,106 @@
+"""
+Job board filters and facet counts, evaluated in SQL.
+
+A user is eligible for a job that is Open and whose [min_age, max_age]
+range contains their age; a missing bound is open-ended. The age filter is
+skipped for users whose age is unknown, so an incomplete profile narrows
+nothing rather than hiding every job with an age limit. Job recommendations
+and candidate ranking (app/services/matching.py) follow the same rule.
+
+Facet counts (by department, status and organization industry) cover the
+jobs matching the current filters and come from one GROUP BY over all three
+columns, folded per facet here: the number of distinct combinations is
+small, and it is a single scan on every backend, where GROUPING SETS would
+not be portable to SQLite.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlmodel import select
+from sqlmodel.sql.expression import Select, SelectOfScalar
+
+from app.models.job import Job
+from app.models.organization import Organization
+
+FACETS = ("department", "status", "industry")
+OPEN = "Open"
+
+def user_age(age: Optional[int], date_of_birth: Optional[datetime]) -> Optional[int]:
+    if age is not None or date_of_birth is None:
+        return age
+    today = datetime.utcnow()
+    return today.year - date_of_birth.year - (
+        (today.month, today.day) < (date_of_birth.month, date_of_birth.day)
+    )
+
+@dataclass(frozen=True)
+class JobFilters:
+    eligible: bool = True
+    age: Optional[int] = None
+    department: Optional[str] = None
+    status: Optional[str] = None
+    industry: Optional[str] = None
+
+    def cache_key(self) -> str:
+        # The age only matters, and only fragments the cache, when filtering on it.
+        age = self.age if self.eligible and self.age is not None else ""
+        parts = (int(self.eligible), age, self.department, self.status, self.industry)
+        return ":".join("" if part is None else str(part).replace(":", "%3A") for part in parts)
+
+def _conditions(filters: JobFilters) -> list:
+    conditions = []
+    if filters.eligible:
+        conditions.append(Job.status == OPEN)
+        if filters.age is not None:
+            conditions.append(or_(Job.min_age.is_(None), Job.min_age <= filters.age))
+            conditions.append(or_(Job.max_age.is_(None), Job.max_age >= filters.age))
+    if filters.department is not None:
+        conditions.append(Job.department == filters.department)
+    if filters.status is not None:
+        conditions.append(Job.status == filters.status)
+    if filters.industry is not None:
+        conditions.append(Organization.industry == filters.industry)
+    return conditions
+
+def filter_jobs(statement: SelectOfScalar[Job], filters: JobFilters) -> SelectOfScalar[Job]:
+    """
+    Restrict a Job query to `filters`, joining Organization only when
+    filtering on industry.
+    """
+    if filters.industry is not None:
+        statement = statement.join(Organization, Organization.id == Job.organization_id)
+    conditions = _conditions(filters)
+    return statement.where(and_(*conditions)) if conditions else statement
+
+def facet_counts_statement(filters: JobFilters) -> Select:
+    """
+    Select (department, status, industry, count) rows for the jobs matching
+    `filters`; fold them with `fold_facets`.
+    """
+    statement = (
+        select(Job.department, Job.status, Organization.industry, func.count())
+        .join(Organization, Organization.id == Job.organization_id)
+        .group_by(Job.department, Job.status, Organization.industry)
+    )
+    conditions = _conditions(filters)
+    return statement.where(and_(*conditions)) if conditions else statement
+
+def fold_facets(rows: Iterable[Tuple[Optional[str], Optional[str], Optional[str], int]]) -> Dict[str, object]:
+    """
+    Sum the combination counts per facet value, largest first, ties by value.
+    """
+    totals: Dict[str, Dict[Optional[str], int]] = {facet: {} for facet in FACETS}
+    total = 0
+    for *values, count in rows:
+        total += count
+        for facet, value in zip(FACETS, values):
+            totals[facet][value] = totals[facet].get(value, 0) + count
+    facets: Dict[str, object] = {"total": total}
+    for facet, counts in totals.items():
+        ordered: List[Tuple[Optional[str], int]] = sorted(
+            counts.items(), key=lambda item: (-item[1], item[0] is None, item[0] or "")
+        )
+        facets[facet] = [{"value": value, "count": count} for value, count in ordered]
+    return facets
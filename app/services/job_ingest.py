@@ -0,0 +1,277 @@
+"""
+Bulk job ingestion.
+
+The request body (NDJSON, or CSV with a header row) is parsed as it streams
+in, each row is validated against JobCreate, and valid rows are written in
+batches of one multi-row INSERT each, committed per batch. Invalid rows are
+reported back by row number and never abort the rest of the upload.
+
+In upsert mode rows are matched on (organization_id, external_id) with
+INSERT ... ON CONFLICT DO UPDATE, so replaying the same feed is idempotent.
+In insert mode a row whose external_id already exists is reported as an
+error instead.
+"""
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.job import Job
+from app.schemas.job import JobBulkError, JobBulkResult, JobCreate
+from app.services import matching_hooks, organization_stats
+
+BULK_MEDIA_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+# Columns an upsert overwrites; date_posted and counters keep their values.
+# ON CONFLICT DO UPDATE does not apply onupdate defaults, so updated_at is listed.
+UPSERT_COLUMNS = (
+    "title", "description", "requirements", "department", "status", "min_age", "max_age", "updated_at",
+)
+
+class BulkFormatError(Exception):
+    """The body cannot be parsed as the declared format at all."""
+
+class _NeedMoreLines(Exception):
+    """The lines received so far end inside a quoted CSV field."""
+
+RowResult = Tuple[int, Optional[Dict[str, Any]], Optional[List[Dict[str, Any]]]]
+
+def _error(message: str, loc: Tuple = ()) -> List[Dict[str, Any]]:
+    return [{"loc": list(loc), "msg": message}]
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Decode a UTF-8 byte stream (an optional BOM is dropped) into lines
+    without buffering more than one line.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in stream:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+            if len(pending.encode()) > settings.JOB_BULK_MAX_LINE_BYTES:
+                raise BulkFormatError(f"Line exceeds {settings.JOB_BULK_MAX_LINE_BYTES} bytes")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise BulkFormatError("Body is not valid UTF-8")
+    if pending.rstrip("\r"):
+        yield pending.rstrip("\r")
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[RowResult]:
+    number = 0
+    async for line in iter_lines(stream):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, _error(f"Invalid JSON: {exc}")
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, _error("Expected a JSON object")
+
+def _buffered_lines(lines: List[str]) -> Iterator[str]:
+    for line in lines:
+        yield line + "\n"
+    raise _NeedMoreLines
+
+async def iter_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[RowResult]:
+    """
+    CSV with a header row, split into records by csv.reader itself, so a
+    quoted field may span lines and quotes follow the csv module's rules.
+    The reader cannot wait on the stream, so it runs over the lines buffered
+    so far; a record that runs past them is parsed again once the buffer has
+    doubled, which keeps long records linear. A record may take up to
+    JOB_BULK_MAX_LINE_BYTES.
+    """
+    header: Optional[List[str]] = None
+    number = 0
+    lines = iter_lines(stream)
+    buffered: List[str] = []
+    wanted, exhausted = 1, False
+    while True:
+        while len(buffered) < wanted and not exhausted:
+            try:
+                buffered.append(await lines.__anext__())
+            except StopAsyncIteration:
+                exhausted = True
+        if not buffered:
+            return
+        reader = csv.reader(_buffered_lines(buffered))
+        try:
+            values = next(reader)
+        except _NeedMoreLines:
+            values = None
+        except csv.Error as exc:
+            raise BulkFormatError(f"Malformed CSV: {exc}")
+        # Without values, every buffered line belongs to the unfinished record.
+        record = buffered if values is None else buffered[:reader.line_num]
+        if sum(len(line.encode()) + 1 for line in record) > settings.JOB_BULK_MAX_LINE_BYTES:
+            raise BulkFormatError(f"CSV record exceeds {settings.JOB_BULK_MAX_LINE_BYTES} bytes")
+        if values is None:
+            if exhausted:
+                raise BulkFormatError("Unterminated quoted CSV field")
+            wanted = 2 * len(buffered)
+            continue
+        del buffered[:reader.line_num]
+        wanted = 1
+        if len(values) <= 1 and not "".join(values).strip():
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, None, _error(f"Expected {len(header)} fields, got {len(values)}")
+            continue
+        # Empty cells mean "not given", so optional columns fall back to defaults.
+        yield number, {name: value for name, value in zip(header, values) if value != ""}, None
+
+class JobIngest:
+    def __init__(
+        self, session: AsyncSession, organization_id: int, *, upsert: bool, batch_size: int
+    ):
+        self.session = session
+        self.organization_id = organization_id
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.result = JobBulkResult(created=0, updated=0, failed=0, errors=[])
+        # Ids of existing postings overwritten by an upsert.
+        self.updated_ids: List[int] = []
+        self._batch: List[Tuple[int, Dict[str, Any]]] = []
+        self._seen_external_ids: Set[str] = set()
+
+    def fail(self, number: int, errors: List[Dict[str, Any]]) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < settings.JOB_BULK_MAX_ERRORS:
+            self.result.errors.append(JobBulkError(row=number, errors=errors))
+
+    async def run(self, rows: AsyncIterator[RowResult]) -> JobBulkResult:
+        total = 0
+        async for number, row, errors in rows:
+            total += 1
+            if total > settings.JOB_BULK_MAX_ROWS:
+                raise BulkFormatError(f"More than {settings.JOB_BULK_MAX_ROWS} rows")
+            if errors:
+                self.fail(number, errors)
+            else:
+                await self.add(number, row)
+        await self.flush()
+        return self.result
+
+    async def add(self, number: int, row: Dict[str, Any]) -> None:
+        try:
+            job_in = JobCreate.model_validate(row)
+        except ValidationError as exc:
+            self.fail(number, [
+                {"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()
+            ])
+            return
+        external_id = job_in.external_id
+        if self.upsert and not external_id:
+            self.fail(number, _error("external_id is required in upsert mode", ("external_id",)))
+            return
+        if external_id:
+            if external_id in self._seen_external_ids:
+                self.fail(number, _error("Duplicate external_id in this upload", ("external_id",)))
+                return
+            self._seen_external_ids.add(external_id)
+
+        values = job_in.model_dump()
+        values["organization_id"] = self.organization_id
+        self._batch.append((number, values))
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        external_ids = [values["external_id"] for _, values in batch if values["external_id"]]
+        # external_id -> status of postings this batch may overwrite, locked
+        # until the batch commits so the stats see the status it replaces.
+        existing: Dict[str, str] = {}
+        if external_ids:
+            existing = dict((await self.session.exec(
+                select(Job.external_id, Job.status).where(
+                    Job.organization_id == self.organization_id, Job.external_id.in_(external_ids)
+                ).with_for_update()
+            )).all())
+        if not self.upsert and existing:
+            for number, values in batch:
+                if values["external_id"] in existing:
+                    self.fail(number, _error(
+                        "A job with this external_id already exists; use mode=upsert",
+                        ("external_id",),
+                    ))
+            batch = [(number, values) for number, values in batch if values["external_id"] not in existing]
+            if not batch:
+                return
+
+        rows = [values for _, values in batch]
+        statement = dialect_insert(self.session.bind.dialect.name, Job).values(rows)
+        if self.upsert:
+            statement = statement.on_conflict_do_update(
+                index_elements=["organization_id", "external_id"],
+                set_={column: statement.excluded[column] for column in UPSERT_COLUMNS},
+            )
+        else:
+            # Loses only to a concurrent upload of the same external_id.
+            statement = statement.on_conflict_do_nothing(
+                index_elements=["organization_id", "external_id"]
+            )
+        written = (await self.session.exec(statement.returning(Job.id, Job.external_id))).all()
+        written_external_ids = {external_id for _, external_id in written if external_id}
+        await self.record_stats(rows, existing, written_external_ids)
+        await self.session.commit()
+
+        for number, values in batch:
+            if values["external_id"] and values["external_id"] not in written_external_ids:
+                self.fail(number, _error("A job with this external_id already exists", ("external_id",)))
+        updated = [id for id, external_id in written if external_id in existing]
+        self.updated_ids.extend(updated)
+        self.result.updated += len(updated)
+        self.result.created += len(written) - len(updated)
+
+        # RETURNING order is not guaranteed to follow VALUES order, so only
+        # rows with an external_id can be matched back to their new id. The
+        # rest are new ids, which the engine's next refresh tails anyway.
+        by_external_id = {values["external_id"]: values for values in rows if values["external_id"]}
+        for id, external_id in written:
+            if external_id:
+                matching_hooks.job_changed(Job(id=id, **by_external_id[external_id]))
+
+    async def record_stats(
+        self, rows: List[Dict[str, Any]], existing: Dict[str, str], written_external_ids: Set[str]
+    ) -> None:
+        """
+        Count the batch's new postings, and status changes of overwritten
+        ones, into the organization's daily stats. Rows without an
+        external_id never conflict, so they were all inserted.
+        """
+        posted, transitions = [], []
+        for values in rows:
+            external_id = values["external_id"]
+            if external_id in existing:
+                transitions.append((existing[external_id], values["status"]))
+            elif not external_id or external_id in written_external_ids:
+                posted.append(values["status"])
+        changes = organization_stats.jobs_posted(posted)
+        # update() rather than +, which would drop a negative open_jobs_delta.
+        changes.update(organization_stats.job_status_changed(transitions))
+        await organization_stats.record(self.session, {self.organization_id: changes})
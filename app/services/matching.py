@@ -0,0 +1,349 @@
+"""
+Candidate-job matching.
+
+Jobs and user profiles are embedded as L2-normalised TF-IDF vectors over a
+hashed vocabulary (feature hashing, so there is no vocabulary to rebuild when
+new words show up) and kept in two sparse indexes, one row per job and one per
+user. Scoring a query against a whole side is one sparse matrix product. The
+indexes are stored column-major, which makes them inverted indexes: only rows
+sharing at least one term with the query are touched.
+
+Updates are incremental. New or changed rows go to a small delta segment
+(the old version is tombstoned) that is folded into the main segment once it
+outgrows a fraction of it. Writes made through this process are applied by
+the hooks straight away; those made by other workers are tailed by
+updated_at on the next refresh. Document frequencies are learned as rows arrive
+and are not decremented when a row changes, so IDF weights drift slightly
+until the process restarts and reloads.
+"""
+import asyncio
+import re
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from scipy import sparse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.user import User
+from app.services.job_filters import user_age
+
+N_FEATURES = 2 ** 18
+JOB_ATTRS = ("min_age", "max_age", "is_open")
+USER_ATTRS = ("age",)
+# Refreshes re-read rows this far behind the newest updated_at seen, so a
+# write stamped just before it but committed after it is not missed.
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+Features = Tuple[np.ndarray, np.ndarray]  # (feature indices, weights)
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return re.findall(r"[a-z0-9+#]+", text.lower()) if text else []
+
+def hashed_counts(fields: Iterable[Tuple[Optional[str], float]]) -> Dict[int, float]:
+    """
+    Weighted term counts of the given (text, field weight) pairs, keyed by
+    hashed feature index. crc32 rather than hash() so indexes are stable
+    across processes.
+    """
+    counts: Dict[int, float] = {}
+    for text, weight in fields:
+        for token in tokenize(text):
+            feature = zlib.crc32(token.encode()) % N_FEATURES
+            counts[feature] = counts.get(feature, 0.0) + weight
+    return counts
+
+def job_fields(job) -> List[Tuple[Optional[str], float]]:
+    return [(job.title, 2.0), (job.department, 1.0), (job.requirements, 1.0), (job.description, 0.5)]
+
+def user_fields(user) -> List[Tuple[Optional[str], float]]:
+    return [(user.desired_job, 2.0), (user.qualification, 1.0)]
+
+def _nan_if_none(value: Optional[float]) -> float:
+    return np.nan if value is None else float(value)
+
+class SparseRowIndex:
+    """
+    Rows of sparse feature vectors addressed by entity id, with per-row
+    numeric attributes used for eligibility masks.
+    """
+
+    def __init__(self, attr_names: Sequence[str], compact_ratio: float = 0.1):
+        self.attr_names = tuple(attr_names)
+        self.compact_ratio = compact_ratio
+        self._main = sparse.csc_matrix((0, N_FEATURES), dtype=np.float32)
+        self._main_ids = np.empty(0, dtype=np.int64)
+        self._main_attrs = np.empty((0, len(self.attr_names)))
+        self._main_alive = np.empty(0, dtype=bool)
+        self._delta_ids: List[int] = []
+        self._delta_rows: List[Features] = []
+        self._delta_attrs: List[List[float]] = []
+        self._delta_alive: List[bool] = []
+        self._delta_matrix: Optional[sparse.csc_matrix] = None
+        self._position: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._position
+
+    def _tombstone(self, id: int) -> None:
+        position = self._position.pop(id, None)
+        if position is None:
+            return
+        if position < len(self._main_ids):
+            self._main_alive[position] = False
+        else:
+            self._delta_alive[position - len(self._main_ids)] = False
+
+    def upsert(
+        self, id: int, features: Features, attrs: Sequence[float], defer_compact: bool = False
+    ) -> None:
+        self._tombstone(id)
+        self._position[id] = len(self._main_ids) + len(self._delta_ids)
+        self._delta_ids.append(id)
+        self._delta_rows.append(features)
+        self._delta_attrs.append(list(attrs))
+        self._delta_alive.append(True)
+        self._delta_matrix = None
+        if not defer_compact:
+            self.maybe_compact()
+
+    def maybe_compact(self) -> None:
+        if len(self._delta_ids) > max(1024, self.compact_ratio * len(self._main_ids)):
+            self.compact()
+
+    def remove(self, id: int) -> None:
+        self._tombstone(id)
+
+    def _build_delta(self) -> sparse.csc_matrix:
+        if self._delta_matrix is None:
+            indptr = np.zeros(len(self._delta_rows) + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(indices) for indices, _ in self._delta_rows])
+            indices = np.concatenate([i for i, _ in self._delta_rows]) if self._delta_rows else []
+            data = np.concatenate([d for _, d in self._delta_rows]) if self._delta_rows else []
+            self._delta_matrix = sparse.csr_matrix(
+                (data, indices, indptr), shape=(len(self._delta_rows), N_FEATURES), dtype=np.float32
+            ).tocsc()
+        return self._delta_matrix
+
+    def compact(self) -> None:
+        """
+        Fold the delta segment into the main one and drop tombstoned rows.
+        """
+        delta = self._build_delta()
+        delta_alive = np.asarray(self._delta_alive, dtype=bool)
+        self._main = sparse.vstack(
+            [self._main.tocsr()[self._main_alive], delta.tocsr()[delta_alive]], format="csc"
+        )
+        self._main_ids = np.concatenate(
+            [self._main_ids[self._main_alive], np.asarray(self._delta_ids, dtype=np.int64)[delta_alive]]
+        )
+        delta_attrs = np.asarray(self._delta_attrs, dtype=float).reshape(-1, len(self.attr_names))
+        self._main_attrs = np.vstack([self._main_attrs[self._main_alive], delta_attrs[delta_alive]])
+        self._main_alive = np.ones(len(self._main_ids), dtype=bool)
+        self._delta_ids, self._delta_rows, self._delta_attrs, self._delta_alive = [], [], [], []
+        self._delta_matrix = None
+        self._position = {int(id): row for row, id in enumerate(self._main_ids)}
+
+    def score(self, query: Features) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Dot product of `query` with every live row sharing a term with it.
+        Returns (ids, scores, attrs) of those rows.
+        """
+        columns, weights = query
+        segments = [(self._main, self._main_ids, self._main_attrs, self._main_alive)]
+        if self._delta_ids:
+            segments.append((
+                self._build_delta(),
+                np.asarray(self._delta_ids, dtype=np.int64),
+                np.asarray(self._delta_attrs, dtype=float).reshape(-1, len(self.attr_names)),
+                np.asarray(self._delta_alive, dtype=bool),
+            ))
+        ids, scores, attrs = [], [], []
+        for matrix, segment_ids, segment_attrs, alive in segments:
+            if matrix.shape[0] == 0 or len(columns) == 0:
+                continue
+            segment_scores = matrix[:, columns] @ weights
+            rows = np.flatnonzero((segment_scores > 0) & alive)
+            ids.append(segment_ids[rows])
+            scores.append(segment_scores[rows])
+            attrs.append(segment_attrs[rows])
+        if not ids:
+            return np.empty(0, np.int64), np.empty(0), np.empty((0, len(self.attr_names)))
+        return np.concatenate(ids), np.concatenate(scores), np.vstack(attrs)
+
+def top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    if len(ids) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[best], scores[best]
+    order = np.lexsort((-ids, -scores))
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+class MatchingEngine:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Drop both indexes; the next refresh reloads them from the database.
+        """
+        self.jobs = SparseRowIndex(JOB_ATTRS)
+        self.users = SparseRowIndex(USER_ATTRS)
+        self.df = np.zeros(N_FEATURES, dtype=np.int64)
+        self.n_docs = 0
+        self.loaded = False
+        self.refreshed_at = 0.0
+        self.jobs_seen_until: Optional[datetime] = None
+        self.users_seen_until: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    def _vectorize(self, counts: Dict[int, float], learn: bool) -> Features:
+        """
+        Sublinear TF times smoothed IDF, L2-normalised. `learn` adds the
+        document to the document frequencies first.
+        """
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        if learn:
+            self.df[indices] += 1
+            self.n_docs += 1
+        tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))
+        idf = np.log((1.0 + self.n_docs) / (1.0 + self.df[indices])) + 1.0
+        weights = tf * idf
+        weights /= np.linalg.norm(weights)
+        order = np.argsort(indices)
+        return indices[order], weights[order].astype(np.float32)
+
+    @staticmethod
+    def _job_attrs(job) -> Tuple[float, float, float]:
+        return (_nan_if_none(job.min_age), _nan_if_none(job.max_age), float(job.status == "Open"))
+
+    @staticmethod
+    def _user_attrs(user) -> Tuple[float]:
+        return (_nan_if_none(user_age(user.age, user.date_of_birth)),)
+
+    def upsert_job(self, job) -> None:
+        features = self._vectorize(hashed_counts(job_fields(job)), learn=job.id not in self.jobs)
+        self.jobs.upsert(job.id, features, self._job_attrs(job))
+
+    def upsert_user(self, user) -> None:
+        features = self._vectorize(hashed_counts(user_fields(user)), learn=user.id not in self.users)
+        self.users.upsert(user.id, features, self._user_attrs(user))
+
+    def job_changed(self, job) -> None:
+        """
+        Hook for endpoints that create or update a job. Before the first
+        load the job will be picked up by it instead.
+        """
+        if self.loaded:
+            self.upsert_job(job)
+
+    def user_changed(self, user) -> None:
+        if self.loaded:
+            self.upsert_user(user)
+
+    def recommend_jobs(self, user, k: int) -> List[Tuple[int, float]]:
+        """
+        Top-k open jobs for `user` whose age range admits them; an unknown
+        age passes every range, as on the job board (see job_filters).
+        """
+        query = self._vectorize(hashed_counts(user_fields(user)), learn=False)
+        ids, scores, attrs = self.jobs.score(query)
+        age = _nan_if_none(user_age(user.age, user.date_of_birth))
+        min_age, max_age, is_open = attrs.T
+        eligible = is_open > 0
+        if not np.isnan(age):
+            eligible &= (np.isnan(min_age) | (age >= min_age)) & (np.isnan(max_age) | (age <= max_age))
+        return top_k(ids[eligible], scores[eligible], k)
+
+    def rank_candidates(self, job, k: int) -> List[Tuple[int, float]]:
+        """
+        Top-k users for `job` whose age falls within its range, or is unknown.
+        """
+        query = self._vectorize(hashed_counts(job_fields(job)), learn=False)
+        ids, scores, attrs = self.users.score(query)
+        age = attrs[:, 0]
+        unknown = np.isnan(age)
+        eligible = np.ones(len(ids), dtype=bool)
+        if job.min_age is not None:
+            eligible &= unknown | (age >= job.min_age)
+        if job.max_age is not None:
+            eligible &= unknown | (age <= job.max_age)
+        return top_k(ids[eligible], scores[eligible], k)
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """
+        Load the indexes on first use, then periodically pull jobs and users
+        created or changed by other workers since the last refresh.
+        """
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            jobs = (await session.exec(
+                select(Job.id, Job.title, Job.department, Job.requirements, Job.description,
+                       Job.min_age, Job.max_age, Job.status, Job.updated_at)
+                .where(*self._changed_since(Job.updated_at, self.jobs_seen_until))
+            )).all()
+            users = (await session.exec(
+                select(User.id, User.desired_job, User.qualification, User.age, User.date_of_birth,
+                       User.updated_at)
+                .where(*self._changed_since(User.updated_at, self.users_seen_until))
+            )).all()
+            if self.loaded:
+                # Small tail; applied on the loop so readers never see half of it.
+                self._ingest(jobs, users)
+            else:
+                # Nothing reads the indexes before `loaded` is set.
+                await run_in_threadpool(self._ingest, jobs, users)
+            self.loaded = True
+            self.refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _changed_since(column, seen_until: Optional[datetime]) -> list:
+        # Nothing seen yet (first load, or the table was empty): read it all.
+        return [] if seen_until is None else [column >= seen_until - WATERMARK_OVERLAP]
+
+    def _is_fresh(self) -> bool:
+        return self.loaded and time.monotonic() - self.refreshed_at < settings.MATCHING_REFRESH_SECONDS
+
+    def _ingest(self, jobs: Sequence, users: Sequence) -> None:
+        job_counts = [hashed_counts(job_fields(job)) for job in jobs]
+        user_counts = [hashed_counts(user_fields(user)) for user in users]
+        # Count document frequencies over the whole batch before weighting
+        # any of it, so the first rows loaded get the same IDF as the last.
+        # Changed rows already counted when they were first indexed.
+        for counts, new in [
+            *((counts, job.id not in self.jobs) for job, counts in zip(jobs, job_counts)),
+            *((counts, user.id not in self.users) for user, counts in zip(users, user_counts)),
+        ]:
+            if counts and new:
+                self.df[np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))] += 1
+                self.n_docs += 1
+        for job, counts in zip(jobs, job_counts):
+            features = self._vectorize(counts, learn=False)
+            self.jobs.upsert(job.id, features, self._job_attrs(job), defer_compact=True)
+        for user, counts in zip(users, user_counts):
+            features = self._vectorize(counts, learn=False)
+            self.users.upsert(user.id, features, self._user_attrs(user), defer_compact=True)
+        self.jobs.maybe_compact()
+        self.users.maybe_compact()
+        # Only timestamps read back from the database advance the watermarks.
+        self.jobs_seen_until = max(
+            filter(None, [self.jobs_seen_until, *(job.updated_at for job in jobs)]), default=None
+        )
+        self.users_seen_until = max(
+            filter(None, [self.users_seen_until, *(user.updated_at for user in users)]), default=None
+        )
+
+matching_engine = MatchingEngine()
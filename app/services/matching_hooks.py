@@ -0,0 +1,21 @@
+"""
+Change notifications for the matching engine that don't import it.
+
+app.services.matching pulls in numpy and scipy, the largest share of the
+app's import time, and only the ranking endpoints need it. Write paths
+notify through these hooks instead: an engine module that has not been
+imported yet has no loaded index to update, so they are no-ops until then.
+"""
+import sys
+
+MATCHING_MODULE = "app.services.matching"
+
+def job_changed(job) -> None:
+    module = sys.modules.get(MATCHING_MODULE)
+    if module is not None:
+        module.matching_engine.job_changed(job)
+
+def user_changed(user) -> None:
+    module = sys.modules.get(MATCHING_MODULE)
+    if module is not None:
+        module.matching_engine.user_changed(user)
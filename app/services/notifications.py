@@ -0,0 +1,34 @@
+"""
+Notifications to organizations, run from the outbox worker.
+
+There is no delivery channel (e-mail, webhooks) in the app yet, so the
+notification is written to the "app.notifications" log for whatever ships
+those logs to pick up. Sending it again for a retried event is harmless.
+"""
+import logging
+from typing import Any, Dict
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.job import Job
+from app.models.organization import Organization
+
+logger = logging.getLogger("app.notifications")
+
+async def notify_organization(session: AsyncSession, payload: Dict[str, Any]) -> None:
+    """
+    Tell the organization that posted the job about a new application.
+    """
+    row = (await session.exec(
+        select(Organization.email, Job.title)
+        .join(Job, Job.organization_id == Organization.id)
+        .where(Job.id == payload["job_id"])
+    )).first()
+    if row is None:
+        return
+    email, title = row
+    logger.info(
+        "New application %s for job %s (%s); notify %s",
+        payload["application_id"], payload["job_id"], title, email,
+    )
@@ -0,0 +1,146 @@
+"""
+Organization dashboard statistics, kept as a per-organization, per-day
+rollup (OrganizationDailyStats) so the dashboard reads O(days) rows however
+many applications an organization has.
+
+Writers call `record` in the same transaction as their change: creating
+jobs, changing a job's status and moving applications between statuses.
+New applications are counted by `count_application`, the outbox handler
+for APPLICATION_CREATED, so applies never wait on the organization's row
+and the rollup trails them by the outbox's lag. Each call is one
+INSERT ... ON CONFLICT DO UPDATE adding to the day's counters, with rows in
+(organization_id, day) order so concurrent writers lock them in the same
+order. Job status edits lock the job row while reading the status
+they replace, so concurrent edits of one job count each transition once.
+app/scripts/rebuild_organization_stats.py recomputes the table from Job and
+Application.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.application import ApplicationStatus
+from app.models.organization_stats import OrganizationDailyStats
+from app.services.job_filters import OPEN
+
+STATUS_COLUMNS = {status: f"{status.value}_delta" for status in ApplicationStatus}
+COUNTER_COLUMNS = ("jobs_posted", "applications", "open_jobs_delta", *STATUS_COLUMNS.values())
+
+Changes = Mapping[int, Mapping[str, int]]
+
+def today() -> date:
+    return datetime.utcnow().date()
+
+def upsert_statement(dialect_name: str, rows: List[Dict]):
+    """
+    Add each row's counters to the existing (organization_id, day) row, or
+    insert it. Rows must have every counter column and distinct keys.
+    """
+    statement = dialect_insert(dialect_name, OrganizationDailyStats).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["organization_id", "day"],
+        set_={
+            column: getattr(OrganizationDailyStats, column) + statement.excluded[column]
+            for column in COUNTER_COLUMNS
+        },
+    )
+
+def rollup_rows(changes: Mapping[Tuple[int, date], Mapping[str, int]]) -> List[Dict]:
+    return [
+        {"organization_id": organization_id, "day": day,
+         **{column: counters.get(column, 0) for column in COUNTER_COLUMNS}}
+        for (organization_id, day), counters in sorted(changes.items())
+        if any(counters.values())
+    ]
+
+async def record(session: AsyncSession, changes: Changes, day: Optional[date] = None) -> None:
+    """
+    Add {organization_id: {column: amount}} to the organizations' rows for
+    `day` (today by default). The caller commits.
+    """
+    day = day or today()
+    rows = rollup_rows({(organization_id, day): counters for organization_id, counters in changes.items()})
+    if rows:
+        await session.exec(upsert_statement(session.bind.dialect.name, rows))
+
+async def count_application(session: AsyncSession, payload: Dict[str, Any]) -> None:
+    """
+    Outbox handler: count one new application on the day it was made.
+    """
+    # Events queued before applications were counted here carry no
+    # organization_id; the apply itself counted those.
+    if "organization_id" in payload:
+        await record(
+            session, {payload["organization_id"]: applications_received(1)},
+            date.fromisoformat(payload["applied_on"]),
+        )
+
+# Counter changes for one organization, by kind of write; add them up and
+# pass them to `record`.
+
+def jobs_posted(statuses: Iterable[str]) -> Counter:
+    """
+    New jobs with the given statuses.
+    """
+    statuses = list(statuses)
+    return Counter(jobs_posted=len(statuses), open_jobs_delta=sum(status == OPEN for status in statuses))
+
+def job_status_changed(transitions: Iterable[Tuple[str, str]]) -> Counter:
+    """
+    Existing jobs moving from one status to another, as (old, new) pairs.
+    """
+    return Counter(open_jobs_delta=sum((new == OPEN) - (old == OPEN) for old, new in transitions))
+
+def applications_received(count: int) -> Counter:
+    return Counter({"applications": count, STATUS_COLUMNS[ApplicationStatus.pending]: count})
+
+def applications_moved(moved: Mapping[ApplicationStatus, int], status: ApplicationStatus) -> Counter:
+    """
+    `moved[from_status]` applications each moving to `status`.
+    """
+    counters: Counter = Counter()
+    for from_status, count in moved.items():
+        counters[STATUS_COLUMNS[from_status]] -= count
+        counters[STATUS_COLUMNS[status]] += count
+    return counters
+
+async def organization_stats(session: AsyncSession, organization_id: int, days: int) -> Dict:
+    """
+    Current totals plus per-day postings and applications for the last
+    `days` days (today included, missing days as zeros).
+    """
+    totals = (await session.exec(
+        select(*(
+            func.coalesce(func.sum(getattr(OrganizationDailyStats, column)), 0)
+            for column in COUNTER_COLUMNS
+        ))
+        .where(OrganizationDailyStats.organization_id == organization_id)
+    )).one()
+    jobs, applications, open_jobs, *per_status = totals
+
+    start = today() - timedelta(days=days - 1)
+    recent = dict((await session.exec(
+        select(OrganizationDailyStats.day, OrganizationDailyStats)
+        .where(OrganizationDailyStats.organization_id == organization_id,
+               OrganizationDailyStats.day >= start)
+    )).all())
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = recent.get(day)
+        daily.append({
+            "day": day,
+            "jobs_posted": row.jobs_posted if row else 0,
+            "applications": row.applications if row else 0,
+        })
+    return {
+        "open_jobs": open_jobs,
+        "jobs_posted": jobs,
+        "applications": applications,
+        "applications_by_status": dict(zip(STATUS_COLUMNS, per_status)),
+        "daily": daily,
+    }
@@ -0,0 +1,187 @@
+"""
+Transactional outbox for side effects of writes.
+
+A write path records an OutboxEvent in the same transaction as the change
+itself (`enqueue`), so the event exists if and only if the change
+committed, and returns without running any of the follow-up work.
+`outbox_worker` drains the table in the background:
+
+- it claims a batch of due events with one UPDATE ... RETURNING (FOR
+  UPDATE SKIP LOCKED on Postgres, so workers in several processes never
+  claim the same rows), pushing their available_at out by a lease;
+- each event then runs its topic's handlers in its own transaction, which
+  also deletes the event, so a handler's database changes and the event's
+  acknowledgement commit together;
+- a failure rolls that transaction back and reschedules the event with
+  exponential back-off, until OUTBOX_MAX_ATTEMPTS marks it dead.
+
+Delivery is at least once: an event whose worker died mid-batch is claimed
+again when its lease runs out, and a failing event reruns every handler of
+its topic. Handlers must therefore be idempotent, or do all their work
+through the session they are given.
+
+Lag (age of the oldest due event at the last poll) and handled counts are
+exported through app.core.metrics.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.models.outbox import OutboxEvent
+from app.services.notifications import notify_organization
+from app.services.organization_stats import count_application
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+APPLICATION_CREATED = "application.created"
+
+HANDLERS: Dict[str, List[Handler]] = {
+    APPLICATION_CREATED: [notify_organization, count_application],
+}
+
+OUTBOX_EVENTS = metrics.register(metrics.Counter(
+    "outbox_events_total", "Outbox events handled, by topic and outcome.", ("topic", "outcome"),
+))
+OUTBOX_LAG = metrics.register(metrics.Gauge(
+    "outbox_lag_seconds", "Age of the oldest due outbox event at the last poll.", (),
+    lambda: [((), outbox_worker.lag_seconds)],
+))
+
+async def enqueue(session: AsyncSession, topic: str, payloads: Iterable[Dict[str, Any]]) -> None:
+    """
+    Record one event per payload in the session's transaction. The caller commits.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {"topic": topic, "payload": payload, "status": "pending",
+         "created_at": now, "available_at": now, "attempts": 0}
+        for payload in payloads
+    ]
+    if rows:
+        await session.exec(insert(OutboxEvent).values(rows))
+
+def backoff_seconds(attempts: int) -> float:
+    """
+    Delay before retry number `attempts`: doubling from OUTBOX_BACKOFF_SECONDS,
+    capped, with jitter so failed batches don't retry in lockstep.
+    """
+    delay = min(settings.OUTBOX_BACKOFF_MAX_SECONDS, settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+class OutboxWorker:
+    def __init__(self, handlers: Dict[str, List[Handler]], batch_size: int):
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.lag_seconds = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self) -> None:
+        """
+        Poll now rather than at the next interval; call after committing events.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                handled = await self.process_batch()
+            except Exception:
+                logger.exception("Outbox poll failed")
+                handled = 0
+            if handled < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.OUTBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def claim(self, session: AsyncSession) -> List[OutboxEvent]:
+        now = datetime.utcnow()
+        due = (
+            select(OutboxEvent.id)
+            .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.available_at, OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = (await session.exec(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due.scalar_subquery()))
+            .values(
+                available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+                attempts=OutboxEvent.attempts + 1,
+            )
+            .returning(OutboxEvent.id, OutboxEvent.topic, OutboxEvent.payload,
+                       OutboxEvent.created_at, OutboxEvent.attempts)
+        )).all()
+        await session.commit()
+        self.lag_seconds = max(((now - row.created_at).total_seconds() for row in claimed), default=0.0)
+        return [
+            OutboxEvent(id=row.id, topic=row.topic, payload=row.payload,
+                        created_at=row.created_at, attempts=row.attempts)
+            for row in sorted(claimed, key=lambda row: row.id)
+        ]
+
+    async def process_batch(self) -> int:
+        """
+        Claim and handle one batch of due events. Returns how many were claimed.
+        """
+        async with async_session_maker() as session:
+            events = await self.claim(session)
+        for event in events:
+            await self.handle(event)
+        return len(events)
+
+    async def handle(self, event: OutboxEvent) -> bool:
+        async with async_session_maker() as session:
+            try:
+                for handler in self.handlers.get(event.topic, ()):
+                    await handler(session, event.payload)
+                await session.exec(delete(OutboxEvent).where(OutboxEvent.id == event.id))
+                await session.commit()
+            except Exception as exc:
+                await session.rollback()
+                await self.fail(session, event, f"{type(exc).__name__}: {exc}"[:1000])
+                return False
+        OUTBOX_EVENTS.inc(event.topic, "handled")
+        return True
+
+    async def fail(self, session: AsyncSession, event: OutboxEvent, error: str) -> None:
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            values = {"status": "dead", "last_error": error}
+            logger.error("Outbox event %s (%s) gave up after %d attempts: %s",
+                         event.id, event.topic, event.attempts, error)
+            OUTBOX_EVENTS.inc(event.topic, "dead")
+        else:
+            retry_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(event.attempts))
+            values = {"available_at": retry_at, "last_error": error}
+            logger.warning("Outbox event %s (%s) failed, attempt %d: %s",
+                           event.id, event.topic, event.attempts, error)
+            OUTBOX_EVENTS.inc(event.topic, "failed")
+        await session.exec(update(OutboxEvent).where(OutboxEvent.id == event.id).values(**values))
+        await session.commit()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task, self._wakeup = None, None
+
+outbox_worker = OutboxWorker(HANDLERS, settings.OUTBOX_BATCH_SIZE)
@@ -0,0 +1,64 @@
+"""
+Ranked full-text job search, backed by the index in app/models/job_search.py.
+"""
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, column, func, literal_column, or_, table
+from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.models.job import Job
+from app.models.job_search import SEARCH_CONFIG
+
+_job_fts = table("job_fts", column("rowid"), column("rank"), column("job_fts"))
+
+def _sqlite_match_expression(q: str) -> Optional[str]:
+    # Quote every term so user input can't inject FTS5 query syntax.
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{term}"' for term in terms) or None
+
+def search_jobs_statement(
+    dialect_name: str,
+    q: str,
+    *,
+    status: Optional[str] = None,
+    department: Optional[str] = None,
+    organization_id: Optional[int] = None,
+    after: Optional[Tuple[float, int]] = None,
+    limit: int = 20,
+) -> Optional[SelectOfScalar]:
+    """
+    Select (Job, rank) rows matching `q`, best match first, ties broken by id.
+    Rank is "higher is better" on both backends. `after` is the (rank, id) of
+    the last row of the previous page. Returns None if `q` has no terms.
+    """
+    if dialect_name == "postgresql":
+        vector = literal_column("job.search_vector")
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        rank = func.ts_rank(vector, query)
+        statement = select(Job, rank.label("rank")).where(vector.op("@@")(query))
+    else:
+        # SQLite: app.core.database rejects every other backend at startup.
+        match = _sqlite_match_expression(q)
+        if match is None:
+            return None
+        rank = -_job_fts.c.rank  # bm25: lower is better
+        statement = (
+            select(Job, rank.label("rank"))
+            .join(_job_fts, _job_fts.c.rowid == Job.id)
+            .where(_job_fts.c.job_fts.op("MATCH")(match))
+        )
+
+    if status is not None:
+        statement = statement.where(Job.status == status)
+    if department is not None:
+        statement = statement.where(Job.department == department)
+    if organization_id is not None:
+        statement = statement.where(Job.organization_id == organization_id)
+    if after is not None:
+        after_rank, after_id = after
+        statement = statement.where(
+            or_(rank < after_rank, and_(rank == after_rank, Job.id < after_id))
+        )
+    return statement.order_by(rank.desc(), Job.id.desc()).limit(limit)
@@ -0,0 +1,143 @@
+"""
+Requests/sec for the async (AsyncSession) endpoints versus equivalent sync
+(threadpool + Session) handlers, driven in-process at high concurrency.
+
+    python -m benchmarks.bench_async_vs_sync --concurrency 500 --requests 5000
+
+Set DATABASE_URL to benchmark against Postgres; by default a temporary
+SQLite file is used.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+# Every request comes from one client address; measure the app, not the limiter.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from sqlmodel import Session, SQLModel, select
+
+from app.core import security
+from app.core.config import settings
+from app.core.database import async_engine, engine, get_session
+from app.main import app as async_app
+from app.models.job import Job
+from app.models.organization import Organization
+from app.models.user import User
+from app.schemas.job import JobRead
+from app.api.deps import reusable_oauth2
+
+PASSWORD = "benchmark-password"
+
+# Statement logging would dominate the measurement.
+engine.echo = False
+async_engine.echo = False
+
+# Sync reference handlers: the pre-async implementation of the same routes.
+sync_app = FastAPI()
+
+def _sync_current_user(
+    session: Session = Depends(get_session), token: str = Depends(reusable_oauth2)
+) -> User:
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+    user = session.get(User, int(payload["sub"]))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@sync_app.get(f"{settings.API_V1_STR}/users/jobs", response_model=list[JobRead])
+def sync_list_jobs(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(_sync_current_user),
+    skip: int = 0,
+    limit: int = 100,
+):
+    return session.exec(
+        select(Job).offset(skip).limit(limit)
+    ).all()
+
+@sync_app.post(f"{settings.API_V1_STR}/users/login")
+def sync_login(
+    session: Session = Depends(get_session),
+    form_data: OAuth2PasswordRequestForm = Depends(),
+):
+    user = session.exec(select(User).where(User.email == form_data.username)).first()
+    if not user or not security.verify_password(form_data.password, user.password_hash):
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    return {"access_token": security.create_access_token(user.id, role="user")}
+
+def seed(jobs: int) -> str:
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        org = Organization(
+            email="bench@corp.com", name="Bench Corp",
+            password_hash=security.get_password_hash(PASSWORD),
+        )
+        user = User(
+            email="bench@user.com", full_name="Bench User",
+            password_hash=security.get_password_hash(PASSWORD),
+        )
+        session.add(org)
+        session.add(user)
+        session.commit()
+        session.add_all(
+            Job(
+                title=f"Job {i}", description="Benchmark job",
+                requirements="None", organization_id=org.id,
+            )
+            for i in range(jobs)
+        )
+        session.commit()
+        return security.create_access_token(user.id, role="user")
+
+async def run(
+    app: FastAPI, method: str, path: str, concurrency: int, total: int, **kwargs
+) -> tuple[float, int]:
+    """
+    Issue `total` requests from `concurrency` workers; return (req/s, errors).
+    """
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    remaining = iter(range(total))
+    errors = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                response = await client.request(method, path, **kwargs)
+                errors += response.status_code >= 400
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start), errors
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--login-requests", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=100)
+    args = parser.parse_args()
+
+    token = seed(args.jobs)
+    headers = {"Authorization": f"Bearer {token}"}
+    login = {"username": "bench@user.com", "password": PASSWORD}
+    jobs_path = f"{settings.API_V1_STR}/users/jobs"
+    login_path = f"{settings.API_V1_STR}/users/login"
+
+    print(f"database={settings.DATABASE_URL} concurrency={args.concurrency}")
+    for label, app in (("sync", sync_app), ("async", async_app)):
+        rps, errors = await run(app, "GET", jobs_path, args.concurrency, args.requests, headers=headers)
+        print(f"{label:>5} list_jobs: {rps:10.1f} req/s  errors={errors}")
+        rps, errors = await run(app, "POST", login_path, args.concurrency, args.login_requests, data=login)
+        print(f"{label:>5} login:     {rps:10.1f} req/s  errors={errors}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
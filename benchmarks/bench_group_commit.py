@@ -0,0 +1,91 @@
+"""
+Apply throughput with one commit per request versus group commit
+(APPLY_GROUP_COMMIT), for a surge of distinct users applying to one job.
+
+    python -m benchmarks.bench_group_commit --requests 5000 --concurrency 500
+    python -m benchmarks.bench_group_commit --max-batch 100 --max-wait-ms 2,5,10
+
+Set DATABASE_URL to measure against Postgres, where the saved fsyncs are
+what group commit is for; by default a temporary SQLite file is used. The
+database is dropped and re-migrated first.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+# Every request comes from one client address; measure the app, not the limiter.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+from app.core import security
+from app.core.config import settings
+from app.core.database import engine
+from app.core.migrations import migrate, schema_version
+from app.main import app
+from app.models.job import Job
+from app.models.organization import Organization
+from app.models.user import User
+from app.services.apply_coalescer import apply_coalescer
+from benchmarks.bench_load import drive
+
+def seed(users: int, jobs: int) -> None:
+    SQLModel.metadata.drop_all(engine)
+    schema_version.drop(engine, checkfirst=True)
+    migrate(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Organization.__table__), [{
+            "email": "org@bench-mail.com", "name": "Org", "password_hash": "x", "created_at": now,
+        }])
+        conn.execute(insert(User.__table__), [
+            {"email": f"user{i}@bench-mail.com", "full_name": f"User {i}", "password_hash": "x",
+             "date_registered": now, "is_verified": False}
+            for i in range(users)
+        ])
+        conn.execute(insert(Job.__table__), [
+            {"title": f"Popular job {i}", "description": "d", "requirements": "r", "status": "Open",
+             "date_posted": now, "organization_id": 1, "application_count": 0}
+            for i in range(jobs)
+        ])
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--max-batch", type=int, default=settings.APPLY_GROUP_COMMIT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", default=str(settings.APPLY_GROUP_COMMIT_MAX_WAIT_MS),
+                        help="comma-separated; one group commit run per value")
+    args = parser.parse_args()
+    waits = [float(wait) for wait in args.max_wait_ms.split(",")]
+
+    # One fresh job per run, so every request in a run is a new application.
+    seed(args.requests, 1 + len(waits))
+    tokens = [security.create_access_token(id, role="user") for id in range(1, args.requests + 1)]
+
+    def factory(job_id: int):
+        def request(i: int):
+            return "POST", f"{settings.API_V1_STR}/users/apply/{job_id}", {
+                "headers": {"Authorization": f"Bearer {tokens[i]}"}
+            }
+        return request
+
+    print(f"database={engine.dialect.name} requests={args.requests} concurrency={args.concurrency}")
+    runs = [("per-request commit", None)] + [(f"group commit {wait:g}ms/{args.max_batch}", wait) for wait in waits]
+    for job_id, (label, wait) in enumerate(runs, start=1):
+        settings.APPLY_GROUP_COMMIT = wait is not None
+        if wait is not None:
+            apply_coalescer.max_batch, apply_coalescer.max_wait = args.max_batch, wait / 1000
+        result = await drive(app, factory(job_id), range(args.requests), args.concurrency)
+        print(
+            f"{label:>28}: {result['rps']:9.1f} req/s  p50={result['p50_ms']:8.2f}ms  "
+            f"p99={result['p99_ms']:8.2f}ms  errors={result['errors']}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
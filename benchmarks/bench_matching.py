@@ -0,0 +1,65 @@
+"""
+Top-k latency of the matching engine on synthetic profiles, without a database.
+
+    python -m benchmarks.bench_matching --users 1000000 --jobs 100000
+"""
+import argparse
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from app.services.matching import MatchingEngine
+
+WORDS = [f"skill{i}" for i in range(5000)]
+
+def phrase(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(WORDS, k=n))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    jobs = [
+        SimpleNamespace(
+            id=i, title=phrase(rng, 3), department=None, requirements=phrase(rng, 8),
+            description=phrase(rng, 20), min_age=rng.choice([None, 18, 21]),
+            max_age=rng.choice([None, 40, 60]), status="Open", updated_at=None,
+        )
+        for i in range(1, args.jobs + 1)
+    ]
+    users = [
+        SimpleNamespace(
+            id=i, desired_job=phrase(rng, 3), qualification=phrase(rng, 5),
+            age=rng.randint(18, 65), date_of_birth=None, updated_at=None,
+        )
+        for i in range(1, args.users + 1)
+    ]
+
+    engine = MatchingEngine()
+    start = time.perf_counter()
+    engine._ingest(jobs, users)
+    print(f"indexed {args.jobs} jobs x {args.users} users in {time.perf_counter() - start:.1f}s")
+
+    for label, query, items in (
+        ("recommend_jobs", engine.recommend_jobs, users),
+        ("rank_candidates", engine.rank_candidates, jobs),
+    ):
+        timings = []
+        for item in rng.sample(items, args.queries):
+            start = time.perf_counter()
+            query(item, args.k)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"{label:>15}: p50={statistics.median(timings):.2f}ms "
+            f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
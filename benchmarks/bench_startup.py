@@ -0,0 +1,101 @@
+"""
+Cold-start cost of a worker: time to import app.main, and time from
+launching uvicorn to the first successful response.
+
+    python -m benchmarks.bench_startup --runs 5 --output benchmarks/startup.jsonl
+
+Each run is a fresh interpreter. With --output, one JSON line per invocation
+(commit, medians) is appended so the numbers can be tracked over time.
+Set DATABASE_URL to measure against Postgres; by default a temporary SQLite
+file is migrated and used.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def import_seconds(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def first_request_seconds(env: dict, timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited: {server.stderr.read().decode()[-2000:]}")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                connection.request("GET", "/")
+                if connection.getresponse().status == 200:
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"no response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="append a JSON summary line to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    subprocess.run([sys.executable, "-m", "app.scripts.migrate"], env=env, check=True, capture_output=True)
+
+    imports = [import_seconds(env) * 1000 for _ in range(args.runs)]
+    firsts = [first_request_seconds(env, args.timeout) * 1000 for _ in range(args.runs)]
+    summary = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_ms": round(statistics.median(imports), 1),
+        "first_request_ms": round(statistics.median(firsts), 1),
+    }
+    print(
+        f"import app.main: p50={summary['import_ms']:.0f}ms min={min(imports):.0f}ms\n"
+        f"  first request: p50={summary['first_request_ms']:.0f}ms min={min(firsts):.0f}ms"
+    )
+    if args.output:
+        with open(args.output, "a") as output:
+            output.write(json.dumps(summary) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite file (served through aiosqlite) and a
+# scratch upload directory. This has to happen before app.core.config is
+# imported, since settings are read once at import time.
+_tmp_dir = tempfile.mkdtemp(prefix="hiring_system_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp_dir, "uploads")
+# Cheap Argon2 parameters keep the suite fast.
+os.environ["ARGON2_TIME_COST"] = "1"
+os.environ["ARGON2_MEMORY_COST"] = "8192"
+os.environ["ARGON2_PARALLELISM"] = "1"
+
+import pytest
+from sqlmodel import Session, SQLModel
+
+from app.api import rate_limits
+from app.api.deps import principal_cache
+from app.api.response_cache import job_page_cache
+from app.core import security
+from app.core.database import engine
+from app.models.organization import Organization
+from app.models.user import User
+from app.services.matching import matching_engine
+
+@pytest.fixture(name="session")
+def session_fixture():
+    principal_cache.clear()
+    job_page_cache.backend.entries.clear()
+    rate_limits.backend.reset()
+    matching_engine.reset()
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+def bearer(account_id: int, role: str) -> dict:
+    return {"Authorization": f"Bearer {security.create_access_token(account_id, role=role)}"}
+
+@pytest.fixture(name="auth_headers")
+def auth_headers_fixture():
+    """
+    bearer(account_id, role), for tests that need headers for accounts of their own.
+    """
+    return bearer
+
+@pytest.fixture(name="org")
+def org_fixture(session) -> Organization:
+    org = Organization(email="org@corp.com", password_hash="x", name="Corp")
+    session.add(org)
+    session.commit()
+    return org
+
+@pytest.fixture(name="user")
+def user_fixture(session) -> User:
+    user = User(email="user@x.com", password_hash="x", full_name="User")
+    session.add(user)
+    session.commit()
+    return user
+
+@pytest.fixture(name="org_headers")
+def org_headers_fixture(org) -> dict:
+    return bearer(org.id, "organization")
+
+@pytest.fixture(name="user_headers")
+def user_headers_fixture(user) -> dict:
+    return bearer(user.id, "user")
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.database import async_engine
+from app.main import app
+from app.models.application import Application
+from app.models.job import Job
+from app.models.user import User
+
+client = TestClient(app)
+
+def seed(session, org, count):
+    job = Job(title="Engineer", description="d", requirements="r", organization_id=org.id)
+    session.add(job)
+    session.commit()
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        user = User(email=f"user{i}@x.com", password_hash="x", full_name=f"User {i}")
+        session.add(user)
+        session.commit()
+        session.add(Application(
+            user_id=user.id, job_id=job.id, applied_at=start + timedelta(days=i),
+            status="accepted" if i % 2 else "pending",
+        ))
+    session.commit()
+    return job
+
+def test_application_pages_cost_a_fixed_number_of_queries(session, org, org_headers):
+    job = seed(session, org, 5)
+    client.get("/api/v1/organizations/jobs", headers=org_headers)  # warm the principal cache
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        names, costs, cursor = [], [], None
+        while True:
+            statements.clear()
+            response = client.get(
+                f"/api/v1/organizations/jobs/{job.id}/applications",
+                params={"limit": 2, **({"cursor": cursor} if cursor else {})},
+                headers=org_headers,
+            )
+            assert response.status_code == 200
+            costs.append(len(statements))
+            names += [application["applicant"]["full_name"] for application in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert names == [f"User {i}" for i in reversed(range(5))]
+    assert costs == [2, 2, 2]  # ownership check + one joined page query
+
+    response = client.get(
+        f"/api/v1/organizations/jobs/{job.id}/applications", params={"status": "accepted"}, headers=org_headers
+    )
+    assert [application["applicant"]["full_name"] for application in response.json()] == ["User 3", "User 1"]
+
+def test_export_streams_ndjson_and_csv(session, org, org_headers):
+    job = seed(session, org, 3)
+    user = session.get(User, 1)
+    user.full_name = "=HYPERLINK(\"http://evil\")"
+    session.add(user)
+    session.commit()
+    url = f"/api/v1/organizations/jobs/{job.id}/applications/export"
+
+    response = client.get(url, headers=org_headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["email"] for row in rows] == ["user2@x.com", "user1@x.com", "user0@x.com"]
+    assert rows[0]["applied_at"] == "2024-01-03T00:00:00"
+
+    response = client.get(url, params={"format": "csv", "status": "pending"}, headers=org_headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["email"] for row in rows] == ["user2@x.com", "user0@x.com"]
+    assert rows[1]["full_name"].startswith("'=")
+
+    assert client.get(url, params={"format": "xml"}, headers=org_headers).status_code == 422
+
+def test_bulk_status_transition(session, org, org_headers):
+    job = seed(session, org, 5)  # ids 1..5; odd positions (ids 2, 4) accepted
+    url = f"/api/v1/organizations/jobs/{job.id}/applications/status"
+
+    response = client.post(
+        url, json={"status": "rejected", "from_status": ["pending"], "exclude_ids": [1]}, headers=org_headers
+    )
+    assert response.json() == {"updated": 2, "counts": {"pending": 1, "accepted": 2, "rejected": 2}}
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        # Pending and rejected rows move in one statement.
+        response = client.post(
+            url, json={"status": "accepted", "application_ids": [1, 2, 3, 999]}, headers=org_headers
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert response.json() == {"updated": 2, "counts": {"pending": 0, "accepted": 4, "rejected": 1}}
+    assert len([statement for statement in statements if "UPDATE application" in statement]) == 1
+
+    assert client.post(url, json={"status": "hired"}, headers=org_headers).status_code == 422
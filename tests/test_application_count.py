@@ -0,0 +1,22 @@
+from app.core.database import engine
+from app.models.application import Application
+from app.models.job import Job
+from app.models.user import User
+from app.scripts.backfill_application_count import backfill_application_count
+
+def test_backfill_recomputes_counts(session, org):
+    users = [User(email=f"u{i}@x.com", password_hash="x", full_name=f"U{i}") for i in range(3)]
+    session.add_all(users)
+    session.commit()
+    busy = Job(title="Busy", description="d", requirements="r", organization_id=org.id)
+    quiet = Job(title="Quiet", description="d", requirements="r", organization_id=org.id)
+    session.add_all([busy, quiet])
+    session.commit()
+    session.add_all(Application(user_id=user.id, job_id=busy.id) for user in users)
+    session.commit()
+
+    assert backfill_application_count(engine) == 2
+
+    session.expire_all()
+    assert session.get(Job, busy.id).application_count == 3
+    assert session.get(Job, quiet.id).application_count == 0
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import check_database_url
+from app.main import app
+from app.models.job import Job
+
+client = TestClient(app)
+
+def test_bulk_apply_reports_each_job(session, org, user_headers):
+    jobs = [Job(title=f"Job {i}", description="d", requirements="r", organization_id=org.id) for i in range(3)]
+    session.add_all(jobs)
+    session.commit()
+    first, second, third = (job.id for job in jobs)
+
+    response = client.post(f"/api/v1/users/apply/{first}", headers=user_headers)
+    assert response.status_code == 200
+
+    response = client.post(
+        "/api/v1/users/apply",
+        json={"job_ids": [first, second, third, second, 9999]},
+        headers=user_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["applied"]) == {str(second), str(third)}
+    assert body["already_applied"] == [first]
+    assert body["not_found"] == [9999]
+
+    response = client.post("/api/v1/users/apply/9999", headers=user_headers)
+    assert response.status_code == 404
+
+    session.expire_all()
+    assert [session.get(Job, job.id).application_count for job in jobs] == [1, 1, 1]
+
+def test_unsupported_databases_are_rejected_up_front():
+    assert check_database_url("sqlite:///./app.db") == "sqlite:///./app.db"
+    assert check_database_url("postgresql+psycopg://u:p@db/app")
+    with pytest.raises(ValueError, match="'mysql'"):
+        check_database_url("mysql+pymysql://u:p@db/app")
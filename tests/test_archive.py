@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.core.database import engine
+from app.main import app
+from app.models.application import Application
+from app.models.archive import ArchivedApplication, ArchivedJob
+from app.models.job import Job
+from app.models.organization import Organization
+from app.models.user import User
+from app.scripts.archive_cold_data import archive_cold_data
+
+client = TestClient(app)
+
+def test_cold_rows_move_to_the_archive_and_stay_readable(session, org, org_headers, auth_headers, tmp_path):
+    users = [User(email=f"user{i}@x.com", password_hash="x", full_name="User") for i in range(3)]
+    users[0].cv_path = str(tmp_path / "cv.pdf")
+    (tmp_path / "cv.pdf").write_bytes(b"resume")
+    session.add_all(users)
+    session.commit()
+    now = datetime.utcnow()
+    open_job = Job(title="Open", description="d", requirements="r", organization_id=org.id,
+                   date_posted=now - timedelta(days=1))
+    closed_job = Job(title="Closed", description="d", requirements="r", organization_id=org.id,
+                     status="Closed", date_posted=now - timedelta(days=2))
+    session.add_all([open_job, closed_job])
+    session.commit()
+    session.add_all([
+        Application(user_id=users[0].id, job_id=open_job.id, applied_at=now - timedelta(days=1000)),
+        Application(user_id=users[1].id, job_id=open_job.id, applied_at=now),
+        Application(user_id=users[0].id, job_id=closed_job.id, applied_at=now),
+        Application(user_id=users[2].id, job_id=closed_job.id, applied_at=now),
+    ])
+    session.commit()
+    open_job_id, closed_job_id = open_job.id, closed_job.id
+    user_ids = [user.id for user in users]
+    user_headers = auth_headers(user_ids[0], "user")
+    board = lambda: [job["title"] for job in client.get(
+        "/api/v1/users/jobs", params={"eligible": False}, headers=user_headers
+    ).json()]
+    assert board() == ["Open", "Closed"]
+
+    assert archive_cold_data(engine, batch_size=1) == (3, 1)
+    assert board() == ["Open"]
+    assert archive_cold_data(engine) == (0, 0)
+    assert [a.user_id for a in session.exec(select(Application))] == [user_ids[1]]
+    assert len(session.exec(select(ArchivedApplication)).all()) == 3
+    assert session.exec(select(Job.title)).all() == ["Open"]
+    assert session.exec(select(ArchivedJob.title)).all() == ["Closed"]
+
+    response = client.post(f"/api/v1/users/apply/{open_job_id}", headers=user_headers)
+    assert response.status_code == 400
+    response = client.post(f"/api/v1/users/apply/{closed_job_id}", headers=user_headers)
+    assert response.status_code == 404
+
+    jobs = client.get("/api/v1/organizations/jobs", headers=org_headers).json()
+    assert [job["title"] for job in jobs] == ["Open"]
+    first = client.get(
+        "/api/v1/organizations/jobs", params={"include_archived": True, "limit": 1}, headers=org_headers
+    )
+    rest = client.get(
+        "/api/v1/organizations/jobs", headers=org_headers,
+        params={"include_archived": True, "cursor": first.headers["X-Next-Cursor"]},
+    )
+    assert [job["title"] for job in first.json() + rest.json()] == ["Open", "Closed"]
+
+    url = f"/api/v1/organizations/jobs/{open_job_id}/applications"
+    assert len(client.get(url, headers=org_headers).json()) == 1
+    listed = client.get(url, params={"include_archived": True}, headers=org_headers).json()
+    assert [a["applicant"]["id"] for a in listed] == [user_ids[1], user_ids[0]]
+    url = f"/api/v1/organizations/applications/{listed[1]['id']}/cv"
+    assert client.get(url, headers=org_headers).status_code == 404
+    response = client.get(url, params={"include_archived": True}, headers=org_headers)
+    assert response.status_code == 200 and response.content == b"resume"
+    other = Organization(email="other@corp.com", password_hash="x", name="Other")
+    session.add(other)
+    session.commit()
+    response = client.get(url, params={"include_archived": True}, headers=auth_headers(other.id, "organization"))
+    assert response.status_code == 403
+    url = f"/api/v1/organizations/jobs/{closed_job_id}/applications"
+    assert client.get(url, headers=org_headers).status_code == 404
+    assert len(client.get(url, params={"include_archived": True}, headers=org_headers).json()) == 2
+
+def test_archived_ids_are_not_reused(session, org, org_headers, user_headers):
+    job = Job(title="Newest", description="d", requirements="r", organization_id=org.id, status="Closed")
+    session.add(job)
+    session.commit()
+    archived_id = job.id
+    assert archive_cold_data(engine) == (0, 1)
+
+    response = client.post(
+        "/api/v1/organizations/jobs", headers=org_headers,
+        json={"title": "Next", "description": "d", "requirements": "r"},
+    )
+    assert response.json()["id"] > archived_id
+    response = client.post(f"/api/v1/users/apply/{response.json()['id']}", headers=user_headers)
+    assert response.status_code == 200
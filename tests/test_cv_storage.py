@@ -0,0 +1,78 @@
+import io
+import zipfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.models.application import Application
+from app.models.job import Job
+from app.models.user import User
+
+client = TestClient(app)
+
+def make_user(session, auth_headers, email):
+    user = User(email=email, password_hash="x", full_name=email)
+    session.add(user)
+    session.commit()
+    return auth_headers(user.id, "user")
+
+def upload(headers, content, filename="cv.pdf"):
+    files = {"file": (filename, content, "application/pdf")}
+    return client.post("/api/v1/users/upload-cv", files=files, headers=headers)
+
+def test_identical_cvs_are_stored_once_and_replaced_blobs_collected(session, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "CV_BLOB_GC_GRACE_SECONDS", -1)
+    alice, bob = make_user(session, auth_headers, "alice@x.com"), make_user(session, auth_headers, "bob@x.com")
+
+    first = upload(alice, b"shared resume").json()["cv_path"]
+    assert upload(bob, b"shared resume", filename="bob.pdf").json()["cv_path"] == first
+
+    # Bob still references the old blob, so Alice replacing hers keeps it.
+    second = upload(alice, b"new resume").json()["cv_path"]
+    assert second != first and Path(first).exists()
+
+    upload(bob, b"other resume")
+    assert not Path(first).exists()
+    assert Path(second).read_bytes() == b"new resume"
+    assert not any((Path(settings.UPLOAD_DIR) / "blobs" / "tmp").iterdir())
+
+def test_upload_limits(session, auth_headers, monkeypatch):
+    headers = make_user(session, auth_headers, "carol@x.com")
+    monkeypatch.setattr(settings, "CV_MAX_BYTES", 1024)
+    assert upload(headers, b"x" * 2048).status_code == 413
+    assert upload(headers, b"x" * 512).status_code == 200
+
+    response = client.post("/api/v1/users/upload-cv", data={"note": "no file"}, headers=headers)
+    assert response.status_code == 400
+
+def test_cv_downloads_are_conditional_ranged_and_zippable(session, auth_headers, org, org_headers):
+    job = Job(title="Engineer", description="d", requirements="r", organization_id=org.id)
+    session.add(job)
+    session.commit()
+
+    application_ids = []
+    for email, content in [("dan@x.com", b"dan resume"), ("eve@x.com", b"eve resume")]:
+        headers = make_user(session, auth_headers, email)
+        upload(headers, content)
+        application_ids.append(client.post(f"/api/v1/users/apply/{job.id}", headers=headers).json()["application_id"])
+
+    url = f"/api/v1/organizations/applications/{application_ids[0]}/cv"
+    response = client.get(url, headers=org_headers)
+    assert response.status_code == 200 and response.content == b"dan resume"
+    etag = response.headers["etag"]
+
+    response = client.get(url, headers={**org_headers, "If-None-Match": etag})
+    assert response.status_code == 304 and response.headers["etag"] == etag
+
+    response = client.get(url, headers={**org_headers, "Range": "bytes=4-9"})
+    assert response.status_code == 206 and response.content == b"resume"
+
+    response = client.get(f"/api/v1/organizations/jobs/{job.id}/cvs.zip", headers=org_headers)
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert {name: archive.read(name) for name in archive.namelist()} == {
+        f"application_{application_ids[0]}.pdf": b"dan resume",
+        f"application_{application_ids[1]}.pdf": b"eve resume",
+    }
@@ -0,0 +1,130 @@
+import asyncio
+import io
+import zipfile
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.database import async_session_maker
+from app.main import app
+from app.models.cv_document import CvDocument
+from app.models.job import Job
+from app.models.user import User
+from app.services.cv_text import CvExtractor, claim_documents, cv_extractor
+
+client = TestClient(app)
+
+def docx(*paragraphs):
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{body}</w:body></w:document>",
+        )
+    return buffer.getvalue()
+
+def pdf(text):
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def test_cvs_are_extracted_once_and_keyword_searchable(session, auth_headers, org, org_headers):
+    job = Job(title="Engineer", description="d", requirements="r", organization_id=org.id)
+    session.add(job)
+    session.commit()
+
+    cvs = {
+        "ann@x.com": ("ann.docx", docx("Senior Python developer", "PostgreSQL, Django")),
+        "ben@x.com": ("ben.pdf", pdf("Python and C++ engineer")),
+        "cat@x.com": ("cat.txt", b"python python python"),
+    }
+    applications, statuses = {}, {}
+    for email, (filename, content) in cvs.items():
+        user = User(email=email, password_hash="x", full_name=email)
+        session.add(user)
+        session.commit()
+        headers = auth_headers(user.id, "user")
+        uploaded = client.post("/api/v1/users/upload-cv", files={"file": (filename, content)}, headers=headers).json()
+        assert uploaded["cv_text_status"] == "pending"
+        applications[email] = client.post(f"/api/v1/users/apply/{job.id}", headers=headers).json()["application_id"]
+
+        session.refresh(user)
+        statuses[email] = asyncio.run(cv_extractor.process(user.cv_sha256))
+
+    asyncio.run(cv_extractor.stop())
+    assert statuses == {"ann@x.com": "done", "ben@x.com": "done", "cat@x.com": "unsupported"}
+
+    # Cat switches to a copy of Ann's CV: the stored result is reused.
+    headers = auth_headers(user.id, "user")
+    again = client.post("/api/v1/users/upload-cv", files={"file": ("ann2.docx", cvs["ann@x.com"][1])}, headers=headers)
+    assert again.json()["cv_text_status"] == "done"
+
+    def search(q):
+        response = client.get(
+            f"/api/v1/organizations/jobs/{job.id}/applicants/search", params={"q": q}, headers=org_headers
+        )
+        assert response.status_code == 200
+        return sorted(match["application_id"] for match in response.json())
+
+    assert search("python") == sorted([applications["ann@x.com"], applications["ben@x.com"], applications["cat@x.com"]])
+    assert search("Python django") == sorted([applications["ann@x.com"], applications["cat@x.com"]])
+    assert search("c++") == [applications["ben@x.com"]]
+    assert search("cobol") == []
+
+async def claim(limit, sha256=None):
+    async with async_session_maker() as session:
+        return await claim_documents(session, limit, sha256)
+
+def test_pending_documents_are_claimed_once_and_swept(session, user, user_headers):
+    session.add_all([
+        CvDocument(sha256="a" * 64, path="/missing/a", status="pending"),
+        CvDocument(sha256="b" * 64, path="/missing/b", status="done"),
+    ])
+    session.commit()
+    assert asyncio.run(claim(10)) == [("a" * 64, "/missing/a")]
+    assert asyncio.run(claim(10)) == []
+    assert asyncio.run(CvExtractor(1, 8).process("a" * 64)) is None
+
+    # Its process died: once the lease runs out another one claims it.
+    document = session.get(CvDocument, "a" * 64)
+    assert document.status == "processing"
+    document.lease_until = datetime.utcnow() - timedelta(seconds=1)
+    session.add(document)
+    session.commit()
+    assert asyncio.run(claim(10, "a" * 64)) == [("a" * 64, "/missing/a")]
+
+    # A running extractor's sweep picks up uploads without being handed them.
+    files = {"file": ("cv.docx", docx("Rust developer"))}
+    assert client.post("/api/v1/users/upload-cv", files=files, headers=user_headers).status_code == 200
+    session.refresh(user)
+    sha256 = user.cv_sha256
+    async def sweep():
+        extractor = CvExtractor(1, 8)
+        await extractor.start()
+        try:
+            for _ in range(200):
+                async with async_session_maker() as async_session:
+                    status = (await async_session.get(CvDocument, sha256)).status
+                if status == "done":
+                    return status
+                await asyncio.sleep(0.05)
+        finally:
+            await extractor.stop()
+    assert asyncio.run(sweep()) == "done"
@@ -1,40 +1,20 @@
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
 import pytest
 from app.main import app
-from app.core.database import get_session
 from app.models.user import User
 from app.models.organization import Organization
 from app.models.job import Job
 from app.models.application import Application
 import io
 
-# Setup in-memory database for testing
-engine = create_engine(
-    "sqlite://", 
-    connect_args={"check_same_thread": False}, 
-    poolclass=StaticPool
-)
-
-def create_test_db():
-    print(f"Creating tables. Metadata tables: {SQLModel.metadata.tables.keys()}")
-    SQLModel.metadata.create_all(engine)
-
-def get_test_session():
-    with Session(engine) as session:
-        yield session
-
-app.dependency_overrides[get_session] = get_test_session
-
+# The app's engines point at a temporary SQLite file (see conftest.py);
+# the async endpoints reach it through aiosqlite.
 client = TestClient(app)
 
-@pytest.fixture(name="session", autouse=True)
-def session_fixture():
-    create_test_db()
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
+@pytest.fixture(autouse=True)
+def fresh_database(session):
+    # conftest's `session` fixture creates the tables and resets in-process caches.
+    yield
 
 def test_full_hiring_flow():
     # 1. Register Organization
@@ -103,7 +83,8 @@ def test_full_hiring_flow():
     response = client.post("/api/v1/users/upload-cv", files=files, headers=user_headers)
     assert response.status_code == 200
     assert response.json()["is_verified"] == True
-    assert "cv.pdf" in response.json()["cv_path"]
+    assert response.json()["cv_filename"] == "cv.pdf"
+    assert response.json()["cv_path"].endswith(".pdf")
 
     # 8. Apply for Job
     response = client.post(f"/api/v1/users/apply/{job_id}", headers=user_headers)
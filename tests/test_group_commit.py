@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.main import app
+from app.models.application import Application
+from app.models.job import Job
+from app.models.outbox import OutboxEvent
+from app.models.user import User
+from app.services.apply_coalescer import ApplyCoalescer
+
+def seed(session, org, users):
+    job = Job(title="Engineer", description="d", requirements="r", organization_id=org.id)
+    session.add(job)
+    session.add_all(User(email=f"user{i}@x.com", password_hash="x", full_name=f"User {i}") for i in range(users))
+    session.commit()
+    return job.id, [user.id for user in session.exec(select(User).order_by(User.id))]
+
+def test_concurrent_applies_share_one_insert(session, org):
+    job_id, user_ids = seed(session, org, 4)
+    coalescer = ApplyCoalescer(max_batch=100, max_wait_ms=20)
+    inserts = []
+    def listener(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO application"):
+            inserts.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+
+    async def surge():
+        return await asyncio.gather(
+            *(coalescer.apply(user_id, job_id) for user_id in user_ids),
+            coalescer.apply(user_ids[0], job_id),
+            coalescer.apply(user_ids[1], 999),
+        )
+    try:
+        results = asyncio.run(surge())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+
+    assert len(inserts) == 1
+    applications = dict(session.exec(select(Application.user_id, Application.id)).all())
+    assert results == [applications[user_id] for user_id in user_ids] + [None, None]
+    assert session.get(Job, job_id).application_count == 4
+    assert len(session.exec(select(OutboxEvent)).all()) == 4
+
+def test_apply_endpoint_in_group_commit_mode(session, org, auth_headers, monkeypatch):
+    job_id, (user_id,) = seed(session, org, 1)
+    monkeypatch.setattr(settings, "APPLY_GROUP_COMMIT", True)
+    client = TestClient(app)
+    headers = auth_headers(user_id, "user")
+
+    response = client.post(f"/api/v1/users/apply/{job_id}", headers=headers)
+    assert response.status_code == 200
+    assert session.get(Application, response.json()["application_id"]).user_id == user_id
+    assert client.post(f"/api/v1/users/apply/{job_id}", headers=headers).status_code == 400
+    assert client.post("/api/v1/users/apply/999", headers=headers).status_code == 404
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.hashing import HashingBusyError, HashingExecutor
+from app.main import app
+from app.models.user import User
+
+client = TestClient(app)
+
+def test_executor_fails_fast_when_saturated():
+    executor = HashingExecutor(workers=1, queue_size=0)
+
+    async def scenario():
+        slow = asyncio.ensure_future(executor.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(HashingBusyError):
+            await executor.run(time.sleep, 0)
+        await slow
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+def test_login_rehashes_outdated_password(session):
+    old_context = CryptContext(schemes=["argon2"], argon2__memory_cost=4096, argon2__time_cost=1)
+    user = User(email="old@x.com", full_name="Old", password_hash=old_context.hash("secret"))
+    session.add(user)
+    session.commit()
+    assert security.get_pwd_context().needs_update(user.password_hash)
+
+    response = client.post("/api/v1/users/login", data={"username": "old@x.com", "password": "secret"})
+    assert response.status_code == 200
+
+    session.refresh(user)
+    assert not security.get_pwd_context().needs_update(user.password_hash)
+    assert security.verify_password("secret", user.password_hash)
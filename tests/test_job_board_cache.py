@@ -0,0 +1,91 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api.response_cache import JobPageCache
+from app.core.cache import MemoryCacheBackend
+from app.core.database import async_engine
+from app.main import app
+from app.models.job import Job
+from app.services.job_filters import JobFilters
+
+client = TestClient(app)
+
+def seed(session, org, count):
+    for i in range(count):
+        session.add(Job(title=f"Job {i}", description="d", requirements="r", organization_id=org.id))
+        session.commit()
+
+def test_pages_are_cached_and_revalidated_with_etags(session, org, user_headers):
+    seed(session, org, 3)
+    first = client.get("/api/v1/users/jobs", params={"limit": 2}, headers=user_headers)
+    assert first.status_code == 200
+    assert len(first.json()) == 2 and first.headers["X-Next-Cursor"]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        again = client.get("/api/v1/users/jobs", params={"limit": 2}, headers=user_headers)
+        revalidated = client.get(
+            "/api/v1/users/jobs", params={"limit": 2},
+            headers={**user_headers, "If-None-Match": first.headers["ETag"]},
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert statements == []
+    assert again.content == first.content
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert again.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert revalidated.status_code == 304 and revalidated.content == b""
+
+def test_writes_invalidate_only_the_pages_they_affect(session, org, org_headers, user_headers):
+    seed(session, org, 3)
+    head = client.get("/api/v1/users/jobs", params={"limit": 2}, headers=user_headers)
+    cursor = head.headers["X-Next-Cursor"]
+    tail = client.get("/api/v1/users/jobs", params={"limit": 2, "cursor": cursor}, headers=user_headers)
+    oldest = tail.json()[0]
+
+    created = client.post(
+        "/api/v1/organizations/jobs", headers=org_headers,
+        json={"title": "Newest", "description": "d", "requirements": "r"},
+    )
+    assert created.status_code == 200
+    new_head = client.get("/api/v1/users/jobs", params={"limit": 2}, headers=user_headers)
+    assert new_head.headers["ETag"] != head.headers["ETag"]
+    assert new_head.json()[0]["title"] == "Newest"
+    unchanged = client.get(
+        "/api/v1/users/jobs", params={"limit": 2, "cursor": cursor},
+        headers={**user_headers, "If-None-Match": tail.headers["ETag"]},
+    )
+    assert unchanged.status_code == 304
+
+    updated = client.patch(
+        f"/api/v1/organizations/jobs/{oldest['id']}", headers=org_headers, json={"title": "Renamed"}
+    )
+    assert updated.status_code == 200
+    tail_after = client.get("/api/v1/users/jobs", params={"limit": 2, "cursor": cursor}, headers=user_headers)
+    assert tail_after.json()[0]["title"] == "Renamed"
+    head_after = client.get(
+        "/api/v1/users/jobs", params={"limit": 2},
+        headers={**user_headers, "If-None-Match": new_head.headers["ETag"]},
+    )
+    assert head_after.status_code == 304
+
+def test_pages_queried_across_a_write_are_not_cached():
+    cache = JobPageCache(MemoryCacheBackend(maxsize=10, ttl=60), ttl=60)
+    key = cache.key(JobFilters(), cursor=None, skip=0, limit=10)
+    jobs = [Job(id=1, title="Job", description="d", requirements="r", organization_id=1)]
+
+    async def race(write):
+        generation = await cache.snapshot()
+        # The page query runs here; the write commits and bumps meanwhile.
+        await write()
+        await cache.store(key, jobs, limit=10, head=True, generation=generation)
+        return await cache.get(key)
+
+    assert asyncio.run(race(lambda: cache.jobs_changed([1]))) is None
+    assert asyncio.run(race(cache.jobs_created)) is None
+    assert asyncio.run(race(lambda: cache.jobs_changed([2]))) is None
+    assert asyncio.run(race(lambda: asyncio.sleep(0))) is not None
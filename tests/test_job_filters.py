@@ -0,0 +1,89 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.database import async_engine
+from app.main import app
+from app.models.job import Job
+from app.models.organization import Organization
+from app.models.user import User
+
+client = TestClient(app)
+
+def seed(session, auth_headers):
+    tech = Organization(email="tech@corp.com", password_hash="x", name="Tech", industry="Software")
+    bank = Organization(email="bank@corp.com", password_hash="x", name="Bank", industry="Finance")
+    user = User(email="user@x.com", password_hash="x", full_name="User", age=30)
+    session.add_all([tech, bank, user])
+    session.commit()
+    jobs = [
+        Job(title="Backend", department="Engineering", organization_id=tech.id, min_age=21, max_age=40),
+        Job(title="Frontend", department="Engineering", organization_id=tech.id, min_age=18),
+        Job(title="Graduate", department="Engineering", organization_id=tech.id, max_age=25),
+        Job(title="Analyst", department="Risk", organization_id=bank.id),
+        Job(title="Teller", department="Branch", organization_id=bank.id, status="Closed"),
+    ]
+    for job in jobs:
+        job.description, job.requirements = "d", "r"
+    session.add_all(jobs)
+    session.commit()
+    return (
+        auth_headers(tech.id, "organization"),
+        auth_headers(user.id, "user"),
+        {job.title: job.id for job in jobs},
+    )
+
+def titles(response):
+    assert response.status_code == 200
+    return sorted(job["title"] for job in response.json())
+
+def counts(facet):
+    return {entry["value"]: entry["count"] for entry in facet}
+
+def test_jobs_are_filtered_by_eligibility_and_facets(session, auth_headers):
+    _, user_headers, _ = seed(session, auth_headers)
+    jobs = lambda **params: client.get("/api/v1/users/jobs", params=params, headers=user_headers)
+
+    assert titles(jobs()) == ["Analyst", "Backend", "Frontend"]
+    assert titles(jobs(eligible="false")) == ["Analyst", "Backend", "Frontend", "Graduate", "Teller"]
+    assert titles(jobs(department="Engineering")) == ["Backend", "Frontend"]
+    assert titles(jobs(industry="Finance")) == ["Analyst"]
+    assert titles(jobs(eligible="false", status="Closed")) == ["Teller"]
+
+    # An unknown age narrows nothing.
+    unknown = User(email="unknown@x.com", password_hash="x", full_name="Unknown")
+    session.add(unknown)
+    session.commit()
+    response = client.get("/api/v1/users/jobs", headers=auth_headers(unknown.id, "user"))
+    assert titles(response) == ["Analyst", "Backend", "Frontend", "Graduate"]
+
+def test_facet_counts_follow_the_filters_and_are_cached(session, auth_headers):
+    org_headers, user_headers, ids = seed(session, auth_headers)
+    facets = lambda **params: client.get("/api/v1/users/jobs/facets", params=params, headers=user_headers)
+
+    eligible = facets().json()
+    assert eligible["total"] == 3
+    assert counts(eligible["department"]) == {"Engineering": 2, "Risk": 1}
+    assert counts(eligible["industry"]) == {"Software": 2, "Finance": 1}
+    assert counts(eligible["status"]) == {"Open": 3}
+    everything = facets(eligible="false").json()
+    assert everything["total"] == 5
+    assert everything["department"][0] == {"value": "Engineering", "count": 3}
+    assert counts(everything["status"]) == {"Open": 4, "Closed": 1}
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        assert facets().json() == eligible
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert statements == []
+
+    # Closing a job drops the cached counts and pages that included it.
+    client.get("/api/v1/users/jobs", headers=user_headers)
+    closed = client.patch(
+        f"/api/v1/organizations/jobs/{ids['Backend']}", headers=org_headers, json={"status": "Closed"}
+    )
+    assert closed.status_code == 200
+    assert facets().json()["total"] == 2
+    assert titles(client.get("/api/v1/users/jobs", headers=user_headers)) == ["Analyst", "Frontend"]
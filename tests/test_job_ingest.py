@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.core.config import settings
+from app.main import app
+from app.models.job import Job
+from app.services.job_ingest import BulkFormatError, iter_csv
+
+client = TestClient(app)
+URL = "/api/v1/organizations/jobs/bulk"
+
+def ndjson(*rows):
+    for row in rows:
+        yield (json.dumps(row) + "\n").encode()
+
+def test_ndjson_rows_are_validated_batched_and_upserted(session, org_headers):
+    headers = {**org_headers, "Content-Type": "application/x-ndjson"}
+    rows = [
+        {"title": f"Job {i}", "description": "d", "requirements": "r", "external_id": f"ats-{i}"}
+        for i in range(5)
+    ]
+    bad = [{"title": "No description", "requirements": "r"}, {"title": "Dup", "description": "d",
+           "requirements": "r", "external_id": "ats-0"}]
+    response = client.post(URL, params={"batch_size": 2}, content=ndjson(*rows, *bad), headers=headers)
+    body = response.json()
+    assert (body["created"], body["updated"], body["failed"]) == (5, 0, 2)
+    assert [error["row"] for error in body["errors"]] == [6, 7]
+    assert body["errors"][0]["errors"][0]["loc"] == ["description"]
+
+    # Replaying in insert mode rejects every row; upsert updates them in place.
+    body = client.post(URL, content=ndjson(*rows), headers=headers).json()
+    assert (body["created"], body["failed"]) == (0, 5)
+    rows[0]["title"] = "Renamed"
+    body = client.post(URL, params={"mode": "upsert"}, content=ndjson(*rows), headers=headers).json()
+    assert (body["created"], body["updated"], body["failed"]) == (0, 5, 0)
+    titles = session.exec(select(Job.title).order_by(Job.id)).all()
+    assert titles == ["Renamed", "Job 1", "Job 2", "Job 3", "Job 4"]
+
+def test_csv_with_quoted_newlines_and_empty_cells(session, org_headers):
+    headers = {**org_headers, "Content-Type": "text/csv"}
+    body = (
+        "title,description,requirements,min_age,external_id\r\n"
+        'Engineer,"Builds things,\nover two lines",Python,,e-1\r\n'
+        "Analyst,Reports,SQL,not-a-number,e-2\r\n"
+        "Short,row\r\n"
+    ).encode()
+    response = client.post(URL, content=body, headers=headers)
+    result = response.json()
+    assert (result["created"], result["failed"]) == (1, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    job = session.exec(select(Job)).one()
+    assert job.description == "Builds things,\nover two lines" and job.min_age is None
+
+    assert client.post(URL, content=b"x", headers={**headers, "Content-Type": "text/plain"}).status_code == 415
+
+def parse_csv(*chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk.encode()
+    async def rows():
+        return [row for _, row, _ in [result async for result in iter_csv(stream())]]
+    return asyncio.run(rows())
+
+def test_csv_records_follow_csv_quoting_rules(monkeypatch):
+    rows = parse_csv(
+        "title,description\n",
+        'Monitor,5" screen\n',
+        'Quote,"a ""b""\nc\n', 'd\ne"\n',
+        "\n",
+        "Last,row",
+    )
+    assert rows == [
+        {"title": "Monitor", "description": '5" screen'},
+        {"title": "Quote", "description": 'a "b"\nc\nd\ne'},
+        {"title": "Last", "description": "row"},
+    ]
+    with pytest.raises(BulkFormatError, match="Unterminated"):
+        parse_csv("title\n", '"open\n', "still open\n")
+
+    # The cap counts bytes, not characters.
+    monkeypatch.setattr(settings, "JOB_BULK_MAX_LINE_BYTES", 20)
+    assert parse_csv("t\n", "\u00e9" * 8 + "\n") == [{"t": "\u00e9" * 8}]
+    with pytest.raises(BulkFormatError, match="exceeds 20 bytes"):
+        parse_csv("t\n", '"' + "\u00e9" * 4 + "\n", "\u00e9" * 4 + "\n", '"\n')
@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.job import Job
+
+client = TestClient(app)
+
+def test_job_writes_reject_nulls_unknown_statuses_and_inverted_age_ranges(session, org, org_headers):
+    job = Job(title="Engineer", description="d", requirements="r", organization_id=org.id, min_age=21)
+    session.add(job)
+    session.commit()
+    url = f"/api/v1/organizations/jobs/{job.id}"
+    patch = lambda body: client.patch(url, json=body, headers=org_headers).status_code
+
+    assert patch({"title": None}) == 422
+    assert patch({"status": None}) == 422
+    assert patch({"status": "Archived"}) == 422
+    assert patch({"min_age": 40, "max_age": 30}) == 422
+    assert patch({"max_age": 18}) == 422
+    assert patch({"min_age": -1}) == 422
+    session.refresh(job)
+    assert (job.title, job.status, job.min_age, job.max_age) == ("Engineer", "Open", 21, None)
+
+    assert patch({"status": "Closed", "department": None, "max_age": 30}) == 200
+    session.refresh(job)
+    assert (job.status, job.max_age) == ("Closed", 30)
+
+    create = lambda body: client.post(
+        "/api/v1/organizations/jobs", headers=org_headers,
+        json={"title": "Job", "description": "d", "requirements": "r", **body},
+    )
+    assert create({"status": "Paused"}).status_code == 422
+    assert create({"min_age": 30, "max_age": 20}).status_code == 422
+    assert create({"status": "Draft"}).json()["status"] == "Draft"
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.models.job import Job
+from app.models.user import User
+from app.services.matching import MatchingEngine
+
+client = TestClient(app)
+
+def job(id, title, min_age=None, max_age=None, status="Open"):
+    return SimpleNamespace(
+        id=id, title=title, department=None, requirements="", description="",
+        min_age=min_age, max_age=max_age, status=status, updated_at=None,
+    )
+
+def user(id, desired_job, age=None):
+    return SimpleNamespace(
+        id=id, desired_job=desired_job, qualification=None, age=age, date_of_birth=None, updated_at=None,
+    )
+
+def test_engine_ranks_and_respects_eligibility():
+    engine = MatchingEngine()
+    engine._ingest(
+        [
+            job(1, "Python Developer"),
+            job(2, "Senior Python Developer", min_age=30),
+            job(3, "Python Developer Intern", status="Closed"),
+            job(4, "Accountant"),
+        ],
+        [user(10, "python developer", age=25), user(11, "python", age=35), user(12, "chef"),
+         user(13, "senior python")],
+    )
+    assert [id for id, _ in engine.recommend_jobs(user(10, "python developer", age=25), 10)] == [1]
+    assert {id for id, _ in engine.recommend_jobs(user(11, "python", age=35), 10)} == {1, 2}
+    assert {id for id, _ in engine.rank_candidates(job(2, "Senior Python Developer", min_age=30), 10)} == {11, 13}
+    # Unknown ages pass age ranges, as on the job board.
+    assert {id for id, _ in engine.recommend_jobs(user(13, "senior python"), 10)} == {1, 2}
+
+    # Incremental updates replace the old vector.
+    engine.upsert_job(job(4, "Python Accountant"))
+    assert 4 in {id for id, _ in engine.recommend_jobs(user(11, "python", age=35), 10)}
+    engine.jobs.compact()
+    assert len(engine.jobs) == 4
+
+def test_recommendation_endpoints(session, org, org_headers, auth_headers):
+    seeker = User(email="u@x.com", password_hash="x", full_name="Seeker", desired_job="Backend developer", age=30)
+    session.add(seeker)
+    session.commit()
+    backend = Job(title="Backend Developer", description="APIs", requirements="Python", organization_id=org.id)
+    session.add(backend)
+    session.commit()
+    user_headers = auth_headers(seeker.id, "user")
+
+    response = client.get("/api/v1/users/jobs/recommended", headers=user_headers)
+    assert response.status_code == 200
+    assert [job["id"] for job in response.json()] == [backend.id]
+
+    # Created after the first load: picked up through the create_job hook.
+    response = client.post(
+        "/api/v1/organizations/jobs",
+        json={"title": "Frontend Developer", "description": "UI", "requirements": "JS", "max_age": 25},
+        headers=org_headers,
+    )
+    frontend_id = response.json()["id"]
+    response = client.get(f"/api/v1/organizations/jobs/{frontend_id}/candidates", headers=org_headers)
+    assert response.json() == []
+    response = client.get(f"/api/v1/organizations/jobs/{backend.id}/candidates", headers=org_headers)
+    assert [candidate["user_id"] for candidate in response.json()] == [seeker.id]
+
+def test_recommendations_follow_other_workers_writes(session, org, auth_headers, monkeypatch):
+    seeker = User(email="u@x.com", password_hash="x", full_name="Seeker", desired_job="Backend developer", age=30)
+    backend = Job(title="Backend Developer", description="APIs", requirements="Python", organization_id=org.id)
+    chef = Job(title="Chef", description="Kitchen", requirements="Cooking", organization_id=org.id)
+    session.add_all([seeker, backend, chef])
+    session.commit()
+    headers = auth_headers(seeker.id, "user")
+    recommended = lambda: [job["id"] for job in client.get("/api/v1/users/jobs/recommended", headers=headers).json()]
+    assert recommended() == [backend.id]
+
+    # Written behind the engine's back, as another worker would. Until the
+    # next refresh the stale index still ranks the job; the lookup drops it.
+    backend.status = "Closed"
+    chef.title = "Backend Developer"
+    session.add_all([backend, chef])
+    session.commit()
+    assert recommended() == []
+
+    monkeypatch.setattr(settings, "MATCHING_REFRESH_SECONDS", 0)
+    assert recommended() == [chef.id]
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+from app.api.middleware import MetricsMiddleware
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import async_engine
+from app.main import app
+from app.models.job import Job
+
+def sample(text, line_prefix):
+    return [float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(line_prefix)]
+
+def test_requests_are_timed_and_their_queries_counted(session, org, org_headers, monkeypatch):
+    session.add(Job(title="Engineer", description="d", requirements="r", organization_id=org.id))
+    session.commit()
+
+    metrics.instrument_engine(async_engine, "primary")
+    monkeypatch.setattr(settings, "METRICS_N_PLUS_ONE_THRESHOLD", 1)
+    client = TestClient(MetricsMiddleware(app))
+    route = '{method="GET",route="/api/v1/organizations/jobs/{job_id}/applications"}'
+    before = sample(metrics.render(), f"http_request_db_queries_count{route}") or [0]
+
+    assert client.get("/api/v1/organizations/jobs/1/applications", headers=org_headers).status_code == 200
+    assert client.get("/api/v1/organizations/jobs/999/applications", headers=org_headers).status_code == 404
+    assert client.get("/nowhere").status_code == 404
+
+    text = metrics.render()
+    assert sample(text, f"http_request_db_queries_count{route}") == [before[0] + 2]
+    assert sample(text, f"http_request_db_queries_sum{route}")[0] >= 3
+    assert sample(text, f"http_request_n_plus_one_total{route}")[0] >= 1
+    assert 'http_request_duration_seconds_bucket{method="GET",route="unmatched",status="404",le="+Inf"}' in text
+    assert sample(text, 'db_pool_checkout_wait_seconds_count{engine="primary"}')[0] >= 1
+    assert 'db_pool_connections_checked_out{engine="primary"} 0' in text
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("latency", "Help.", (0.1, 1.0), ("route",))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, '/a"b')
+    assert histogram.render()[2:] == [
+        'latency_bucket{route="/a\\"b",le="0.1"} 2',
+        'latency_bucket{route="/a\\"b",le="1"} 3',
+        'latency_bucket{route="/a\\"b",le="+Inf"} 4',
+        'latency_sum{route="/a\\"b"} 3.65',
+        'latency_count{route="/a\\"b"} 4',
+    ]
@@ -0,0 +1,74 @@
+import asyncio
+import tempfile
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.migrations import LATEST_VERSION, SchemaVersionError, check_schema_version, migrate
+from app.models import Application, ArchivedJob, Job, Organization
+
+def engines():
+    path = tempfile.mktemp(suffix=".db")
+    return create_engine(f"sqlite:///{path}"), create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+def test_fresh_database_is_created_and_stamped():
+    engine, async_engine = engines()
+    with pytest.raises(SchemaVersionError):
+        asyncio.run(check_schema_version(async_engine))
+
+    assert migrate(engine) == (None, LATEST_VERSION)
+    assert migrate(engine) == (LATEST_VERSION, LATEST_VERSION)
+    assert asyncio.run(check_schema_version(async_engine)) == LATEST_VERSION
+    assert "job_fts" in inspect(engine).get_table_names()
+
+def test_create_all_era_database_is_upgraded():
+    engine, async_engine = engines()
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Roll back to the shape create_all produced before these were added.
+        conn.execute(text("DROP INDEX ix_job_organization_id_external_id"))
+        conn.execute(text("ALTER TABLE job DROP COLUMN external_id"))
+        conn.execute(text("ALTER TABLE user DROP COLUMN cv_text_status"))
+        conn.execute(text("DROP INDEX ix_job_updated_at"))
+        conn.execute(text("ALTER TABLE job DROP COLUMN updated_at"))
+        conn.execute(text("DROP TABLE cvterm"))
+        conn.execute(text("DROP TABLE cvdocument"))
+
+    assert migrate(engine) == (0, LATEST_VERSION)
+    inspector = inspect(engine)
+    assert {"external_id", "updated_at"} <= {column["name"] for column in inspector.get_columns("job")}
+    assert "cv_text_status" in {column["name"] for column in inspector.get_columns("user")}
+    assert {"cvdocument", "cvterm"} <= set(inspector.get_table_names())
+    assert "ix_job_organization_id_external_id" in {index["name"] for index in inspector.get_indexes("job")}
+    assert asyncio.run(check_schema_version(async_engine)) == LATEST_VERSION
+
+def test_sqlite_tables_are_rebuilt_to_stop_reusing_ids(monkeypatch):
+    engine, _ = engines()
+    # The shape of job and application before AUTOINCREMENT was declared.
+    for model in (Job, Application):
+        monkeypatch.setitem(model.__table__.dialect_options["sqlite"], "autoincrement", False)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.undo()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE schema_version (version INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO schema_version VALUES (6)"))
+    with Session(engine) as session:
+        session.add(Organization(id=1, email="org@corp.com", password_hash="x", name="Corp"))
+        session.add(Job(id=1, title="Python", description="d", requirements="r", organization_id=1))
+        session.add(ArchivedJob(id=5, title="Old", description="d", requirements="r", organization_id=1,
+                                date_posted=datetime(2024, 1, 1), status="Closed"))
+        session.commit()
+
+    assert migrate(engine) == (6, LATEST_VERSION)
+    with engine.begin() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'job'")).scalar()
+        assert "AUTOINCREMENT" in sql
+        conn.execute(insert(Job).values(title="Python too", description="d", requirements="r", organization_id=1))
+        assert conn.execute(text("SELECT id FROM job ORDER BY id")).scalars().all() == [1, 6]
+        matches = conn.execute(text("SELECT rowid FROM job_fts WHERE job_fts MATCH 'python' ORDER BY rowid"))
+        assert matches.scalars().all() == [1, 6]
+    indexes = {index["name"] for index in inspect(engine).get_indexes("application")}
+    assert "ix_application_user_id_job_id" in indexes
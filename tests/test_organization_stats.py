@@ -0,0 +1,100 @@
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.core.database import engine
+from app.main import app
+from app.models.user import User
+from app.scripts.rebuild_organization_stats import rebuild_organization_stats
+from app.services.outbox import outbox_worker
+
+client = TestClient(app)
+
+def test_stats_follow_writes_and_match_a_rebuild(session, org_headers, auth_headers):
+    users = [User(email=f"user{i}@x.com", password_hash="x", full_name="User") for i in range(3)]
+    session.add_all(users)
+    session.commit()
+    user_headers = [auth_headers(user.id, "user") for user in users]
+
+    job_ids = []
+    for status in ("Open", "Open", "Draft"):
+        response = client.post(
+            "/api/v1/organizations/jobs", headers=org_headers,
+            json={"title": "Job", "description": "d", "requirements": "r", "status": status},
+        )
+        job_ids.append(response.json()["id"])
+    first, second, _ = job_ids
+    for headers in user_headers:
+        assert client.post(f"/api/v1/users/apply/{first}", headers=headers).status_code == 200
+    response = client.post("/api/v1/users/apply", json={"job_ids": [second]}, headers=user_headers[0])
+    assert response.status_code == 200
+
+    response = client.post(
+        f"/api/v1/organizations/jobs/{first}/applications/status", headers=org_headers,
+        json={"status": "rejected", "from_status": ["pending"]},
+    )
+    assert response.json()["updated"] == 3
+    client.post(
+        f"/api/v1/organizations/jobs/{second}/applications/status", headers=org_headers,
+        json={"status": "accepted"},
+    )
+    client.patch(f"/api/v1/organizations/jobs/{first}", headers=org_headers, json={"status": "Closed"})
+
+    # Applications are counted by the outbox worker, and a rebuild leaves
+    # the ones still queued to it.
+    assert client.get("/api/v1/organizations/stats", headers=org_headers).json()["applications"] == 0
+    assert rebuild_organization_stats(engine) == 1
+    assert asyncio.run(outbox_worker.process_batch()) == 4
+
+    stats = client.get("/api/v1/organizations/stats", params={"days": 7}, headers=org_headers).json()
+    assert stats["open_jobs"] == 1
+    assert stats["jobs_posted"] == 3
+    assert stats["applications"] == 4
+    assert stats["applications_by_status"] == {"pending": 0, "accepted": 1, "rejected": 3}
+    assert len(stats["daily"]) == 7
+    assert stats["daily"][-1] == {"day": datetime.utcnow().date().isoformat(), "jobs_posted": 3, "applications": 4}
+    assert all(day["applications"] == 0 for day in stats["daily"][:-1])
+
+    assert rebuild_organization_stats(engine) == 1
+    rebuilt = client.get("/api/v1/organizations/stats", params={"days": 7}, headers=org_headers).json()
+    assert rebuilt == stats
+
+def test_bulk_upserts_count_new_postings_and_status_changes(session, org_headers):
+    headers = {**org_headers, "Content-Type": "application/x-ndjson"}
+    def upload(statuses):
+        body = "\n".join(
+            json.dumps({"title": "Job", "description": "d", "requirements": "r",
+                        "external_id": f"ext-{i}", "status": status})
+            for i, status in enumerate(statuses)
+        )
+        response = client.post("/api/v1/organizations/jobs/bulk?mode=upsert", content=body, headers=headers)
+        assert response.status_code == 200
+        return client.get("/api/v1/organizations/stats", params={"days": 1}, headers=headers).json()
+
+    assert upload(["Open", "Open"])["open_jobs"] == 2
+    stats = upload(["Closed", "Open", "Open"])
+    assert (stats["open_jobs"], stats["jobs_posted"]) == (2, 3)
+
+def test_a_transition_from_several_statuses_moves_each_one(session, org, org_headers, auth_headers):
+    users = [User(email=f"user{i}@x.com", password_hash="x", full_name="User") for i in range(3)]
+    session.add_all(users)
+    session.commit()
+    job_id = client.post(
+        "/api/v1/organizations/jobs", headers=org_headers,
+        json={"title": "Job", "description": "d", "requirements": "r"},
+    ).json()["id"]
+    ids = [
+        client.post(f"/api/v1/users/apply/{job_id}", headers=auth_headers(user.id, "user")).json()["application_id"]
+        for user in users
+    ]
+    asyncio.run(outbox_worker.process_batch())
+    url = f"/api/v1/organizations/jobs/{job_id}/applications/status"
+    client.post(url, headers=org_headers, json={"status": "accepted", "application_ids": ids[:1]})
+    client.post(url, headers=org_headers, json={"status": "rejected", "application_ids": ids[1:2]})
+
+    response = client.post(url, headers=org_headers, json={"status": "pending"})
+    assert response.json()["updated"] == 2
+    stats = client.get("/api/v1/organizations/stats", headers=org_headers).json()
+    assert stats["applications_by_status"] == {"pending": 3, "accepted": 0, "rejected": 0}
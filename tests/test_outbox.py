@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.core import metrics
+from app.main import app
+from app.models.job import Job
+from app.models.outbox import OutboxEvent
+from app.services import outbox
+
+client = TestClient(app)
+
+def seed(session, org):
+    jobs = [Job(title=f"Job {i}", description="d", requirements="r", organization_id=org.id) for i in range(2)]
+    session.add_all(jobs)
+    session.commit()
+    return [job.id for job in jobs]
+
+def test_applications_are_handled_through_the_outbox(session, org, user_headers, caplog):
+    job_ids = seed(session, org)
+    response = client.post(f"/api/v1/users/apply/{job_ids[0]}", headers=user_headers)
+    application_id = response.json()["application_id"]
+    client.post("/api/v1/users/apply", json={"job_ids": job_ids}, headers=user_headers)
+
+    events = session.exec(select(OutboxEvent).order_by(OutboxEvent.id)).all()
+    assert [(event.topic, event.payload["job_id"]) for event in events] == [
+        (outbox.APPLICATION_CREATED, job_ids[0]), (outbox.APPLICATION_CREATED, job_ids[1]),
+    ]
+    assert events[0].payload["application_id"] == application_id
+
+    with caplog.at_level(logging.INFO, logger="app.notifications"):
+        assert asyncio.run(outbox.outbox_worker.process_batch()) == 2
+    assert f"New application {application_id} for job {job_ids[0]} (Job 0); notify org@corp.com" in caplog.text
+    session.expire_all()
+    assert session.exec(select(OutboxEvent)).all() == []
+    assert asyncio.run(outbox.outbox_worker.process_batch()) == 0
+    assert 'outbox_events_total{topic="application.created",outcome="handled"}' in metrics.render()
+
+def test_failing_events_back_off_then_die(session, monkeypatch):
+    calls = []
+    async def flaky(session, payload):
+        calls.append(payload)
+        raise RuntimeError("downstream unavailable")
+    worker = outbox.OutboxWorker({"test.topic": [flaky]}, batch_size=10)
+    monkeypatch.setattr(outbox.settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    session.add(OutboxEvent(topic="test.topic", payload={"n": 1}))
+    session.commit()
+
+    assert asyncio.run(worker.process_batch()) == 1
+    session.expire_all()
+    event = session.exec(select(OutboxEvent)).one()
+    assert (event.status, event.attempts) == ("pending", 1)
+    assert event.available_at > datetime.utcnow()
+    assert event.last_error == "RuntimeError: downstream unavailable"
+    # Backing off: not due yet.
+    assert asyncio.run(worker.process_batch()) == 0
+
+    event.available_at = datetime.utcnow()
+    session.add(event)
+    session.commit()
+    assert asyncio.run(worker.process_batch()) == 1
+    session.expire_all()
+    event = session.exec(select(OutboxEvent)).one()
+    assert (event.status, event.attempts) == ("dead", 2)
+    assert calls == [{"n": 1}, {"n": 1}]
+    assert worker.lag_seconds >= 0
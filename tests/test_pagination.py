@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.job import Job
+
+client = TestClient(app)
+
+def seed_jobs(session, org, count):
+    # Several jobs share a timestamp so the id tie-breaker is exercised.
+    start = datetime(2024, 1, 1)
+    session.add_all(
+        Job(
+            title=f"Job {i}", description="d", requirements="r",
+            organization_id=org.id, date_posted=start + timedelta(hours=i // 3),
+        )
+        for i in range(count)
+    )
+    session.commit()
+
+def test_cursor_pages_cover_all_jobs_in_order(session, org, user_headers):
+    seed_jobs(session, org, 10)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/users/jobs", params=params, headers=user_headers)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    keys = [(job["date_posted"], job["id"]) for job in seen]
+    assert len(keys) == 10
+    assert keys == sorted(keys, reverse=True)
+
+def test_skip_limit_compatibility_and_invalid_cursor(session, org, user_headers):
+    seed_jobs(session, org, 5)
+    first = client.get("/api/v1/users/jobs", params={"limit": 5}, headers=user_headers).json()
+    page = client.get("/api/v1/users/jobs", params={"skip": 2, "limit": 2}, headers=user_headers)
+    assert [job["id"] for job in page.json()] == [job["id"] for job in first[2:4]]
+
+    response = client.get("/api/v1/users/jobs", params={"cursor": "garbage"}, headers=user_headers)
+    assert response.status_code == 400
@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+from app.api.deps import principal_cache
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.main import app
+
+client = TestClient(app)
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+def test_principal_is_cached_until_cv_upload(session, user, user_headers, auth_headers):
+    misses, hits = principal_cache.misses, principal_cache.hits
+    for _ in range(3):
+        assert client.get("/api/v1/users/jobs", headers=user_headers).status_code == 200
+    assert (principal_cache.misses - misses, principal_cache.hits - hits) == (1, 2)
+    text = metrics.render()
+    assert f'principal_cache_requests{{result="hit"}} {principal_cache.hits}' in text
+    assert f'principal_cache_requests{{result="miss"}} {principal_cache.misses}' in text
+
+    files = {"file": ("cv.pdf", b"cv", "application/pdf")}
+    response = client.post("/api/v1/users/upload-cv", files=files, headers=user_headers)
+    assert response.status_code == 200
+    assert ("user", user.id) not in principal_cache._data
+
+    org_headers = auth_headers(user.id, "organization")
+    assert client.get("/api/v1/organizations/jobs", headers=org_headers).status_code == 404
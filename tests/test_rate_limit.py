@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import rate_limits
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimit, RateLimitExceeded, parse_rate
+from app.main import app
+from app.models.job import Job
+
+client = TestClient(app)
+
+def test_sliding_window_weighs_the_previous_window():
+    now = [120.0]
+    limit = RateLimit("test", "4/minute", MemoryRateLimitBackend(), clock=lambda: now[0])
+    for _ in range(4):
+        asyncio.run(limit.hit("key"))
+    with pytest.raises(RateLimitExceeded) as exc:
+        asyncio.run(limit.hit("key"))
+    assert exc.value.retry_after == 60
+
+    # Halfway into the next window the 5 earlier hits (the rejected one
+    # included) still weigh 2.5; at 0.6 of it they weigh 2.
+    now[0] = 210.0
+    asyncio.run(limit.hit("key"))
+    with pytest.raises(RateLimitExceeded) as exc:
+        asyncio.run(limit.hit("key"))
+    assert exc.value.retry_after == 6
+    assert parse_rate("5/10minutes") == (5, 600)
+
+def test_login_is_limited_per_account(session, monkeypatch):
+    monkeypatch.setattr(
+        rate_limits, "login_per_account",
+        RateLimit("login-account", "2/minute", rate_limits.backend),
+    )
+    form = {"username": "Nobody@x.com", "password": "wrong"}
+    assert [client.post("/api/v1/users/login", data=form).status_code for _ in range(2)] == [400, 400]
+    response = client.post("/api/v1/users/login", data={**form, "username": "nobody@x.com "})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Organizations are counted separately.
+    assert client.post("/api/v1/organizations/login", data=form).status_code == 400
+
+def test_full_concurrency_caps_shed_load(session, org, org_headers, user_headers, monkeypatch):
+    job = Job(title="Engineer", description="d", requirements="r", organization_id=org.id)
+    session.add(job)
+    session.commit()
+
+    monkeypatch.setattr(rate_limits.matching_slots, "in_flight", rate_limits.matching_slots.limit)
+    response = client.get("/api/v1/users/jobs/recommended", headers=user_headers)
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+
+    export = f"/api/v1/organizations/jobs/{job.id}/applications/export"
+    assert client.get(export, headers=org_headers).status_code == 200
+    assert rate_limits.export_slots.in_flight == 0
+    monkeypatch.setattr(rate_limits.export_slots, "in_flight", rate_limits.export_slots.limit)
+    assert client.get(export, headers=org_headers).status_code == 503
+
+def test_export_slot_is_released_when_the_body_is_never_sent():
+    iterated = []
+
+    async def body():
+        iterated.append(True)
+        yield b"never sent"
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("client went away")
+
+    limiter = rate_limits.ConcurrencyLimiter(1)
+    response = rate_limits.CappedStreamingResponse(limiter, body())
+    assert limiter.in_flight == 1
+    with pytest.raises(OSError):
+        asyncio.run(response({"type": "http", "asgi": {"spec_version": "2.3"}}, receive, send))
+    assert limiter.in_flight == 0 and not iterated
@@ -0,0 +1,86 @@
+import tempfile
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.main import app
+from app.models.job import Job
+from app.models.organization import Organization
+
+def seed(session, title):
+    org = Organization(email="org@corp.com", password_hash="x", name="Corp")
+    session.add(org)
+    session.commit()
+    session.add(Job(title=title, description="d", requirements="r", organization_id=org.id))
+    session.commit()
+    return org.id
+
+def test_reads_use_the_replica_until_the_client_writes(session, auth_headers, monkeypatch):
+    replica_path = tempfile.mktemp(suffix=".db")
+    replica = create_engine(f"sqlite:///{replica_path}")
+    SQLModel.metadata.create_all(replica)
+    with Session(replica) as replica_session:
+        seed(replica_session, "Replica job")
+    org_id = seed(session, "Primary job")
+
+    read_engine = create_async_engine(f"sqlite+aiosqlite:///{replica_path}")
+    monkeypatch.setattr(settings, "DATABASE_READ_URL", f"sqlite:///{replica_path}")
+    monkeypatch.setattr(database, "async_read_engine", read_engine)
+    monkeypatch.setattr(
+        database, "async_read_session_maker",
+        async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+
+    client = TestClient(app)
+    headers = auth_headers(org_id, "organization")
+    titles = lambda: [job["title"] for job in client.get("/api/v1/organizations/jobs", headers=headers).json()]
+
+    assert titles() == ["Replica job"]
+
+    response = client.post(
+        "/api/v1/organizations/jobs",
+        json={"title": "New job", "description": "d", "requirements": "r"},
+        headers=headers,
+    )
+    assert database.PRIMARY_READS_COOKIE in response.cookies
+    assert titles() == ["New job", "Primary job"]
+
+    client.cookies.clear()
+    assert titles() == ["Replica job"]
+
+def test_engine_options():
+    options = database.engine_options("postgresql+asyncpg://u:p@db/app")
+    assert options["pool_pre_ping"] and options["echo"] is False
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "30000"}}
+    assert database.engine_options("postgresql://u:p@db/app")["connect_args"] == {
+        "options": "-c statement_timeout=30000"
+    }
+    assert "pool_size" not in database.engine_options("sqlite:///x.db")
+
+def test_primary_reads_hold_one_connection_per_request(session, auth_headers):
+    org_id = seed(session, "Primary job")
+    pool = database.async_engine.sync_engine.pool
+    held, peak = [0], [0]
+    def checkout(*args):
+        held[0] += 1
+        peak[0] = max(peak[0], held[0])
+    def checkin(*args):
+        held[0] -= 1
+    event.listen(pool, "checkout", checkout)
+    event.listen(pool, "checkin", checkin)
+    try:
+        response = TestClient(app).get(
+            "/api/v1/organizations/jobs",
+            headers=auth_headers(org_id, "organization"),
+        )
+    finally:
+        event.remove(pool, "checkout", checkout)
+        event.remove(pool, "checkin", checkin)
+    assert response.status_code == 200
+    # The principal lookup and the listing share the connection.
+    assert peak[0] == 1
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.job import Job
+
+client = TestClient(app)
+
+def seed(session, org):
+    jobs = [
+        Job(title="Python Developer", description="Build APIs in Python", requirements="Python, SQL",
+            department="Engineering", organization_id=org.id),
+        Job(title="Data Analyst", description="Reporting", requirements="Some Python",
+            department="Data", organization_id=org.id),
+        Job(title="Accountant", description="Ledgers", requirements="CPA",
+            department="Finance", organization_id=org.id),
+    ]
+    session.add_all(jobs)
+    session.commit()
+    return jobs
+
+def search(headers, **params):
+    response = client.get("/api/v1/users/jobs/search", params=params, headers=headers)
+    assert response.status_code == 200
+    return response
+
+def test_search_ranks_filters_and_pages(session, org, user_headers):
+    developer, analyst, _ = seed(session, org)
+
+    titles = [job["title"] for job in search(user_headers, q="python").json()]
+    assert titles == ["Python Developer", "Data Analyst"]
+
+    assert [job["id"] for job in search(user_headers, q="python", department="Data").json()] == [analyst.id]
+
+    first = search(user_headers, q="python", limit=1)
+    second = search(user_headers, q="python", limit=1, cursor=first.headers["X-Next-Cursor"])
+    assert [first.json()[0]["id"], second.json()[0]["id"]] == [developer.id, analyst.id]
+
+    # FTS syntax in user input is treated as plain terms.
+    assert search(user_headers, q='"python (*').json()
+
+def test_search_follows_job_updates(session, org, org_headers, user_headers):
+    _, _, accountant = seed(session, org)
+    assert search(user_headers, q="bookkeeping").json() == []
+
+    response = client.patch(
+        f"/api/v1/organizations/jobs/{accountant.id}",
+        json={"description": "Bookkeeping and ledgers"},
+        headers=org_headers,
+    )
+    assert response.status_code == 200
+    assert [job["id"] for job in search(user_headers, q="bookkeeping").json()] == [accountant.id]